@@ -2,7 +2,7 @@
 Base Agent class untuk semua agent.
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterator, List
 from config import settings
 
 
@@ -18,6 +18,7 @@ class BaseAgent(ABC):
         """
         self.model_type = model_type
         self.settings = settings
+        self._client = None
     
     @abstractmethod
     def generate_response(self, query: str, context: Optional[str] = None, **kwargs) -> str:
@@ -34,6 +35,22 @@ class BaseAgent(ABC):
         """
         pass
     
+    def stream_response(self, query: str, context: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        Generate response dari agent sebagai stream token.
+        
+        Default implementation mengembalikan seluruh response sebagai satu chunk.
+        
+        Args:
+            query: Pertanyaan user
+            context: Konteks tambahan jika ada
+            **kwargs: Parameter tambahan
+            
+        Returns:
+            Iterator potongan response
+        """
+        yield self.generate_response(query, context, **kwargs)
+    
     @abstractmethod
     def get_system_prompt(self) -> str:
         """
@@ -45,7 +62,13 @@ class BaseAgent(ABC):
         pass
     
     def _get_model_client(self):
-        """Get client untuk model yang dipilih."""
+        """Get client untuk model yang dipilih (dibuat sekali per agent, connection pool dipakai ulang)."""
+        if self._client is None:
+            self._client = self._create_model_client()
+        return self._client
+    
+    def _create_model_client(self):
+        """Buat client baru untuk model yang dipilih."""
         if self.model_type == "telkom-ai":
             from openai import OpenAI
             return OpenAI(
@@ -58,3 +81,37 @@ class BaseAgent(ABC):
             return genai.GenerativeModel(self.settings.gemini_model)
         else:
             raise ValueError(f"Unsupported model type: {self.model_type}")
+
+    @staticmethod
+    def _telkom_ai_options(max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Opsi generate Telkom AI (OpenAI-compatible), misalnya batas max_tokens dari QoS."""
+        return {"max_tokens": max_tokens} if max_tokens else {}
+    
+    @staticmethod
+    def _gemini_options(max_tokens: Optional[int] = None) -> Dict[str, Any]:
+        """Opsi generate Gemini, misalnya batas max_output_tokens dari QoS."""
+        return {"generation_config": {"max_output_tokens": max_tokens}} if max_tokens else {}
+    
+    def _stream_telkom_ai(self, client, json_messages: List[Dict[str, str]],
+                          max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Stream token dari Telkom AI (OpenAI-compatible)."""
+        stream = client.chat.completions.create(
+            model=self.settings.telkom_ai_model,
+            messages=json_messages,
+            stream=True,
+            **self._telkom_ai_options(max_tokens)
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def _stream_gemini(self, client, prompt: str, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Stream token dari Gemini."""
+        for chunk in client.generate_content(prompt, stream=True, **self._gemini_options(max_tokens)):
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk tanpa parts (misalnya hanya finish_reason)
+                continue
+            if text:
+                yield text
@@ -1,7 +1,7 @@
 """
 General Agent - Seperti ChatGPT yang bisa menjawab pertanyaan umum.
 """
-from typing import Optional
+from typing import Optional, Iterator, List, Dict
 from .base_agent import BaseAgent
 from langchain_core.messages import HumanMessage, SystemMessage
 
@@ -30,6 +30,34 @@ class GeneralAgent(BaseAgent):
         Selalu berikan jawaban yang lengkap namun tidak berbelit-belit. Jika ada informasi yang kurang jelas, 
         jangan ragu untuk meminta klarifikasi dari user."""
     
+    def _build_json_messages(self, query: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+        """Susun messages format JSON untuk Telkom AI."""
+        messages = [
+            SystemMessage(content=self.get_system_prompt())
+        ]
+        
+        if context:
+            messages.append(SystemMessage(content=f"Konteks tambahan: {context}"))
+        
+        messages.append(HumanMessage(content=query))
+
+        # Konversi ke format JSON
+        return [
+            {"role": "system" if isinstance(m, SystemMessage) else "user", "content": m.content}
+            for m in messages
+        ]
+    
+    def _build_gemini_prompt(self, query: str, context: Optional[str] = None) -> str:
+        """Susun prompt untuk Gemini."""
+        # Untuk Gemini, gabungkan system prompt dengan query
+        full_prompt = f"{self.get_system_prompt()}\n\n"
+        
+        if context:
+            full_prompt += f"Konteks tambahan: {context}\n\n"
+        
+        full_prompt += f"Pertanyaan: {query}\n\nJawaban:"
+        return full_prompt
+    
     def generate_response(self, query: str, context: Optional[str] = None, **kwargs) -> str:
         """
         Generate response untuk pertanyaan umum.
@@ -37,7 +65,7 @@ class GeneralAgent(BaseAgent):
         Args:
             query: Pertanyaan user
             context: Konteks tambahan (opsional)
-            **kwargs: Parameter tambahan
+            **kwargs: Parameter tambahan, 'max_tokens' untuk membatasi panjang jawaban
             
         Returns:
             Response dari General Agent
@@ -45,41 +73,45 @@ class GeneralAgent(BaseAgent):
         try:
             if self.model_type == "telkom-ai":
                 client = self._get_model_client()
-                
-                messages = [
-                    SystemMessage(content=self.get_system_prompt())
-                ]
-                
-                if context:
-                    messages.append(SystemMessage(content=f"Konteks tambahan: {context}"))
-                
-                messages.append(HumanMessage(content=query))
-
-                # Konversi ke format JSON
-                json_messages = [
-                    {"role": "system" if isinstance(m, SystemMessage) else "user", "content": m.content}
-                    for m in messages
-                ]
                 completion = client.chat.completions.create(
                     model=self.settings.telkom_ai_model,
-                    messages=json_messages
+                    messages=self._build_json_messages(query, context),
+                    **self._telkom_ai_options(kwargs.get("max_tokens"))
                 )
 
                 return completion.choices[0].message.content
 
             elif self.model_type == "gemini":
                 client = self._get_model_client()
-                
-                # Untuk Gemini, gabungkan system prompt dengan query
-                full_prompt = f"{self.get_system_prompt()}\n\n"
-                
-                if context:
-                    full_prompt += f"Konteks tambahan: {context}\n\n"
-                
-                full_prompt += f"Pertanyaan: {query}\n\nJawaban:"
-                
-                response = client.generate_content(full_prompt)
+                response = client.generate_content(
+                    self._build_gemini_prompt(query, context), **self._gemini_options(kwargs.get("max_tokens"))
+                )
                 return response.text
                 
         except Exception as e:
             return f"Maaf, terjadi kesalahan dalam memproses pertanyaan Anda: {str(e)}"
+    
+    def stream_response(self, query: str, context: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        Stream response untuk pertanyaan umum.
+        
+        Args:
+            query: Pertanyaan user
+            context: Konteks tambahan (opsional)
+            **kwargs: Parameter tambahan, 'max_tokens' untuk membatasi panjang jawaban
+            
+        Returns:
+            Iterator potongan response
+        """
+        try:
+            client = self._get_model_client()
+            if self.model_type == "telkom-ai":
+                yield from self._stream_telkom_ai(
+                    client, self._build_json_messages(query, context), kwargs.get("max_tokens")
+                )
+            elif self.model_type == "gemini":
+                yield from self._stream_gemini(
+                    client, self._build_gemini_prompt(query, context), kwargs.get("max_tokens")
+                )
+        except Exception as e:
+            yield f"Maaf, terjadi kesalahan dalam memproses pertanyaan Anda: {str(e)}"
@@ -1,13 +1,63 @@
 """
 Marketing Agent - Berbasis RAG untuk analisis marketing.
 """
-from typing import Optional, List
+from typing import Optional, List, Dict, Any, Iterator
 from .base_agent import BaseAgent
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.documents import Document
 from langchain.chains import RetrievalQA
 from langchain_openai import ChatOpenAI
 from services.vector_service import VectorService
+from services.query_log import record_retrieval
+from .topic_router import OFF_TOPIC_RESPONSE, default_router
+from utils.logger import setup_logger
 import google.generativeai as genai
+import re
+
+
+logger = setup_logger("agents.marketing_agent")
+
+# Perkiraan kasar untuk budget token konteks
+CHARS_PER_TOKEN = 4
+
+# Pasangan sinonim Indonesia/Inggris dari topic_router.MARKETING_KEYWORDS untuk query variants
+MARKETING_SYNONYMS = {
+    'pemasaran': ['marketing'],
+    'marketing': ['pemasaran'],
+    'pasar': ['market'],
+    'market': ['pasar'],
+    'kompetitor': ['competitor'],
+    'competitor': ['kompetitor'],
+    'pelanggan': ['customer', 'konsumen'],
+    'customer': ['pelanggan', 'konsumen'],
+    'konsumen': ['pelanggan', 'customer'],
+    'penjualan': ['sales'],
+    'sales': ['penjualan'],
+    'kampanye': ['campaign'],
+    'campaign': ['kampanye'],
+    'iklan': ['advertising'],
+    'advertising': ['iklan'],
+    'promosi': ['promotion'],
+    'promotion': ['promosi'],
+    'tren': ['trend'],
+    'trend': ['tren'],
+    'harga': ['pricing'],
+    'pricing': ['harga'],
+    'distribusi': ['distribution'],
+    'distribution': ['distribusi'],
+    'roi': ['return on investment'],
+    'kpi': ['key performance indicator'],
+    'ctr': ['click-through rate'],
+    'cpc': ['cost per click'],
+    'cpm': ['cost per mille'],
+    'roas': ['return on ad spend'],
+    'ltv': ['customer lifetime value'],
+}
+
+_SYNONYM_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(map(re.escape, MARKETING_SYNONYMS), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE
+)
 
 
 class MarketingAgent(BaseAgent):
@@ -19,6 +69,7 @@ class MarketingAgent(BaseAgent):
     def __init__(self, model_type: str = "telkom-ai"):
         super().__init__(model_type)
         self.vector_service = VectorService(collection_name=self.settings.qdrant_marketing_collection)
+        self.router = default_router
     
     def get_system_prompt_example(self) -> str:
         """System prompt untuk Marketing Agent."""
@@ -74,21 +125,182 @@ class MarketingAgent(BaseAgent):
             partial_variables={"system_prompt": self.get_system_prompt()}
         )
     
-    def _is_marketing_related(self, query: str) -> bool:
-        """Check apakah pertanyaan berkaitan dengan marketing."""
-        marketing_keywords = [
-            'marketing', 'pemasaran', 'pasar', 'market', 'kompetitor', 'competitor',
-            'pelanggan', 'customer', 'konsumen', 'penjualan', 'sales', 'kampanye',
-            'campaign', 'brand', 'branding', 'advertising', 'iklan', 'promosi',
-            'promotion', 'roi', 'revenue', 'tren', 'trend', 'segmentasi', 'targeting',
-            'positioning', 'pricing', 'harga', 'distribusi', 'distribution',
-            'digital marketing', 'social media', 'seo', 'sem', 'content marketing',
-            'email marketing', 'influencer', 'engagement', 'conversion', 'funnel',
-            'analytics', 'metrics', 'kpi', 'ctr', 'cpc', 'cpm', 'roas', 'ltv'
+    def _is_marketing_related(self, query: str, context: Optional[str] = None) -> bool:
+        """Check apakah pertanyaan (dalam konteks percakapannya) berkaitan dengan marketing."""
+        return self.router.classify(query, context).is_marketing
+    
+    def _should_refuse(self, query: str, context: Optional[str] = None) -> bool:
+        """True jika query off-topic dan harus langsung ditolak tanpa retrieval/LLM call."""
+        return self.settings.marketing_topic_router_enabled and not self._is_marketing_related(query, context)
+    
+    def _generate_query_variants(self, query: str) -> List[str]:
+        """
+        Buat variasi query untuk multi-query retrieval.
+        
+        Variasi rule-based mengganti istilah marketing dengan sinonimnya
+        (Indonesia <-> Inggris). Jika diaktifkan, variasi tambahan dibuat oleh LLM.
+        
+        Args:
+            query: Pertanyaan user
+            
+        Returns:
+            List query, elemen pertama selalu query asli
+        """
+        max_variants = self.settings.marketing_multi_query_max_variants
+        variants = [query]
+        
+        # Semua istilah diganti sekaligus (misalnya query Indonesia -> Inggris)
+        translated = _SYNONYM_PATTERN.sub(lambda m: MARKETING_SYNONYMS[m.group(1).lower()][0], query)
+        if translated != query:
+            variants.append(translated)
+        
+        for match in _SYNONYM_PATTERN.finditer(query):
+            for synonym in MARKETING_SYNONYMS[match.group(1).lower()]:
+                variant = query[:match.start()] + synonym + query[match.end():]
+                if variant not in variants:
+                    variants.append(variant)
+        
+        if self.settings.marketing_multi_query_llm:
+            for variant in self._generate_llm_query_variants(query):
+                if variant not in variants:
+                    variants.append(variant)
+        
+        return variants[:max_variants]
+    
+    def _generate_llm_query_variants(self, query: str, n: int = 2) -> List[str]:
+        """
+        Minta LLM membuat parafrase query untuk retrieval.
+        
+        Args:
+            query: Pertanyaan user
+            n: Jumlah parafrase
+            
+        Returns:
+            List parafrase (kosong jika gagal)
+        """
+        prompt = (
+            f"Tulis {n} parafrase berbeda dari pertanyaan marketing berikut untuk pencarian dokumen. "
+            f"Tulis satu parafrase per baris tanpa penomoran.\n\nPertanyaan: {query}"
+        )
+        try:
+            client = self._get_model_client()
+            if self.model_type == "telkom-ai":
+                completion = client.chat.completions.create(
+                    model=self.settings.telkom_ai_model,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+                text = completion.choices[0].message.content
+            elif self.model_type == "gemini":
+                text = client.generate_content(prompt).text
+            else:
+                return []
+            lines = [line.strip(" -*\t") for line in (text or "").splitlines()]
+            return [line for line in lines if line][:n]
+        except Exception as e:
+            logger.error("Error generating query variants: %s", e)
+            return []
+    
+    def get_vector_service(self, tenant_id: Optional[str] = None) -> VectorService:
+        """
+        VectorService knowledge base, di-scope ke tenant jika diberikan.
+        
+        Args:
+            tenant_id: Id tenant (default: tenant default dari settings)
+        """
+        if tenant_id is None:
+            return self.vector_service
+        return self.vector_service.for_tenant(tenant_id)
+    
+    def _retrieve_context(self, query: str, documents: Optional[List[Document]] = None,
+                          tenant_id: Optional[str] = None, k: int = 3,
+                          context_tokens: Optional[int] = None) -> str:
+        """
+        Ambil konteks dari knowledge base untuk query.
+        
+        Args:
+            query: Pertanyaan user
+            documents: Dokumen hasil retrieval sebelumnya; jika diberikan, search dilewati
+            tenant_id: Tenant yang knowledge base-nya dicari
+            k: Jumlah chunk yang diambil
+            context_tokens: Budget token konteks (perkiraan); None berarti tanpa batas
+        """
+        vector_service = self.get_vector_service(tenant_id)
+        if documents is not None:
+            relevant_docs = documents[:k]
+        elif self.settings.marketing_multi_query:
+            # Dengan two-tier aktif, setiap variasi dicari lewat two-tier retrieval
+            relevant_docs = vector_service.multi_query_search(
+                self._generate_query_variants(query), k=k,
+                two_tier=self.settings.marketing_two_tier_retrieval
+            )
+        elif self.settings.marketing_two_tier_retrieval:
+            relevant_docs = vector_service.two_tier_search(query, k=k)
+        else:
+            relevant_docs = vector_service.similarity_search(query, k=k)
+        
+        if relevant_docs:
+            record_retrieval(relevant_docs)
+            context = "\n".join([doc.page_content for doc in relevant_docs])
+            if context_tokens is not None:
+                context = context[:context_tokens * CHARS_PER_TOKEN]
+            return context
+        return "Tidak ada informasi relevan dalam knowledge base."
+    
+    def retrieve_batch(self, queries: List[str], tenant_id: Optional[str] = None, k: int = 3) -> List[List[Document]]:
+        """
+        Retrieval untuk banyak query dengan mode yang sama seperti chat (multi-query/two-tier).
+        
+        Args:
+            queries: List pertanyaan
+            tenant_id: Tenant yang knowledge base-nya dicari
+            k: Jumlah chunk per query
+            
+        Returns:
+            List dokumen per query, urutannya sama dengan queries
+            
+        Raises:
+            Exception: Error embedding atau Qdrant diteruskan (lihat VectorService.similarity_search_batch)
+        """
+        vector_service = self.get_vector_service(tenant_id)
+        two_tier = self.settings.marketing_two_tier_retrieval
+        if self.settings.marketing_multi_query:
+            return vector_service.multi_query_search_batch(
+                [self._generate_query_variants(query) for query in queries], k=k, two_tier=two_tier
+            )
+        if two_tier:
+            return vector_service.two_tier_search_batch(queries, k=k)
+        return vector_service.similarity_search_batch(queries, k=k)
+    
+    def _context_from_kwargs(self, query: str, kwargs: Dict[str, Any]) -> str:
+        """Retrieve konteks dengan parameter dari kwargs generate/stream response."""
+        return self._retrieve_context(
+            query,
+            documents=kwargs.get("documents"),
+            tenant_id=kwargs.get("tenant_id"),
+            k=kwargs.get("k", 3),
+            context_tokens=kwargs.get("context_tokens")
+        )
+    
+    def _build_json_messages(self, query: str, context: str) -> List[Dict[str, str]]:
+        """Susun messages format JSON untuk Telkom AI."""
+        messages = [
+            SystemMessage(content=self.get_system_prompt()),
+            SystemMessage(content=f"Konteks dari knowledge base: {context}"),
+            HumanMessage(content=query)
         ]
         
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in marketing_keywords)
+        # Konversi ke format JSON
+        return [
+            {"role": "system" if isinstance(m, SystemMessage) else "user", "content": m.content}
+            for m in messages
+        ]
+    
+    def _build_gemini_prompt(self, query: str, context: str) -> str:
+        """Susun prompt untuk Gemini."""
+        full_prompt = f"{self.get_system_prompt()}\n\n"
+        full_prompt += f"Konteks dari knowledge base: {context}\n\n"
+        full_prompt += f"Pertanyaan: {query}\n\nJawaban:"
+        return full_prompt
     
     def generate_response(self, query: str, context: Optional[str] = None, **kwargs) -> str:
         """
@@ -96,66 +308,87 @@ class MarketingAgent(BaseAgent):
         
         Args:
             query: Pertanyaan user
-            context: Konteks tambahan (opsional)
-            **kwargs: Parameter tambahan
+            context: Konteks tambahan (opsional), misalnya pesan sebelumnya; dipakai topic
+                router agar pertanyaan lanjutan tanpa keyword tidak ditolak
+            **kwargs: Parameter tambahan, 'documents' untuk hasil retrieval yang sudah ada,
+                'tenant_id' untuk scope knowledge base, 'k', 'context_tokens' dan
+                'max_tokens' untuk membatasi retrieval dan jawaban
             
         Returns:
             Response dari Marketing Agent
         """
+        if self._should_refuse(query, context):
+            return OFF_TOPIC_RESPONSE
+        
         try:
                 # Search knowledge base
-                relevant_docs = self.vector_service.similarity_search(query, k=3)
-                
-                if relevant_docs:
-                    context = "\n".join([doc.page_content for doc in relevant_docs])
-                else:
-                    context = "Tidak ada informasi relevan dalam knowledge base."
+                context = self._context_from_kwargs(query, kwargs)
                 
                 if self.model_type == "telkom-ai":
                     client = self._get_model_client()
-                    
-                    messages = [
-                        SystemMessage(content=self.get_system_prompt()),
-                        SystemMessage(content=f"Konteks dari knowledge base: {context}"),
-                        HumanMessage(content=query)
-                    ]
-                    
-                    # Konversi ke format JSON
-                    json_messages = [
-                        {"role": "system" if isinstance(m, SystemMessage) else "user", "content": m.content}
-                        for m in messages
-                    ]
-                    
                     completion = client.chat.completions.create(
                         model=self.settings.telkom_ai_model,
-                        messages=json_messages
+                        messages=self._build_json_messages(query, context),
+                        **self._telkom_ai_options(kwargs.get("max_tokens"))
                     )
                     return completion.choices[0].message.content
                     
                 elif self.model_type == "gemini":
                     client = self._get_model_client()
-                    
-                    full_prompt = f"{self.get_system_prompt()}\n\n"
-                    full_prompt += f"Konteks dari knowledge base: {context}\n\n"
-                    full_prompt += f"Pertanyaan: {query}\n\nJawaban:"
-                    
-                    response = client.generate_content(full_prompt)
+                    response = client.generate_content(
+                        self._build_gemini_prompt(query, context), **self._gemini_options(kwargs.get("max_tokens"))
+                    )
                     return response.text
                     
         except Exception as e:
             return f"Maaf, terjadi kesalahan dalam memproses analisis marketing: {str(e)}"
     
-    def add_marketing_documents(self, documents: List[str], metadata_list: List[dict] = None):
+    def stream_response(self, query: str, context: Optional[str] = None, **kwargs) -> Iterator[str]:
+        """
+        Stream response untuk pertanyaan marketing analysis.
+        
+        Args:
+            query: Pertanyaan user
+            context: Konteks tambahan (opsional), misalnya pesan sebelumnya; dipakai topic
+                router agar pertanyaan lanjutan tanpa keyword tidak ditolak
+            **kwargs: Parameter tambahan, 'documents' untuk hasil retrieval yang sudah ada,
+                'tenant_id' untuk scope knowledge base, 'k', 'context_tokens' dan
+                'max_tokens' untuk membatasi retrieval dan jawaban
+            
+        Returns:
+            Iterator potongan response
+        """
+        if self._should_refuse(query, context):
+            yield OFF_TOPIC_RESPONSE
+            return
+        
+        try:
+            context = self._context_from_kwargs(query, kwargs)
+            client = self._get_model_client()
+            if self.model_type == "telkom-ai":
+                yield from self._stream_telkom_ai(
+                    client, self._build_json_messages(query, context), kwargs.get("max_tokens")
+                )
+            elif self.model_type == "gemini":
+                yield from self._stream_gemini(
+                    client, self._build_gemini_prompt(query, context), kwargs.get("max_tokens")
+                )
+        except Exception as e:
+            yield f"Maaf, terjadi kesalahan dalam memproses analisis marketing: {str(e)}"
+    
+    def add_marketing_documents(self, documents: List[str], metadata_list: List[dict] = None,
+                                tenant_id: Optional[str] = None):
         """
         Menambahkan dokumen marketing ke knowledge base.
         
         Args:
             documents: List dokumen text
             metadata_list: List metadata untuk setiap dokumen
+            tenant_id: Tenant pemilik dokumen
         """
         try:
-            self.vector_service.add_documents(documents, metadata_list)
+            self.get_vector_service(tenant_id).add_documents(documents, metadata_list)
             return True
         except Exception as e:
-            print(f"Error adding marketing documents: {str(e)}")
+            logger.error("Error adding marketing documents: %s", e)
             return False
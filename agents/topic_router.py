@@ -0,0 +1,98 @@
+"""
+Topic router untuk Marketing Agent.
+
+Keyword marketing (Indonesia dan Inggris) dikompilasi sekali menjadi satu regex
+dengan word boundary sehingga klasifikasi hanya butuh satu regex scan.
+"""
+import re
+from typing import NamedTuple, Optional, Iterable
+
+from utils.logger import setup_logger
+
+
+MARKETING_KEYWORDS = [
+    'marketing', 'pemasaran', 'pasar', 'market', 'kompetitor', 'competitor',
+    'pelanggan', 'customer', 'konsumen', 'penjualan', 'sales', 'kampanye',
+    'campaign', 'brand', 'branding', 'advertising', 'iklan', 'promosi',
+    'promotion', 'roi', 'revenue', 'tren', 'trend', 'segmentasi', 'targeting',
+    'positioning', 'pricing', 'harga', 'distribusi', 'distribution',
+    'digital marketing', 'social media', 'seo', 'sem', 'content marketing',
+    'email marketing', 'influencer', 'engagement', 'conversion', 'funnel',
+    'analytics', 'metrics', 'kpi', 'ctr', 'cpc', 'cpm', 'roas', 'ltv',
+    # Tambahan istilah yang sering muncul di pertanyaan analis
+    'segmentation', 'konversi', 'merek', 'promo', 'diskon', 'discount',
+    'pangsa pasar', 'market share', 'retensi', 'retention', 'churn',
+    'loyalitas', 'loyalty', 'audiens', 'audience', 'pendapatan',
+    'media sosial', 'omzet', 'margin', 'cac', 'arpu', 'nps', 'go-to-market',
+]
+
+# Istilah pendek (akronim) harus cocok utuh; istilah lain boleh diikuti akhiran
+# (misalnya "pemasarannya", "campaigns", "trending").
+_EXACT_MAX_LENGTH = 4
+
+OFF_TOPIC_RESPONSE = (
+    "Maaf, saya hanya dapat membantu dengan pertanyaan seputar analisis marketing dan pemasaran."
+)
+
+
+class RouteDecision(NamedTuple):
+    """Hasil klasifikasi topic router."""
+    is_marketing: bool
+    matched: Optional[str] = None
+
+
+def _compile_pattern(keywords: Iterable[str]) -> "re.Pattern":
+    """Kompilasi keyword menjadi satu regex alternation."""
+    alternatives = []
+    # Keyword terpanjang dulu agar frasa ("digital marketing") menang atas kata tunggal
+    for keyword in sorted(set(keywords), key=len, reverse=True):
+        escaped = r"\s+".join(re.escape(part) for part in keyword.split())
+        if len(keyword) <= _EXACT_MAX_LENGTH:
+            alternatives.append(escaped + r"\b")
+        else:
+            alternatives.append(escaped + r"\w*")
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")", re.IGNORECASE)
+
+
+class TopicRouter:
+    """Klasifikasi cepat apakah query berkaitan dengan marketing."""
+
+    def __init__(self, keywords: Iterable[str] = MARKETING_KEYWORDS):
+        """
+        Initialize TopicRouter.
+
+        Args:
+            keywords: Keyword marketing
+        """
+        self._pattern = _compile_pattern(keywords)
+        self.logger = setup_logger("agents.topic_router")
+
+    def classify(self, query: str, context: Optional[str] = None) -> RouteDecision:
+        """
+        Klasifikasi query dalam konteks percakapannya.
+
+        Pertanyaan lanjutan sering tanpa keyword ("bagaimana dengan bulan lalu?"),
+        jadi jika query tidak cocok, konteks percakapan ikut diperiksa.
+
+        Args:
+            query: Pertanyaan user
+            context: Pesan sebelumnya dalam percakapan (opsional)
+
+        Returns:
+            RouteDecision dengan keyword yang cocok (jika ada)
+        """
+        match = self._pattern.search(query)
+        if match is None and context:
+            match = self._pattern.search(context)
+        decision = RouteDecision(is_marketing=match is not None,
+                                 matched=match.group(0).lower() if match else None)
+        # Hanya keputusan dan keyword yang dicatat, bukan teks query; DEBUG di-sample
+        self.logger.debug("topic_route", extra={
+            "decision": "marketing" if decision.is_marketing else "off_topic",
+            "matched": decision.matched,
+        })
+        return decision
+
+
+# Router default, dikompilasi sekali saat import
+default_router = TopicRouter()
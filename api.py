@@ -0,0 +1,203 @@
+"""
+Headless HTTP API untuk AI Agent.
+
+Menyediakan endpoint chat, streaming chat, ingestion dokumen dan informasi
+collection di atas AgentService dan VectorService. Setiap worker memiliki
+AgentService, VectorService dan client pool sendiri.
+
+Jalankan dengan:
+    uvicorn api:app --host 0.0.0.0 --port 8080 --workers 4
+atau:
+    python api.py
+"""
+from functools import lru_cache
+from typing import Optional, Dict, Any
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from services import AgentService, extract_text_from_pdf
+from services.vector_service import VectorService
+from utils import setup_logger, request_context, validate_model_type, validate_agent_type
+from config import settings
+
+
+logger = setup_logger("api")
+
+app = FastAPI(
+    title="AI Agent Assistant API",
+    description="Headless API untuk General Agent dan Marketing Agent"
+)
+
+
+@app.middleware("http")
+async def add_request_id(request: Request, call_next):
+    """Pakai X-Request-ID dari load balancer (atau buat baru) untuk semua log request ini."""
+    with request_context(request.headers.get("x-request-id")) as request_id:
+        response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+class ChatRequest(BaseModel):
+    """Body request untuk endpoint chat."""
+    query: str
+    agent_type: str = "general"
+    model_type: str = "telkom-ai"
+    context: Optional[str] = None
+    profile: bool = False
+    tenant_id: Optional[str] = None
+
+
+class ChatResponse(BaseModel):
+    """Body response untuk endpoint chat."""
+    response: str
+    agent_type: str
+    model_type: str
+
+
+@lru_cache(maxsize=1)
+def get_agent_service() -> AgentService:
+    """AgentService per worker process."""
+    return AgentService()
+
+
+@lru_cache(maxsize=None)
+def get_vector_service(collection_name: str) -> VectorService:
+    """VectorService per collection per worker process."""
+    return VectorService(collection_name=collection_name)
+
+
+def _tenant_vector_service(collection_name: str, tenant_id: Optional[str]) -> VectorService:
+    """VectorService collection, di-scope ke tenant jika diberikan."""
+    vector_service = get_vector_service(collection_name)
+    return vector_service.for_tenant(tenant_id) if tenant_id else vector_service
+
+
+def _known_collections():
+    """Collection yang boleh diakses lewat API."""
+    return {settings.qdrant_collection_name, settings.qdrant_marketing_collection}
+
+
+def _validate_collection(collection_name: str):
+    """Tolak collection yang tidak dikonfigurasi."""
+    if collection_name not in _known_collections():
+        raise HTTPException(status_code=404, detail=f"Collection not found: {collection_name}")
+
+
+def _validate_chat_request(request: ChatRequest):
+    """Validasi agent dan model type."""
+    if not validate_agent_type(request.agent_type):
+        raise HTTPException(status_code=400, detail=f"Unsupported agent type: {request.agent_type}")
+    if not validate_model_type(request.model_type):
+        raise HTTPException(status_code=400, detail=f"Unsupported model type: {request.model_type}")
+
+
+@app.get("/health")
+def health() -> Dict[str, str]:
+    """Health check untuk load balancer."""
+    return {"status": "ok"}
+
+
+@app.get("/metrics/qos")
+def qos_metrics() -> Dict[str, Any]:
+    """Level degradasi QoS dan metrik beban worker ini."""
+    return get_agent_service().get_qos_status()
+
+
+@app.post("/chat", response_model=ChatResponse)
+def chat(request: ChatRequest) -> ChatResponse:
+    """Chat dengan agent yang dipilih."""
+    _validate_chat_request(request)
+    response = get_agent_service().chat(
+        query=request.query,
+        agent_type=request.agent_type,
+        model_type=request.model_type,
+        context=request.context,
+        profile=request.profile,
+        tenant_id=request.tenant_id
+    )
+    return ChatResponse(response=response, agent_type=request.agent_type, model_type=request.model_type)
+
+
+@app.post("/chat/stream")
+def chat_stream(request: ChatRequest) -> StreamingResponse:
+    """Chat dengan agent yang dipilih, response dikirim sebagai stream text."""
+    _validate_chat_request(request)
+    stream = get_agent_service().chat_stream(
+        query=request.query,
+        agent_type=request.agent_type,
+        model_type=request.model_type,
+        context=request.context,
+        tenant_id=request.tenant_id
+    )
+    return StreamingResponse(stream, media_type="text/plain; charset=utf-8")
+
+
+@app.post("/ingest")
+def ingest(file: UploadFile = File(...),
+           collection_name: Optional[str] = Form(None),
+           profile: bool = Form(False),
+           tenant_id: Optional[str] = Form(None)) -> Dict[str, Any]:
+    """Upload dokumen PDF ke knowledge base."""
+    collection_name = collection_name or settings.qdrant_marketing_collection
+    _validate_collection(collection_name)
+    try:
+        text = extract_text_from_pdf(file.file, profile=profile)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    success = _tenant_vector_service(collection_name, tenant_id).upsert_documents_from_pdf(
+        text,
+        metadata={
+            "filename": file.filename,
+            "type": "marketing_document"
+        },
+        profile=profile
+    )
+    if not success:
+        raise HTTPException(status_code=500, detail="Gagal menambahkan dokumen ke knowledge base")
+    return {"status": "ok", "filename": file.filename, "collection": collection_name}
+
+
+@app.get("/collections/{collection_name}")
+def collection_info(collection_name: str, tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """Informasi collection (dan jumlah point tenant jika diberikan)."""
+    _validate_collection(collection_name)
+    info = _tenant_vector_service(collection_name, tenant_id).get_collection_info()
+    if not info:
+        raise HTTPException(status_code=404, detail=f"Collection not found: {collection_name}")
+    return info
+
+
+@app.delete("/collections/{collection_name}/documents")
+def delete_document(collection_name: str,
+                    filename: Optional[str] = None,
+                    doc_hash: Optional[str] = None,
+                    tenant_id: Optional[str] = None) -> Dict[str, Any]:
+    """Hapus semua chunk satu dokumen (berdasarkan filename atau doc_hash)."""
+    _validate_collection(collection_name)
+    if not filename and not doc_hash:
+        raise HTTPException(status_code=400, detail="filename atau doc_hash harus diisi")
+    deleted = _tenant_vector_service(collection_name, tenant_id).delete_document(
+        filename=filename, doc_hash=doc_hash
+    )
+    if deleted < 0:
+        raise HTTPException(status_code=500, detail="Gagal menghapus dokumen")
+    return {"collection": collection_name, "deleted": deleted}
+
+
+def main():
+    """Jalankan API server dengan uvicorn."""
+    import uvicorn
+    uvicorn.run(
+        "api:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=settings.api_workers
+    )
+
+
+if __name__ == "__main__":
+    main()
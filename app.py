@@ -3,8 +3,11 @@ Aplikasi Streamlit untuk AI Agent dengan dua mode:
 1. General Agent - Seperti ChatGPT
 2. Marketing Agent - Berbasis RAG untuk analisis marketing
 """
+import re
+import uuid
 import streamlit as st
-from services import AgentService, extract_text_from_pdf, upsert_pdf_to_qdrant
+import streamlit.components.v1 as components
+from services import AgentService, ChatHistoryStore, extract_text_from_pdf, upsert_pdf_to_qdrant
 from services.vector_service import VectorService
 from utils import setup_logger, validate_model_type, validate_agent_type
 from config import settings
@@ -19,30 +22,107 @@ def get_agent_service():
     """Initialize dan cache AgentService."""
     return AgentService()
 
+@st.cache_resource
+def get_history_store():
+    """Initialize dan cache ChatHistoryStore."""
+    return ChatHistoryStore()
+
 agent_service = get_agent_service()
+history_store = get_history_store()
+
+# Page config
+st.set_page_config(
+    page_title="AI Agent Assistant", 
+    page_icon="🤖",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+SESSION_COOKIE = "chat_session"
+SESSION_COOKIE_MAX_AGE = 30 * 24 * 3600
+_SESSION_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+def get_session_id():
+    """
+    Session id chat; disimpan di cookie browser agar riwayat kembali setelah reload/reconnect.
+    
+    Id tidak diletakkan di URL: siapa pun yang menerima URL halaman bisa membaca
+    seluruh percakapan.
+    
+    Streamlit hanya bisa membaca cookie dari server (st.context.cookies), tidak
+    bisa mengirim Set-Cookie. Cookie ditulis lewat script di component, dengan
+    dua batasan:
+    - cookie tidak bisa HttpOnly, jadi terbaca JavaScript di halaman (mitigasi:
+      SameSite=Strict, Secure di HTTPS);
+    - penulisan butuh iframe component yang same-origin dengan app; jika app
+      di-embed atau browser memblokirnya, cookie tidak tertulis.
+    Jika penulisan gagal, id tetap dipakai lewat st.session_state selama sesi
+    browser tersambung; hanya riwayat yang tidak kembali setelah reload.
+    """
+    # URL lama membawa session id; buang tanpa dipakai
+    if "session" in st.query_params:
+        del st.query_params["session"]
+    session_id = st.context.cookies.get(SESSION_COOKIE, "")
+    if not _SESSION_ID_PATTERN.match(session_id):
+        session_id = uuid.uuid4().hex
+        cookie = f"{SESSION_COOKIE}={session_id}; path=/; max-age={SESSION_COOKIE_MAX_AGE}; SameSite=Strict"
+        try:
+            components.html(
+                "<script>try {"
+                f" parent.document.cookie = '{cookie}'"
+                " + (parent.location.protocol === 'https:' ? '; Secure' : '');"
+                " } catch (e) { console.warn('chat session cookie not set', e); }</script>",
+                height=0
+            )
+        except Exception as e:
+            logger.warning("Cookie session tidak bisa ditulis, riwayat hanya bertahan selama sesi ini: %s", e)
+    return session_id
+
+def load_recent_messages(agent_type):
+    """Muat window pesan terbaru agent dari history store ke session state."""
+    st.session_state['messages'] = history_store.get_messages(
+        st.session_state['session_id'], agent_type, limit=settings.chat_history_page_size
+    )
+
+def append_message(role, content):
+    """Simpan pesan ke history store; window session state kembali ke halaman terakhir."""
+    message_id = history_store.add_message(
+        st.session_state['session_id'], st.session_state['current_agent'], role, content
+    )
+    st.session_state['messages'].append({"id": message_id, "role": role, "content": content})
+    # Hanya halaman terakhir yang dirender setiap rerun; pesan lama dimuat ulang
+    # dari history store lewat tombol "load older"
+    del st.session_state['messages'][:-settings.chat_history_page_size]
+
+def routing_context(max_messages: int = 3):
+    """
+    Pesan user sebelumnya untuk Marketing Agent.
+    
+    Topic router memakai konteks ini agar pertanyaan lanjutan tanpa keyword
+    marketing ("bagaimana dengan bulan lalu?") tidak ditolak.
+    """
+    if st.session_state['current_agent'] != 'marketing':
+        return None
+    # Pesan terakhir adalah prompt yang sedang dijawab
+    previous = [m["content"] for m in st.session_state['messages'][:-1] if m["role"] == "user"]
+    return "\n".join(previous[-max_messages:]) or None
 
 # Initialize session state
 def initialize_session_state():
     """Initialize session state variables."""
-    if 'messages' not in st.session_state:
-        st.session_state['messages'] = []
+    if 'session_id' not in st.session_state:
+        st.session_state['session_id'] = get_session_id()
     if 'current_agent' not in st.session_state:
         st.session_state['current_agent'] = 'general'
     if 'current_model' not in st.session_state:
         st.session_state['current_model'] = 'telkom-ai'
+    if 'messages' not in st.session_state:
+        load_recent_messages(st.session_state['current_agent'])
     if 'marketing_kb_loaded' not in st.session_state:
         st.session_state['marketing_kb_loaded'] = False
 
 initialize_session_state()
 
-# Page config
-st.set_page_config(
-    page_title="AI Agent Assistant", 
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
 # Title
 st.title("🤖 AI Agent Assistant")
 st.markdown("Pilih antara **General Agent** (ChatGPT-like) atau **Marketing Agent** (RAG-based)")
@@ -87,7 +167,7 @@ with st.sidebar:
     
     if selected_agent != st.session_state['current_agent']:
         st.session_state['current_agent'] = selected_agent
-        st.session_state['messages'] = []  # Clear chat history when switching agents
+        load_recent_messages(selected_agent)  # Riwayat chat terpisah per agent
         st.rerun()
     
     # Status
@@ -171,12 +251,29 @@ with col1:
 with col2:
     # Clear chat button
     if st.button("🗑️ Hapus Riwayat Chat", type="secondary"):
+        history_store.clear(st.session_state['session_id'], st.session_state['current_agent'])
         st.session_state['messages'] = []
         st.rerun()
 
 # Chat interface
 st.divider()
 
+# Lazy "load older": pesan lama dimuat per halaman dari history store
+messages = st.session_state['messages']
+oldest_id = messages[0].get("id") if messages else None
+if oldest_id is not None and history_store.has_older(
+        st.session_state['session_id'], st.session_state['current_agent'], oldest_id):
+    room = settings.chat_history_max_messages - len(messages)
+    if room <= 0:
+        st.caption(f"Menampilkan {len(messages)} pesan terakhir.")
+    elif st.button("⬆️ Muat pesan sebelumnya"):
+        older = history_store.get_messages(
+            st.session_state['session_id'], st.session_state['current_agent'],
+            limit=min(settings.chat_history_page_size, room), before_id=oldest_id
+        )
+        st.session_state['messages'] = older + messages
+        st.rerun()
+
 # Display chat history
 for message in st.session_state['messages']:
     with st.chat_message(message["role"]):
@@ -185,7 +282,7 @@ for message in st.session_state['messages']:
 # Chat input
 if prompt := st.chat_input("Tanyakan sesuatu..."):
     # Add user message to chat history
-    st.session_state['messages'].append({"role": "user", "content": prompt})
+    append_message("user", prompt)
     
     # Display user message
     with st.chat_message("user"):
@@ -198,18 +295,19 @@ if prompt := st.chat_input("Tanyakan sesuatu..."):
                 response = agent_service.chat(
                     query=prompt,
                     agent_type=st.session_state['current_agent'],
-                    model_type=st.session_state['current_model']
+                    model_type=st.session_state['current_model'],
+                    context=routing_context()
                 )
                 
                 st.markdown(response)
                 
                 # Add assistant response to chat history
-                st.session_state['messages'].append({"role": "assistant", "content": response})
+                append_message("assistant", response)
                 
             except Exception as e:
                 error_msg = f"❌ Maaf, terjadi kesalahan: {str(e)}"
                 st.error(error_msg)
-                st.session_state['messages'].append({"role": "assistant", "content": error_msg})
+                append_message("assistant", error_msg)
 
 # Footer
 st.divider()
@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Optional, Dict, Any, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -28,9 +28,102 @@ class Settings(BaseSettings):
     qdrant_collection_name: str = "embeddings_example"
     qdrant_marketing_collection: str = "marketing_embeddings"
     qdrant_is_https: bool = False
+    qdrant_meta_collection: str = "collection_meta"
+    # Interval cek pergantian alias oleh rebuild job (detik)
+    qdrant_alias_refresh_seconds: float = 30.0
+    # Multi-tenant: semua query di-scope ke tenant; collection baru memakai HNSW per tenant
+    # (collection lama perlu scripts.reindex). Point lama tanpa tenant_id ikut tenant default
+    # sampai scripts.backfill_tenant dijalankan
+    qdrant_multitenancy: bool = False
+    qdrant_default_tenant: str = "default"
+    # Payload field yang diminta saat search ("page_content" mencakup versi terkompresi)
+    search_payload_fields: List[str] = [
+        "page_content", "metadata.filename", "metadata.doc_hash", "metadata.chunk_index"
+    ]
+    # Kompresi page_content chunk: 'none' atau 'zstd' (dictionary dilatih dari corpus)
+    payload_compression: str = "none"
+    payload_compression_level: int = 3
+    payload_dict_size: int = 16384
+    # Jumlah chunk minimum untuk melatih dictionary; batch lebih kecil dikompres tanpa dictionary
+    payload_dict_min_samples: int = 64
+    
+    # Embedding
+    # Backend: 'openai', 'local' (sentence-transformers dari path lokal) atau 'hashing' (test offline)
+    embedding_backend: str = "openai"
+    # Nama model OpenAI, atau path model untuk backend local
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 1536
+    # Backend local: runtime 'torch' atau 'onnx', inference batched di CPU
+    local_embedding_runtime: str = "torch"
+    local_embedding_device: str = "cpu"
+    local_embedding_batch_size: int = 32
+    local_embedding_threads: int = 0
+    # Override per collection, misalnya {"marketing_embeddings": {"backend": "openai", "model": "text-embedding-3-small", "dimensions": 512}}
+    collection_embedding_overrides: Dict[str, Dict[str, Any]] = {}
+    
+    # Chunking
+    chunk_size: int = 1000
+    chunk_overlap: int = 200
     
     # Application
     log_level: str = "INFO"
+    log_format: str = "json"
+    log_debug_sample_rate: float = 0.1
+    
+    # Profiling per request ('sampling' -> .folded flamegraph, 'cprofile' -> .prof)
+    profiling_enabled: bool = False
+    profiling_mode: str = "sampling"
+    profiling_dir: str = "profiles"
+    profiling_interval_ms: float = 5.0
+    
+    # Headless API server
+    api_host: str = "0.0.0.0"
+    api_port: int = 8080
+    api_workers: int = 2
+    
+    # Topic router: tolak query off-topic sebelum retrieval dan LLM call
+    # (opt-in: daftar keyword perlu disesuaikan dengan domain sebelum dipakai)
+    marketing_topic_router_enabled: bool = False
+    
+    # Multi-query retrieval untuk Marketing Agent
+    marketing_multi_query: bool = False
+    marketing_multi_query_llm: bool = False
+    marketing_multi_query_max_variants: int = 4
+    
+    # Two-tier retrieval: cari dokumen lewat vector ringkasan, lalu chunk di dokumen tersebut
+    # (bersama multi-query, setiap variasi query dicari dengan two-tier)
+    marketing_two_tier_retrieval: bool = False
+    two_tier_top_documents: int = 5
+    
+    # Batch query
+    batch_max_workers: int = 4
+    
+    # QoS: turunkan k, budget konteks, max_tokens dan provider saat p90 latency/antrean melewati SLO
+    # (opt-in: mengubah kualitas jawaban)
+    qos_enabled: bool = False
+    qos_latency_slo_ms: float = 8000.0
+    qos_max_in_flight: int = 16
+    qos_window_seconds: float = 60.0
+    qos_step_interval_seconds: float = 10.0
+    qos_recovery_ratio: float = 0.6
+    qos_min_samples: int = 5
+    qos_fallback_model_type: str = "gemini"
+    
+    # Query log (JSONL harian) dan precomputed answers untuk pertanyaan yang sering ditanyakan
+    # (opt-in: query log menyimpan pertanyaan user ke disk)
+    query_log_enabled: bool = False
+    query_log_dir: str = "data/query_log"
+    hot_answers_enabled: bool = False
+    hot_answers_db_path: str = "data/hot_answers.db"
+    hot_query_similarity: float = 0.9
+    hot_query_min_count: int = 3
+    hot_query_top_n: int = 50
+    
+    # Riwayat chat (Streamlit): SQLite per session, hanya window terbaru di session state
+    chat_history_db_path: str = "data/chat_history.db"
+    chat_history_page_size: int = 20
+    # Batas pesan yang dirender setelah "load older"; pesan baru mengembalikan window ke satu halaman
+    chat_history_max_messages: int = 200
     
     model_config = SettingsConfigDict(
         env_file = ".env",
@@ -0,0 +1,3 @@
+"""
+Command line tools untuk operasi offline.
+"""
@@ -0,0 +1,35 @@
+"""
+Buat point ringkasan dokumen untuk collection yang dibuat sebelum two-tier retrieval.
+
+Selama collection belum lengkap, two-tier retrieval memakai flat search agar
+dokumen lama tetap bisa ditemukan. Job ini membuat ringkasan dari vector chunk
+yang sudah tersimpan (tanpa embedding call), memberi doc_hash pada chunk lama,
+lalu menandai collection lengkap.
+
+Contoh:
+    python -m scripts.backfill_summaries marketing_embeddings
+"""
+import argparse
+import sys
+from typing import List
+
+from services.vector_service import VectorService
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill point ringkasan dokumen untuk two-tier retrieval")
+    parser.add_argument("collection", help="Nama collection atau alias")
+    parser.add_argument("--batch-size", type=int, default=256, help="Jumlah point per scroll request")
+    args = parser.parse_args(argv)
+
+    service = VectorService(collection_name=args.collection, adopt_embedding=True)
+    created = service.backfill_document_summaries(batch_size=args.batch_size)
+    if created < 0:
+        print("Backfill gagal, lihat log")
+        return 1
+    print(f"{created} ringkasan dokumen dibuat di {args.collection}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Beri tenant default pada point yang dibuat sebelum multitenancy aktif.
+
+Setelah QDRANT_MULTITENANCY=true, point lama tanpa metadata.tenant_id tetap
+ikut di query tenant default, tapi tidak terlihat oleh tenant lain dan tidak
+tercakup payload index tenant. Job ini mengisi tenant_id tanpa re-embedding.
+
+Konfigurasi HNSW per tenant (payload_m, m=0) hanya dipakai collection baru;
+untuk collection yang sudah ada jalankan rebuild dengan scripts.reindex.
+
+Contoh:
+    python -m scripts.backfill_tenant marketing_embeddings
+"""
+import argparse
+import sys
+from typing import List
+
+from config.settings import settings
+from services.vector_service import VectorService
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill tenant default untuk point tanpa tenant_id")
+    parser.add_argument("collection", help="Nama collection atau alias")
+    args = parser.parse_args(argv)
+
+    service = VectorService(collection_name=args.collection, adopt_embedding=True)
+    updated = service.backfill_default_tenant()
+    if updated < 0:
+        print("Backfill gagal, lihat log")
+        return 1
+    print(f"{updated} point diberi tenant {settings.qdrant_default_tenant} di {args.collection}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""
+CLI untuk menjalankan daftar pertanyaan secara batch ke AgentService.
+
+Hasil ditulis incremental ke file JSONL sehingga job yang terputus bisa
+dilanjutkan: pertanyaan yang id-nya sudah ada di output dengan status "ok"
+akan dilewati. Pertanyaan dengan status "error" dicoba lagi dan hasil barunya
+ditambahkan ke output; record terakhir per id yang berlaku.
+
+Jika batch retrieval gagal (misalnya Qdrant tidak bisa diakses), job berhenti
+tanpa menulis hasil untuk batch tersebut, sehingga tidak ada jawaban yang
+dibuat tanpa konteks.
+
+Contoh:
+    python -m scripts.batch_query questions.txt results.jsonl --agent marketing --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from typing import List, Dict, Set
+
+from services import AgentService
+from utils import validate_model_type, validate_agent_type, is_error_response
+
+
+def load_questions(path: str) -> List[Dict[str, str]]:
+    """
+    Load pertanyaan dari file.
+    
+    Args:
+        path: File .txt (satu pertanyaan per baris) atau .jsonl ({"id", "query"})
+        
+    Returns:
+        List dict dengan key 'id' dan 'query'
+    """
+    questions = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            if path.endswith(".jsonl"):
+                record = json.loads(line)
+                questions.append({"id": str(record.get("id", line_no)), "query": record["query"]})
+            else:
+                questions.append({"id": str(line_no), "query": line})
+    return questions
+
+
+def load_completed_ids(path: str) -> Set[str]:
+    """
+    Baca id yang sudah selesai dengan sukses dari output JSONL.
+    
+    Record terakhir per id yang berlaku, jadi id yang gagal lalu berhasil saat
+    resume dianggap selesai. Record lama tanpa status dinilai dari isi response.
+    
+    Args:
+        path: File output
+        
+    Returns:
+        Set id yang status terakhirnya "ok"
+    """
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                record_id = str(record["id"])
+            except (ValueError, KeyError):
+                # Baris terakhir bisa terpotong jika job sebelumnya terputus
+                continue
+            status = record.get("status")
+            if status is None:
+                status = "error" if is_error_response(record.get("response", "")) else "ok"
+            if status == "ok":
+                completed.add(record_id)
+            else:
+                completed.discard(record_id)
+    return completed
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Batch query ke AI Agent")
+    parser.add_argument("input", help="File pertanyaan (.txt atau .jsonl)")
+    parser.add_argument("output", help="File output JSONL")
+    parser.add_argument("--agent", default="marketing", help="'general' atau 'marketing'")
+    parser.add_argument("--model", default="telkom-ai", help="'telkom-ai' atau 'gemini'")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah LLM call paralel")
+    parser.add_argument("--chunk-size", type=int, default=100,
+                        help="Jumlah pertanyaan per batch retrieval")
+    args = parser.parse_args(argv)
+
+    if not validate_agent_type(args.agent) or not validate_model_type(args.model):
+        parser.error("agent atau model tidak valid")
+
+    questions = load_questions(args.input)
+    completed = load_completed_ids(args.output)
+    pending = [q for q in questions if q["id"] not in completed]
+    print(f"{len(questions)} pertanyaan, {len(completed)} sudah selesai, {len(pending)} diproses")
+
+    agent_service = AgentService()
+    write_lock = threading.Lock()
+    failed = 0
+
+    with open(args.output, "a", encoding="utf-8") as out:
+        for start in range(0, len(pending), args.chunk_size):
+            chunk = pending[start:start + args.chunk_size]
+
+            def write_result(index: int, query: str, response: str):
+                record = {
+                    "id": chunk[index]["id"],
+                    "query": query,
+                    "agent_type": args.agent,
+                    "model_type": args.model,
+                    "response": response,
+                    "status": "error" if is_error_response(response) else "ok",
+                }
+                with write_lock:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+
+            try:
+                responses = agent_service.chat_batch(
+                    [q["query"] for q in chunk],
+                    agent_type=args.agent,
+                    model_type=args.model,
+                    max_workers=args.workers,
+                    on_result=write_result
+                )
+            except Exception as e:
+                print(f"Batch retrieval gagal, job dihentikan (jalankan ulang untuk melanjutkan): {e}")
+                return 1
+            failed += sum(1 for response in responses if is_error_response(response))
+            print(f"{min(start + args.chunk_size, len(pending))}/{len(pending)} selesai")
+
+    if failed:
+        print(f"{failed} pertanyaan gagal; jalankan ulang untuk mencoba lagi")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+"""
+Kompres page_content chunk yang sudah ada di collection dengan zstd.
+
+Dictionary dilatih dari chunk yang ada (jika collection belum punya) lalu
+payload setiap chunk ditulis ulang tanpa re-embedding. Search tetap berjalan
+selama proses karena payload lama dan baru sama-sama bisa dibaca. Set
+PAYLOAD_COMPRESSION=zstd agar dokumen baru juga disimpan terkompresi.
+
+Contoh:
+    python -m scripts.compress_payloads marketing_embeddings
+"""
+import argparse
+import sys
+from typing import List
+
+from services.vector_service import VectorService
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kompres payload chunk collection dengan zstd")
+    parser.add_argument("collection", help="Nama collection atau alias")
+    parser.add_argument("--batch-size", type=int, default=256, help="Jumlah point per update request")
+    args = parser.parse_args(argv)
+
+    service = VectorService(collection_name=args.collection, adopt_embedding=True)
+    before = service.get_collection_info()
+    compressed = service.compress_existing_payloads(batch_size=args.batch_size)
+    if compressed < 0:
+        print("Kompresi gagal, lihat log")
+        return 1
+    print(f"{compressed} chunk dikompres di {args.collection} ({before.get('vectors_count', '?')} point)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
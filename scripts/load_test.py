@@ -0,0 +1,351 @@
+"""
+Load generator untuk AgentService.
+
+Mensimulasikan N sesi analis bersamaan yang menjalankan skrip percakapan
+terhadap stand-in lokal: Qdrant in-memory, embeddings deterministik dan LLM
+palsu (OpenAI-compatible dan Gemini), masing-masing dengan latency yang bisa
+diatur. Untuk setiap level concurrency dilaporkan throughput, latency
+percentile, error rate dan peak RSS sehingga terbentuk kurva saturasi.
+
+Contoh:
+    python -m scripts.load_test --concurrency 1,4,16,64 --duration 30 --llm-latency 1.5
+    python -m scripts.load_test --mode stream --scripts sessions.json --output curve.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import resource
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from typing import List, Dict, Any, Optional
+from unittest import mock
+
+from langchain_core.embeddings import Embeddings
+from qdrant_client import QdrantClient
+
+from config import settings
+from services import AgentService
+from services.qos_controller import percentile
+from services.vector_service import VectorService
+from agents.base_agent import BaseAgent
+
+
+DEFAULT_SCRIPTS = [
+    [
+        {"agent_type": "marketing", "query": "Bagaimana tren penjualan produk kami kuartal ini?"},
+        {"agent_type": "marketing", "query": "Siapa kompetitor utama di segmen UMKM?"},
+        {"agent_type": "marketing", "query": "Berapa ROI kampanye digital marketing terakhir?"},
+    ],
+    [
+        {"agent_type": "marketing", "query": "What is our customer retention trend?"},
+        {"agent_type": "marketing", "query": "Which campaign had the best conversion rate?"},
+        {"agent_type": "marketing", "query": "Apa resep nasi goreng?"},
+    ],
+    [
+        {"agent_type": "general", "query": "Jelaskan perbedaan machine learning dan deep learning."},
+        {"agent_type": "general", "query": "Buatkan ringkasan rapat tentang roadmap produk."},
+    ],
+]
+
+SEED_DOCUMENTS = [
+    "Laporan pemasaran kuartal ketiga: penjualan naik 12% dibanding kuartal sebelumnya, "
+    "didorong kampanye digital marketing di media sosial dengan ROAS 4.2. " * 20,
+    "Analisis kompetitor: tiga kompetitor utama di segmen UMKM menurunkan harga rata-rata 8%. "
+    "Pangsa pasar kami stabil di 31%, retensi pelanggan 87%. " * 20,
+    "Customer segmentation: enterprise, SME and consumer segments show different conversion funnels. "
+    "Email marketing CTR averaged 3.1% while paid search CPC fell 5%. " * 20,
+]
+
+
+def _sleep(latency: float, jitter: float):
+    """Sleep latency +/- jitter (detik)."""
+    if latency > 0:
+        time.sleep(max(0.0, random.gauss(latency, jitter)))
+
+
+class LatencyEmbeddings(Embeddings):
+    """Embedding deterministik berbasis hash dengan latency buatan."""
+
+    def __init__(self, dimensions: int, latency: float, jitter: float):
+        self.dimensions = dimensions
+        self.latency = latency
+        self.jitter = jitter
+
+    def _vector(self, text: str) -> List[float]:
+        rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+        return [rng.uniform(-1.0, 1.0) for _ in range(self.dimensions)]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        _sleep(self.latency, self.jitter)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class LatencyQdrantClient:
+    """Proxy QdrantClient in-memory yang menambahkan latency pada operasi search."""
+
+    _SEARCH_METHODS = {"query_points", "query_batch_points", "search", "search_batch"}
+
+    def __init__(self, client: QdrantClient, latency: float, jitter: float):
+        self._client = client
+        self._latency = latency
+        self._jitter = jitter
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._client, name)
+        if name not in self._SEARCH_METHODS:
+            return attr
+
+        def call(*args, **kwargs):
+            _sleep(self._latency, self._jitter)
+            return attr(*args, **kwargs)
+        return call
+
+
+class FakeLLMClient:
+    """Stand-in untuk client OpenAI-compatible (Telkom AI) dan Gemini."""
+
+    def __init__(self, latency: float, jitter: float, tokens: int = 60, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens = tokens
+        self.error_rate = error_rate
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _maybe_fail(self):
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Injected LLM error")
+
+    def _words(self) -> List[str]:
+        return [f"token{i} " for i in range(self.tokens)]
+
+    def _stream(self, make_chunk):
+        self._maybe_fail()
+        per_token = self.latency / max(self.tokens, 1)
+        for word in self._words():
+            _sleep(per_token, self.jitter / max(self.tokens, 1))
+            yield make_chunk(word)
+
+    def _create(self, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs):
+        if stream:
+            return self._stream(lambda word: SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=word))]
+            ))
+        _sleep(self.latency, self.jitter)
+        self._maybe_fail()
+        content = "".join(self._words())
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    def generate_content(self, prompt: str, stream: bool = False, **kwargs):
+        if stream:
+            return self._stream(lambda word: SimpleNamespace(text=word))
+        _sleep(self.latency, self.jitter)
+        self._maybe_fail()
+        return SimpleNamespace(text="".join(self._words()))
+
+
+class RssSampler:
+    """Sampling RSS proses di background untuk mencatat peak per level concurrency."""
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @staticmethod
+    def current_rss_kb() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            return pages * resource.getpagesize() // 1024
+        except (OSError, ValueError, IndexError):
+            # Non-Linux: peak sejak proses mulai (KB di Linux, byte di macOS)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.current_rss_kb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, self.current_rss_kb())
+
+
+def run_session(agent_service: AgentService, script: List[Dict[str, str]], session_id: int,
+                deadline: float, args: argparse.Namespace, results: List[Dict[str, Any]],
+                lock: threading.Lock):
+    """Jalankan satu sesi: ulangi skrip percakapan sampai deadline."""
+    turn = 0
+    while time.monotonic() < deadline:
+        step = script[turn % len(script)]
+        query = step["query"]
+        if args.unique_queries:
+            query = f"{query} (sesi {session_id}, turn {turn})"
+        model_type = step.get("model_type", args.model)
+        use_stream = args.mode == "stream" or (args.mode == "mixed" and turn % 2 == 1)
+
+        start = time.perf_counter()
+        first_token: Optional[float] = None
+        error = False
+        try:
+            if use_stream:
+                chunks = []
+                for chunk in agent_service.chat_stream(query, step["agent_type"], model_type):
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+                    chunks.append(chunk)
+                response = "".join(chunks)
+            else:
+                response = agent_service.chat(query, step["agent_type"], model_type)
+            error = response.startswith("Error:") or response.startswith("Maaf, terjadi kesalahan")
+        except Exception:
+            error = True
+        latency = time.perf_counter() - start
+
+        with lock:
+            results.append({"latency": latency, "ttft": first_token, "error": error})
+        turn += 1
+        if args.think_time:
+            _sleep(args.think_time, args.think_time / 4)
+
+
+def run_level(agent_service: AgentService, scripts: List[List[Dict[str, str]]], concurrency: int,
+              args: argparse.Namespace) -> Dict[str, Any]:
+    """Jalankan satu level concurrency dan kumpulkan metrik."""
+    results: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + args.duration
+
+    with RssSampler() as rss:
+        threads = [
+            threading.Thread(
+                target=run_session,
+                args=(agent_service, scripts[i % len(scripts)], i, deadline, args, results, lock),
+                daemon=True
+            )
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.monotonic() - start
+
+    latencies = [r["latency"] for r in results]
+    ttfts = [r["ttft"] for r in results if r["ttft"] is not None]
+    errors = sum(1 for r in results if r["error"])
+    return {
+        "concurrency": concurrency,
+        "requests": len(results),
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "ttft_p50_ms": percentile(ttfts, 0.5) * 1000 if ttfts else None,
+        "error_rate": errors / len(results) if results else 0.0,
+        "peak_rss_mb": rss.peak_kb / 1024,
+        "qos_level": agent_service.get_qos_status()["level"],
+    }
+
+
+def build_agent_service(args: argparse.Namespace) -> AgentService:
+    """Buat AgentService dengan Qdrant, embeddings dan LLM stand-in."""
+    qdrant = LatencyQdrantClient(QdrantClient(":memory:"), args.qdrant_latency, args.qdrant_latency / 4)
+    llm = FakeLLMClient(args.llm_latency, args.llm_jitter, tokens=args.tokens, error_rate=args.error_rate)
+
+    patches = [
+        mock.patch.object(VectorService, "_get_qdrant_client", lambda self: qdrant),
+        mock.patch.object(
+            VectorService, "_get_embeddings",
+            lambda self: LatencyEmbeddings(self.embedding_dimensions, args.embed_latency, args.embed_latency / 4)
+        ),
+        mock.patch.object(BaseAgent, "_create_model_client", lambda self: llm),
+        # Traffic sintetis tidak boleh masuk query log asli (dan hot answers dari log itu)
+        mock.patch.object(settings, "query_log_enabled", False),
+        mock.patch.object(settings, "hot_answers_enabled", False),
+    ]
+    for patch in patches:
+        patch.start()
+
+    agent_service = AgentService()
+    marketing = agent_service.get_agent("marketing", args.model)
+    marketing.vector_service.add_documents(
+        SEED_DOCUMENTS, [{"filename": f"seed_{i}.pdf"} for i in range(len(SEED_DOCUMENTS))]
+    )
+    return agent_service
+
+
+def print_table(rows: List[Dict[str, Any]]):
+    """Cetak kurva saturasi sebagai tabel."""
+    header = (f"{'conc':>5} {'reqs':>7} {'rps':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+              f"{'err %':>7} {'rss MB':>8} {'qos':>4}")
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['concurrency']:>5} {row['requests']:>7} {row['throughput_rps']:>8.2f} "
+              f"{row['p50_ms']:>9.1f} {row['p90_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+              f"{row['error_rate'] * 100:>7.2f} {row['peak_rss_mb']:>8.1f} {row['qos_level']:>4}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test AgentService dengan stand-in lokal")
+    parser.add_argument("--concurrency", default="1,2,4,8,16,32",
+                        help="Daftar jumlah sesi bersamaan, dipisah koma")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durasi per level (detik)")
+    parser.add_argument("--mode", choices=["chat", "stream", "mixed"], default="chat")
+    parser.add_argument("--model", default="telkom-ai", help="'telkom-ai' atau 'gemini'")
+    parser.add_argument("--scripts", default=None,
+                        help="File JSON berisi list sesi; tiap sesi list {agent_type, query[, model_type]}")
+    parser.add_argument("--unique-queries", action="store_true",
+                        help="Buat setiap query unik (menonaktifkan efek single-flight)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Jeda antar turn per sesi (detik)")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Latency LLM (detik)")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="Jitter latency LLM (detik)")
+    parser.add_argument("--tokens", type=int, default=60, help="Jumlah token per response palsu")
+    parser.add_argument("--embed-latency", type=float, default=0.08, help="Latency embedding (detik)")
+    parser.add_argument("--qdrant-latency", type=float, default=0.01, help="Latency search Qdrant (detik)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraksi LLM call yang dibuat gagal")
+    parser.add_argument("--output", default=None, help="Tulis hasil ke file JSON")
+    parser.add_argument("--log-level", default="WARNING", help="Level log aplikasi selama load test")
+    args = parser.parse_args(argv)
+
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith(("agents", "services")):
+            logging.getLogger(name).setLevel(args.log_level.upper())
+
+    scripts = DEFAULT_SCRIPTS
+    if args.scripts:
+        with open(args.scripts, encoding="utf-8") as f:
+            scripts = json.load(f)
+
+    agent_service = build_agent_service(args)
+    rows = []
+    for concurrency in [int(c) for c in args.concurrency.split(",") if c.strip()]:
+        rows.append(run_level(agent_service, scripts, concurrency, args))
+        print(f"concurrency={concurrency}: {rows[-1]['throughput_rps']:.2f} rps, "
+              f"p99 {rows[-1]['p99_ms']:.1f} ms")
+
+    print()
+    print_table(rows)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": rows}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
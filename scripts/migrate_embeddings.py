@@ -0,0 +1,62 @@
+"""
+CLI untuk re-index collection ke model/dimensi embedding baru.
+
+Collection sumber tidak diubah dan tetap bisa melayani query selama migrasi.
+Setelah selesai, recall@k collection baru terhadap collection sumber dilaporkan.
+
+Contoh:
+    python -m scripts.migrate_embeddings marketing_embeddings marketing_embeddings_512 --dimensions 512
+"""
+import argparse
+import sys
+from typing import List
+
+from services.vector_service import VectorService
+from services.migration_service import reindex_collection, sample_queries, evaluate_recall
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-index collection ke embedding baru")
+    parser.add_argument("source", help="Collection sumber")
+    parser.add_argument("target", help="Collection tujuan")
+    parser.add_argument("--backend", default=None, help="Backend embedding tujuan (openai, local, hashing)")
+    parser.add_argument("--model", default=None, help="Model embedding tujuan")
+    parser.add_argument("--dimensions", type=int, required=True, help="Dimensi embedding tujuan")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunk per batch")
+    parser.add_argument("--throttle", type=float, default=0.0, help="Jeda antar batch (detik)")
+    parser.add_argument("--queries", default=None,
+                        help="File query evaluasi (satu per baris); default sample dari chunk")
+    parser.add_argument("--sample", type=int, default=50, help="Jumlah query sample")
+    parser.add_argument("--k", type=int, default=10, help="k untuk recall@k")
+    args = parser.parse_args(argv)
+
+    source = VectorService(collection_name=args.source, adopt_embedding=True)
+    target = VectorService(
+        collection_name=args.target,
+        embedding_backend=args.backend or source.embedding_backend,
+        embedding_model=args.model or source.embedding_model,
+        embedding_dimensions=args.dimensions
+    )
+
+    indexed = reindex_collection(
+        source, target,
+        batch_size=args.batch_size,
+        throttle_seconds=args.throttle,
+        progress=lambda n: print(f"{n} points di-index", end="\r")
+    )
+    print(f"\n{indexed} points di-index ke {args.target} "
+          f"({target.embedding_backend}/{target.embedding_model}, {target.embedding_dimensions} dim)")
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = sample_queries(source, n=args.sample)
+
+    recall = evaluate_recall(source, target, queries, k=args.k)
+    print(f"recall@{args.k} terhadap {args.source}: {recall:.3f} ({len(queries)} queries)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
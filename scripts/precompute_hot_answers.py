@@ -0,0 +1,47 @@
+"""
+CLI untuk menghitung jawaban pertanyaan marketing yang paling sering ditanyakan.
+
+Membaca query log, mengelompokkan pertanyaan yang mirip, lalu menyimpan
+jawaban untuk cluster yang sering muncul terhadap versi knowledge base saat
+ini. Jalankan ulang (misalnya lewat cron) setelah knowledge base berubah;
+jawaban lama otomatis tidak dipakai begitu versi berubah.
+
+Contoh:
+    python -m scripts.precompute_hot_answers --days 14 --min-count 5 --top 100
+"""
+import argparse
+import sys
+from typing import List
+
+from services import AgentService
+from services.hot_answers import precompute_hot_answers
+from services.query_log import read_query_log
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute jawaban untuk hot questions dari query log")
+    parser.add_argument("--log-dir", default=None, help="Direktori query log (default: settings.query_log_dir)")
+    parser.add_argument("--days", type=int, default=None, help="Hanya pakai log beberapa hari terakhir")
+    parser.add_argument("--min-count", type=int, default=None, help="Frekuensi minimum cluster")
+    parser.add_argument("--top", type=int, default=None, help="Jumlah cluster maksimum per model/tenant")
+    parser.add_argument("--similarity", type=float, default=None, help="Cosine similarity clustering")
+    args = parser.parse_args(argv)
+
+    agent_service = AgentService()
+    if agent_service.hot_answers is None:
+        print("HOT_ANSWERS_ENABLED=false, tidak ada yang dihitung")
+        return 1
+
+    result = precompute_hot_answers(
+        agent_service,
+        read_query_log(args.log_dir, since_days=args.days),
+        min_count=args.min_count,
+        top_n=args.top,
+        threshold=args.similarity
+    )
+    print(f"{result['clusters']} cluster dijawab, {result['queries']} variasi pertanyaan dipetakan")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Blue/green rebuild job untuk collection ber-alias.
+
+Versi collection baru diisi di background sementara query tetap dilayani
+versi lama lewat alias. Setelah selesai, alias ditukar secara atomik dan
+versi lama di-garbage-collect.
+
+Dokumen yang di-upload atau dihapus lewat alias selama rebuild masuk ke versi
+lama; sebelum alias ditukar perubahan tersebut direkonsiliasi ke versi baru
+berdasarkan doc_hash (lihat services.migration_service.promote_reconciled).
+
+Collection lama yang belum memakai alias harus dihapus sebelum alias bisa
+dibuat, sehingga query gagal sesaat pada cut-over pertama. Cut-over ini hanya
+dijalankan dengan --legacy-cutover, di maintenance window.
+
+Contoh:
+    # Re-embed chunk yang ada dengan dimensi baru
+    python -m scripts.reindex marketing_embeddings --from-collection --dimensions 512
+    # Re-ingest PDF dengan parameter chunking baru
+    python -m scripts.reindex marketing_embeddings --pdf-dir ./docs --chunk-size 800 --chunk-overlap 100
+"""
+import argparse
+import os
+import sys
+from typing import List
+
+from services.pdf_service import extract_text_from_pdf
+from services.vector_service import VectorService
+from services.migration_service import (
+    reindex_collection, sample_queries, evaluate_recall, document_keys, promote_reconciled
+)
+
+
+def ingest_pdf_dir(target: VectorService, pdf_dir: str) -> int:
+    """
+    Ingest semua PDF dalam direktori ke collection target.
+
+    Args:
+        target: VectorService versi baru
+        pdf_dir: Direktori PDF
+
+    Returns:
+        Jumlah dokumen yang berhasil di-ingest
+    """
+    ingested = 0
+    for filename in sorted(os.listdir(pdf_dir)):
+        if not filename.lower().endswith(".pdf"):
+            continue
+        with open(os.path.join(pdf_dir, filename), "rb") as f:
+            text = extract_text_from_pdf(f)
+        if target.upsert_documents_from_pdf(text, metadata={"filename": filename, "type": "marketing_document"}):
+            ingested += 1
+            print(f"Ingested {filename}")
+    return ingested
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Blue/green rebuild collection ber-alias")
+    parser.add_argument("collection", help="Nama alias collection")
+    source_group = parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--from-collection", action="store_true",
+                              help="Re-embed chunk dari versi yang sedang aktif")
+    source_group.add_argument("--pdf-dir", help="Re-ingest semua PDF dalam direktori")
+    parser.add_argument("--backend", default=None, help="Backend embedding versi baru (openai, local, hashing)")
+    parser.add_argument("--model", default=None, help="Model embedding versi baru")
+    parser.add_argument("--dimensions", type=int, default=None, help="Dimensi embedding versi baru")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Ukuran chunk (hanya --pdf-dir)")
+    parser.add_argument("--chunk-overlap", type=int, default=None, help="Overlap chunk (hanya --pdf-dir)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunk per batch")
+    parser.add_argument("--throttle", type=float, default=0.05,
+                        help="Jeda antar batch (detik) agar query tidak terganggu")
+    parser.add_argument("--keep", type=int, default=1, help="Jumlah versi lama yang dipertahankan")
+    parser.add_argument("--no-promote", action="store_true", help="Bangun versi baru tanpa menukar alias")
+    parser.add_argument("--min-recall", type=float, default=None,
+                        help="Batalkan promote jika recall@10 terhadap versi aktif di bawah nilai ini")
+    parser.add_argument("--legacy-cutover", action="store_true",
+                        help="Izinkan promote collection tanpa alias (query gagal sesaat; jalankan di maintenance window)")
+    args = parser.parse_args(argv)
+
+    live = VectorService(collection_name=args.collection, adopt_embedding=True)
+    # Dokumen saat rebuild dimulai; perubahan setelah ini direkonsiliasi sebelum promote
+    baseline = document_keys(live)
+    target = live.create_version(
+        embedding_backend=args.backend,
+        embedding_model=args.model,
+        embedding_dimensions=args.dimensions,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap
+    )
+    print(f"Building {target.collection_name} "
+          f"({target.embedding_backend}/{target.embedding_model}, {target.embedding_dimensions} dim)")
+
+    if args.from_collection:
+        indexed = reindex_collection(
+            live, target,
+            batch_size=args.batch_size,
+            throttle_seconds=args.throttle,
+            progress=lambda n: print(f"{n} points di-index", end="\r")
+        )
+        print(f"\n{indexed} points di-index")
+    else:
+        print(f"{ingest_pdf_dir(target, args.pdf_dir)} dokumen di-ingest")
+
+    if args.min_recall is not None:
+        recall = evaluate_recall(live, target, sample_queries(live), k=10)
+        print(f"recall@10 terhadap versi aktif: {recall:.3f}")
+        if recall < args.min_recall:
+            print(f"Recall di bawah {args.min_recall}; alias tidak ditukar")
+            return 1
+
+    if args.no_promote:
+        print(f"Versi {target.collection_name} siap; alias tidak ditukar")
+        return 0
+
+    result = promote_reconciled(live, target, baseline, legacy_cutover=args.legacy_cutover)
+    if result["added"] or result["removed"]:
+        print(f"Rekonsiliasi: {result['added']} dokumen ditambahkan, {result['removed']} dihapus")
+    if not result["promoted"]:
+        return 1
+    print(f"Alias {args.collection} -> {target.collection_name}")
+
+    deleted = live.gc_versions(keep=args.keep)
+    if deleted:
+        print(f"Deleted old versions: {', '.join(deleted)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""
+CLI untuk export/import snapshot collection Qdrant.
+
+Contoh:
+    python -m scripts.snapshot export marketing_embeddings ./snapshots/marketing
+    python -m scripts.snapshot import marketing_embeddings ./snapshots/marketing --recreate
+"""
+import argparse
+import sys
+from typing import List
+
+from services.vector_service import VectorService
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Export/import snapshot collection Qdrant")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export collection ke direktori")
+    export_parser.add_argument("collection", help="Nama collection")
+    export_parser.add_argument("path", help="Direktori snapshot")
+
+    import_parser = subparsers.add_parser("import", help="Import direktori ke collection")
+    import_parser.add_argument("collection", help="Nama collection")
+    import_parser.add_argument("path", help="Direktori snapshot")
+    import_parser.add_argument("--recreate", action="store_true",
+                               help="Hapus dan buat ulang collection sebelum import")
+    import_parser.add_argument("--legacy-cutover", action="store_true",
+                               help="Izinkan --recreate pada collection tanpa alias (query gagal sesaat; "
+                                    "jalankan di maintenance window)")
+
+    args = parser.parse_args(argv)
+    vector_service = VectorService(collection_name=args.collection)
+
+    if args.command == "export":
+        manifest = vector_service.export_snapshot(args.path)
+        if not manifest:
+            return 1
+        print(f"Exported {manifest['count']} points dari {args.collection} ke {args.path}")
+    else:
+        count = vector_service.import_snapshot(
+            args.path, recreate=args.recreate, legacy_cutover=args.legacy_cutover
+        )
+        if count < 0:
+            return 1
+        print(f"Imported {count} points ke {args.collection} dari {args.path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,7 @@ Services modules.
 
 from .vector_service import VectorService
 from .agent_service import AgentService
+from .chat_history import ChatHistoryStore
 from .pdf_service import extract_text_from_pdf, upsert_pdf_to_qdrant, search_knowledge_base
 
-__all__ = ["VectorService", "AgentService", "extract_text_from_pdf", "upsert_pdf_to_qdrant", "search_knowledge_base"]
+__all__ = ["VectorService", "AgentService", "ChatHistoryStore", "extract_text_from_pdf", "upsert_pdf_to_qdrant", "search_knowledge_base"]
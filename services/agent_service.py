@@ -1,8 +1,42 @@
 """
 Agent Service untuk mengelola kedua agent.
 """
-from typing import Optional, Dict, Any
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Iterator, List, Callable, Tuple
 from agents import GeneralAgent, MarketingAgent
+from utils.singleflight import SingleFlight
+from utils.logger import setup_logger, request_context
+from utils.profiling import profile_request
+from services.qos_controller import QosController, QosProfile
+from services.query_log import query_log, capture_retrieval
+from services.hot_answers import HotAnswerStore
+from config import settings
+
+
+logger = setup_logger("services.agent_service")
+
+
+class _RetrievalStream:
+    """
+    Token stream yang mengumpulkan chunk id hasil retrieval-nya sendiri.
+    
+    Dipakai sebagai source shared stream agar consumer yang attach ke stream
+    yang sudah berjalan ikut mencatat chunk id milik producer.
+    """
+    
+    def __init__(self, source: Iterator[str]):
+        self._source = source
+        self.retrieved: List[Any] = []
+    
+    def __iter__(self) -> Iterator[str]:
+        with capture_retrieval() as captured:
+            try:
+                yield from self._source
+            finally:
+                self.retrieved.extend(captured)
 
 
 class AgentService:
@@ -11,6 +45,13 @@ class AgentService:
     def __init__(self):
         """Initialize AgentService."""
         self.agents = {}
+        self._agents_lock = threading.Lock()
+        # Request identik yang berjalan bersamaan berbagi satu komputasi
+        self._chat_flight = SingleFlight()
+        # Turunkan kualitas response secara bertahap saat latency/antrean melewati SLO
+        self.qos = QosController()
+        # Jawaban precomputed untuk pertanyaan yang sering ditanyakan (scripts.precompute_hot_answers)
+        self.hot_answers = HotAnswerStore() if settings.hot_answers_enabled else None
     
     def get_agent(self, agent_type: str, model_type: str = "telkom-ai"):
         """
@@ -25,21 +66,84 @@ class AgentService:
         """
         agent_key = f"{agent_type}_{model_type}"
         
-        if agent_key not in self.agents:
-            if agent_type == "general":
-                self.agents[agent_key] = GeneralAgent(model_type=model_type)
-            elif agent_type == "marketing":
-                self.agents[agent_key] = MarketingAgent(model_type=model_type)
-            else:
-                raise ValueError(f"Unsupported agent type: {agent_type}")
+        with self._agents_lock:
+            if agent_key not in self.agents:
+                if agent_type == "general":
+                    self.agents[agent_key] = GeneralAgent(model_type=model_type)
+                elif agent_type == "marketing":
+                    self.agents[agent_key] = MarketingAgent(model_type=model_type)
+                else:
+                    raise ValueError(f"Unsupported agent type: {agent_type}")
+            
+            return self.agents[agent_key]
+    
+    @staticmethod
+    def _tenant_kwargs(tenant_id: Optional[str]) -> Dict[str, Any]:
+        """Kwargs agent untuk tenant (kosong jika tanpa tenant)."""
+        return {"tenant_id": tenant_id} if tenant_id is not None else {}
+    
+    def _acquire_qos(self) -> Optional[QosProfile]:
+        """Profile QoS untuk request baru, None jika QoS tidak aktif."""
+        return self.qos.acquire() if settings.qos_enabled else None
+    
+    def _apply_qos(self, qos: Optional[QosProfile], model_type: str, kwargs: Dict[str, Any]) -> str:
+        """
+        Terapkan profile QoS ke kwargs agent.
         
-        return self.agents[agent_key]
+        Returns:
+            Model type yang dipakai (fallback ke provider cepat jika level memintanya)
+        """
+        if qos is None:
+            return model_type
+        kwargs.update(qos.agent_kwargs())
+        fallback = settings.qos_fallback_model_type
+        if qos.fallback_model and fallback != model_type and self._provider_configured(fallback):
+            return fallback
+        return model_type
+    
+    def _provider_configured(self, model_type: str) -> bool:
+        """Cek apakah API key provider tersedia."""
+        if model_type == "gemini":
+            return bool(settings.gemini_api_key)
+        if model_type == "telkom-ai":
+            return bool(settings.telkom_ai_api_key)
+        return False
+    
+    def get_qos_status(self) -> Dict[str, Any]:
+        """
+        Metrik QoS controller (level degradasi, p90 latency, request aktif).
+        
+        Returns:
+            Dict status QoS
+        """
+        return {"enabled": settings.qos_enabled, **self.qos.status()}
+    
+    def _hot_answer(self, query: str, agent_type: str, model_type: str,
+                    context: Optional[str], tenant_id: Optional[str]) -> Optional[str]:
+        """Precomputed answer untuk query jika masih berlaku untuk versi knowledge base saat ini."""
+        if self.hot_answers is None or agent_type != "marketing" or context is not None:
+            return None
+        try:
+            # Versi knowledge base per tenant: write tenant lain tidak membuat jawaban usang
+            vector_service = self.get_agent(agent_type, model_type).get_vector_service(tenant_id)
+            kb_version = vector_service.kb_version()
+            answer = self.hot_answers.lookup(query, agent_type, model_type, tenant_id, kb_version)
+            # Versi ter-cache bisa tertinggal write dari worker lain; cek ulang tanpa cache
+            # sebelum menyajikan jawaban (hanya saat hit, jadi miss tidak menambah round trip)
+            if answer is not None and vector_service.kb_version(refresh=True) != kb_version:
+                return None
+            return answer
+        except Exception as e:
+            logger.error("Error looking up hot answer: %s", e)
+            return None
     
     def chat(self, 
              query: str, 
              agent_type: str = "general", 
              model_type: str = "telkom-ai", 
-             context: Optional[str] = None) -> str:
+             context: Optional[str] = None,
+             profile: bool = False,
+             tenant_id: Optional[str] = None) -> str:
         """
         Chat dengan agent yang dipilih.
         
@@ -48,20 +152,193 @@ class AgentService:
             agent_type: 'general' atau 'marketing'
             model_type: 'telkom-ai' atau 'gemini'
             context: Konteks tambahan
+            profile: Tulis profile untuk request ini ke settings.profiling_dir
+            tenant_id: Tenant yang knowledge base-nya dipakai (marketing agent)
             
         Returns:
             Response dari agent
         """
+        with request_context():
+            start = time.perf_counter()
+            answer = None if profile else self._hot_answer(query, agent_type, model_type, context, tenant_id)
+            if answer is not None:
+                query_log.record(query, agent_type, model_type, (time.perf_counter() - start) * 1000,
+                                 tenant_id=tenant_id, cached=True)
+                return answer
+            
+            # Request yang di-profile tidak digabung dengan request biasa
+            key = (query, agent_type, model_type, context, profile, tenant_id)
+            response, retrieved = self._chat_flight.do(key, self._chat_with_retrieval, query, agent_type,
+                                                       model_type, context, profile, tenant_id)
+            query_log.record(query, agent_type, model_type, (time.perf_counter() - start) * 1000,
+                             chunk_ids=retrieved, tenant_id=tenant_id)
+            return response
+    
+    def _chat_with_retrieval(self, *args) -> Tuple[str, List[Any]]:
+        """_chat yang juga mengembalikan chunk id hasil retrieval (dibagi ke semua pemanggil single-flight)."""
+        with capture_retrieval() as retrieved:
+            return self._chat(*args), retrieved
+    
+    def _chat(self, query: str, agent_type: str, model_type: str, context: Optional[str],
+              profile: bool = False, tenant_id: Optional[str] = None) -> str:
+        """Jalankan satu chat turn tanpa coalescing."""
+        start = time.perf_counter()
+        qos = self._acquire_qos()
         try:
+            kwargs = self._tenant_kwargs(tenant_id)
+            model_type = self._apply_qos(qos, model_type, kwargs)
             agent = self.get_agent(agent_type, model_type)
-            return agent.generate_response(query, context)
+            with profile_request("chat", enabled=profile):
+                return agent.generate_response(query, context, **kwargs)
         except Exception as e:
+            logger.error("Error in chat: %s", e, exc_info=True)
             return f"Error: {str(e)}"
+        finally:
+            latency = time.perf_counter() - start
+            if qos is not None:
+                self.qos.release(latency)
+            logger.debug("chat_turn", extra={
+                "agent_type": agent_type,
+                "model_type": model_type,
+                "qos_level": qos.level if qos is not None else None,
+                "latency_ms": round(latency * 1000, 1),
+            })
+    
+    def chat_stream(self, 
+                    query: str, 
+                    agent_type: str = "general", 
+                    model_type: str = "telkom-ai", 
+                    context: Optional[str] = None,
+                    tenant_id: Optional[str] = None) -> Iterator[str]:
+        """
+        Chat dengan agent yang dipilih dalam mode streaming.
+        
+        Consumer dengan request identik yang datang bersamaan akan attach
+        ke token stream yang sama.
+        
+        Args:
+            query: Pertanyaan user
+            agent_type: 'general' atau 'marketing'
+            model_type: 'telkom-ai' atau 'gemini'
+            context: Konteks tambahan
+            tenant_id: Tenant yang knowledge base-nya dipakai (marketing agent)
+            
+        Returns:
+            Iterator potongan response dari agent
+        """
+        with request_context():
+            start = time.perf_counter()
+            answer = self._hot_answer(query, agent_type, model_type, context, tenant_id)
+            if answer is not None:
+                query_log.record(query, agent_type, model_type, (time.perf_counter() - start) * 1000,
+                                 tenant_id=tenant_id, cached=True)
+                return iter([answer])
+            
+            key = (query, agent_type, model_type, context, tenant_id)
+            shared = self._chat_flight.shared_stream(
+                key, lambda: _RetrievalStream(self._chat_stream(query, agent_type, model_type, context, tenant_id))
+            )
+            # Chunk id dibaca dari source producer, sehingga consumer yang attach belakangan ikut mencatatnya
+            return self._logged_stream(shared.subscribe(), start, shared.source.retrieved,
+                                       query, agent_type, model_type, tenant_id)
+    
+    def _logged_stream(self, stream: Iterator[str], start: float, retrieved: List[Any], query: str,
+                       agent_type: str, model_type: str, tenant_id: Optional[str]) -> Iterator[str]:
+        """Teruskan stream lalu catat ke query log setelah selesai."""
+        try:
+            yield from stream
+        finally:
+            query_log.record(query, agent_type, model_type, (time.perf_counter() - start) * 1000,
+                             chunk_ids=retrieved, tenant_id=tenant_id)
+    
+    def _chat_stream(self, query: str, agent_type: str, model_type: str,
+                     context: Optional[str], tenant_id: Optional[str] = None) -> Iterator[str]:
+        """Jalankan satu streaming chat turn tanpa coalescing."""
+        start = time.perf_counter()
+        qos = self._acquire_qos()
+        try:
+            kwargs = self._tenant_kwargs(tenant_id)
+            model_type = self._apply_qos(qos, model_type, kwargs)
+            agent = self.get_agent(agent_type, model_type)
+            yield from agent.stream_response(query, context, **kwargs)
+        except Exception as e:
+            logger.error("Error in chat stream: %s", e, exc_info=True)
+            yield f"Error: {str(e)}"
+        finally:
+            if qos is not None:
+                self.qos.release(time.perf_counter() - start)
+    
+    def chat_batch(self,
+                   queries: List[str],
+                   agent_type: str = "general",
+                   model_type: str = "telkom-ai",
+                   context: Optional[str] = None,
+                   max_workers: Optional[int] = None,
+                   on_result: Optional[Callable[[int, str, str], None]] = None,
+                   tenant_id: Optional[str] = None) -> List[str]:
+        """
+        Chat untuk banyak query sekaligus (evaluasi offline, report).
+        
+        Untuk marketing agent, semua query di-embed dalam satu batched call dan
+        retrieval dikirim sebagai Qdrant batch search dengan mode yang sama seperti
+        chat (multi-query/two-tier). LLM call dijalankan paralel dengan jumlah
+        worker terbatas.
+        
+        Args:
+            queries: List pertanyaan
+            agent_type: 'general' atau 'marketing'
+            model_type: 'telkom-ai' atau 'gemini'
+            context: Konteks tambahan untuk semua query
+            max_workers: Jumlah LLM call paralel (default: settings.batch_max_workers)
+            on_result: Callback (index, query, response) setiap kali satu query selesai
+            tenant_id: Tenant yang knowledge base-nya dipakai (marketing agent)
+            
+        Returns:
+            List response, urutannya sama dengan queries (gunakan utils.is_error_response
+            untuk membedakan pesan error dari jawaban)
+            
+        Raises:
+            Exception: Jika batch retrieval gagal; query tidak dijawab tanpa konteks
+        """
+        agent = self.get_agent(agent_type, model_type)
+        
+        documents: List[Optional[list]] = [None] * len(queries)
+        if agent_type == "marketing" and queries:
+            # Query off-topic langsung ditolak agent, tidak perlu di-embed
+            routed = [i for i, q in enumerate(queries) if not agent._should_refuse(q, context)]
+            results = agent.retrieve_batch([queries[i] for i in routed], tenant_id=tenant_id, k=3)
+            for i, docs in zip(routed, results):
+                documents[i] = docs
+        
+        def run(index: int) -> str:
+            try:
+                kwargs = self._tenant_kwargs(tenant_id)
+                if documents[index] is not None:
+                    kwargs["documents"] = documents[index]
+                return agent.generate_response(queries[index], context, **kwargs)
+            except Exception as e:
+                return f"Error: {str(e)}"
+        
+        responses: List[str] = [""] * len(queries)
+        with ThreadPoolExecutor(max_workers=max_workers or settings.batch_max_workers) as executor:
+            # Request id dari context pemanggil ikut ke worker thread
+            futures = {
+                executor.submit(contextvars.copy_context().run, run, i): i
+                for i in range(len(queries))
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                responses[index] = future.result()
+                if on_result:
+                    on_result(index, queries[index], responses[index])
+        
+        return responses
     
     def add_marketing_knowledge(self, 
                                documents: list, 
                                metadata_list: list = None, 
-                               model_type: str = "telkom-ai") -> bool:
+                               model_type: str = "telkom-ai",
+                               tenant_id: Optional[str] = None) -> bool:
         """
         Menambahkan dokumen ke marketing agent knowledge base.
         
@@ -69,15 +346,16 @@ class AgentService:
             documents: List dokumen text
             metadata_list: List metadata
             model_type: Tipe model yang digunakan
+            tenant_id: Tenant pemilik dokumen
             
         Returns:
             True jika berhasil
         """
         try:
             agent = self.get_agent("marketing", model_type)
-            return agent.add_marketing_documents(documents, metadata_list)
+            return agent.add_marketing_documents(documents, metadata_list, tenant_id=tenant_id)
         except Exception as e:
-            print(f"Error adding marketing knowledge: {str(e)}")
+            logger.error("Error adding marketing knowledge: %s", e)
             return False
     
     def get_available_agents(self) -> Dict[str, Dict]:
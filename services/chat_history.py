@@ -0,0 +1,151 @@
+"""
+Chat History Store berbasis SQLite.
+
+Riwayat chat disimpan per session (dan per agent) sehingga tidak hilang saat
+reconnect, dan UI cukup memuat window pesan terbaru lalu memuat pesan lama
+secara bertahap.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from config import settings
+from utils.logger import setup_logger
+
+
+logger = setup_logger("services.chat_history")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    agent_type TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, agent_type, id);
+"""
+
+
+class ChatHistoryStore:
+    """Store riwayat chat di SQLite, satu koneksi per thread."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize ChatHistoryStore.
+
+        Args:
+            db_path: Path file SQLite (default: settings.chat_history_db_path)
+        """
+        self.db_path = db_path or settings.chat_history_db_path
+        directory = os.path.dirname(self.db_path)
+        if directory and self.db_path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Koneksi SQLite untuk thread aktif (Streamlit menjalankan tiap session di thread sendiri)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.row_factory = sqlite3.Row
+            if self.db_path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add_message(self, session_id: str, agent_type: str, role: str, content: str) -> Optional[int]:
+        """
+        Simpan satu pesan.
+
+        Args:
+            session_id: Id session chat
+            agent_type: 'general' atau 'marketing'
+            role: 'user' atau 'assistant'
+            content: Isi pesan
+
+        Returns:
+            Id pesan, None jika gagal
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO messages (session_id, agent_type, role, content, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (session_id, agent_type, role, content, time.time())
+                )
+                return cursor.lastrowid
+        except Exception as e:
+            logger.error("Error saving chat message: %s", e)
+            return None
+
+    def get_messages(self, session_id: str, agent_type: str, limit: int = 20,
+                     before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Ambil satu halaman pesan, urut dari yang terlama.
+
+        Args:
+            session_id: Id session chat
+            agent_type: 'general' atau 'marketing'
+            limit: Jumlah pesan maksimum
+            before_id: Hanya pesan dengan id lebih kecil (untuk "load older")
+
+        Returns:
+            List pesan {id, role, content}
+        """
+        try:
+            query = "SELECT id, role, content FROM messages WHERE session_id = ? AND agent_type = ?"
+            params: list = [session_id, agent_type]
+            if before_id is not None:
+                query += " AND id < ?"
+                params.append(before_id)
+            query += " ORDER BY id DESC LIMIT ?"
+            params.append(limit)
+            rows = self._connect().execute(query, params).fetchall()
+            return [dict(row) for row in reversed(rows)]
+        except Exception as e:
+            logger.error("Error loading chat messages: %s", e)
+            return []
+
+    def has_older(self, session_id: str, agent_type: str, before_id: int) -> bool:
+        """Cek apakah masih ada pesan sebelum before_id."""
+        try:
+            row = self._connect().execute(
+                "SELECT 1 FROM messages WHERE session_id = ? AND agent_type = ? AND id < ? LIMIT 1",
+                (session_id, agent_type, before_id)
+            ).fetchone()
+            return row is not None
+        except Exception as e:
+            logger.error("Error checking older chat messages: %s", e)
+            return False
+
+    def clear(self, session_id: str, agent_type: Optional[str] = None) -> int:
+        """
+        Hapus riwayat chat session.
+
+        Args:
+            session_id: Id session chat
+            agent_type: Hanya hapus riwayat agent ini (default: semua agent)
+
+        Returns:
+            Jumlah pesan yang dihapus
+        """
+        try:
+            with self._connect() as conn:
+                if agent_type is None:
+                    cursor = conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                else:
+                    cursor = conn.execute(
+                        "DELETE FROM messages WHERE session_id = ? AND agent_type = ?",
+                        (session_id, agent_type)
+                    )
+                return cursor.rowcount
+        except Exception as e:
+            logger.error("Error clearing chat history: %s", e)
+            return 0
@@ -0,0 +1,212 @@
+"""
+Registry metadata collection Qdrant.
+
+Qdrant client yang dipakai belum mendukung metadata per collection, jadi metadata
+(embedding model, dimensi, dll) disimpan sebagai point tanpa vector di collection
+registry terpisah, satu point per collection fisik. Alias di-resolve ke collection
+di belakangnya. Revision knowledge base (per tenant) dan dictionary kompresi
+payload juga disimpan di sini.
+"""
+import base64
+import time
+import uuid
+from typing import Dict, Any, Iterable, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from config import settings
+
+
+def _point_id(collection_name: str) -> str:
+    """Point id deterministik untuk collection."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"qdrant-collection/{collection_name}"))
+
+
+def _resolve(client: QdrantClient, collection_name: str) -> str:
+    """Nama collection fisik jika collection_name adalah alias."""
+    for alias in client.get_aliases().aliases:
+        if alias.alias_name == collection_name:
+            return alias.collection_name
+    return collection_name
+
+
+def _ensure_registry(client: QdrantClient):
+    """Buat collection registry jika belum ada."""
+    if not client.collection_exists(settings.qdrant_meta_collection):
+        client.create_collection(settings.qdrant_meta_collection, vectors_config={})
+
+
+def get_collection_meta(client: QdrantClient, collection_name: str) -> Optional[Dict[str, Any]]:
+    """
+    Baca metadata collection.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection atau alias
+
+    Returns:
+        Dict metadata, None jika belum tercatat
+    """
+    if not client.collection_exists(settings.qdrant_meta_collection):
+        return None
+    collection_name = _resolve(client, collection_name)
+    records = client.retrieve(settings.qdrant_meta_collection, ids=[_point_id(collection_name)])
+    if not records:
+        return None
+    meta = dict(records[0].payload or {})
+    meta.pop("collection_name", None)
+    return meta
+
+
+def set_collection_meta(client: QdrantClient, collection_name: str, meta: Dict[str, Any]):
+    """
+    Simpan (overwrite) metadata collection.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection atau alias
+        meta: Metadata yang disimpan
+    """
+    _ensure_registry(client)
+    collection_name = _resolve(client, collection_name)
+    client.upsert(
+        settings.qdrant_meta_collection,
+        points=[models.PointStruct(
+            id=_point_id(collection_name),
+            vector={},
+            payload={"collection_name": collection_name, **meta}
+        )]
+    )
+
+
+def delete_collection_meta(client: QdrantClient, collection_name: str):
+    """
+    Hapus metadata dan revision collection.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection
+    """
+    if client.collection_exists(settings.qdrant_meta_collection):
+        client.delete(
+            settings.qdrant_meta_collection,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[
+                models.FieldCondition(key="collection_name", match=models.MatchValue(value=collection_name))
+            ]))
+        )
+
+
+# Scope revision yang berubah pada setiap write, apa pun tenant-nya
+ANY_SCOPE = "*"
+# Scope revision untuk write yang menyentuh semua tenant (job maintenance)
+GLOBAL_SCOPE = "!"
+
+
+def _revision_point_id(collection_name: str, scope: str) -> str:
+    """Point id deterministik untuk revision satu scope collection."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"qdrant-revision/{collection_name}/{scope}"))
+
+
+def bump_revisions(client: QdrantClient, collection_name: str, scopes: Iterable[str]) -> str:
+    """
+    Tandai knowledge base berubah untuk beberapa scope (tenant).
+
+    Revision berupa token unik (waktu ns + random) yang ditulis tanpa membaca
+    nilai lama, jadi write bersamaan dari beberapa worker tidak bisa saling
+    menimpa kembali ke revision yang sudah pernah dibaca.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection atau alias
+        scopes: Scope yang berubah (tenant id, "" untuk point tanpa tenant, GLOBAL_SCOPE
+            untuk semua tenant); ANY_SCOPE selalu ikut berubah
+
+    Returns:
+        Token revision baru
+    """
+    _ensure_registry(client)
+    collection_name = _resolve(client, collection_name)
+    token = f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+    client.upsert(
+        settings.qdrant_meta_collection,
+        points=[
+            models.PointStruct(
+                id=_revision_point_id(collection_name, scope),
+                vector={},
+                payload={"collection_name": collection_name, "revision_scope": scope, "revision": token}
+            )
+            for scope in {*scopes, ANY_SCOPE}
+        ]
+    )
+    return token
+
+
+def get_revisions(client: QdrantClient, collection_name: str, scopes: Iterable[str]) -> Dict[str, str]:
+    """
+    Baca revision beberapa scope collection dalam satu request.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection fisik atau alias
+        scopes: Scope yang dibaca (lihat bump_revisions, ANY_SCOPE untuk semua tenant)
+
+    Returns:
+        Dict scope -> token revision ("0" jika belum pernah berubah)
+    """
+    scopes = list(scopes)
+    revisions = {scope: "0" for scope in scopes}
+    if not client.collection_exists(settings.qdrant_meta_collection):
+        return revisions
+    collection_name = _resolve(client, collection_name)
+    records = client.retrieve(
+        settings.qdrant_meta_collection,
+        ids=[_revision_point_id(collection_name, scope) for scope in scopes]
+    )
+    for record in records:
+        payload = record.payload or {}
+        revisions[payload.get("revision_scope")] = payload.get("revision", "0")
+    return revisions
+
+
+def _dictionary_point_id(dict_id: int) -> str:
+    """Point id deterministik untuk dictionary kompresi."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"zstd-dict/{dict_id}"))
+
+
+def get_compression_dict(client: QdrantClient, dict_id: int) -> Optional[bytes]:
+    """
+    Baca dictionary kompresi payload.
+
+    Args:
+        client: Qdrant client
+        dict_id: Id dictionary zstd
+
+    Returns:
+        Data dictionary, None jika tidak ada
+    """
+    if not client.collection_exists(settings.qdrant_meta_collection):
+        return None
+    records = client.retrieve(settings.qdrant_meta_collection, ids=[_dictionary_point_id(dict_id)])
+    if not records:
+        return None
+    return base64.b64decode(records[0].payload["data"])
+
+
+def set_compression_dict(client: QdrantClient, dict_id: int, data: bytes):
+    """
+    Simpan dictionary kompresi payload (dipakai bersama oleh semua versi collection).
+
+    Args:
+        client: Qdrant client
+        dict_id: Id dictionary zstd
+        data: Data dictionary
+    """
+    _ensure_registry(client)
+    client.upsert(
+        settings.qdrant_meta_collection,
+        points=[models.PointStruct(
+            id=_dictionary_point_id(dict_id),
+            vector={},
+            payload={"zstd_dict_id": dict_id, "data": base64.b64encode(data).decode("ascii")}
+        )]
+    )
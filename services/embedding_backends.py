@@ -0,0 +1,185 @@
+"""
+Embedding backend yang bisa dipilih lewat settings.embedding_backend.
+
+- openai: OpenAIEmbeddings (API eksternal)
+- local: model sentence-transformers dari path lokal, inference di CPU
+  (runtime torch atau onnx), batched dan multi-thread
+- hashing: feature hashing deterministik tanpa model, untuk test offline
+
+Semua backend mengimplementasikan interface LangChain Embeddings sehingga
+bisa dipakai langsung oleh VectorService dan QdrantVectorStore.
+"""
+import hashlib
+import re
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from config import settings
+
+
+EMBEDDING_BACKENDS = ("openai", "local", "hashing")
+
+# Model lokal berat untuk di-load; satu instance per (path, runtime, device) per proses
+_model_lock = threading.Lock()
+_local_models: Dict[Tuple[str, str, str], object] = {}
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Embedding deterministik berbasis feature hashing (unigram dan bigram kata).
+
+    Tidak butuh model maupun network; teks yang sama selalu menghasilkan vector
+    yang sama dan teks dengan kata yang mirip menghasilkan vector yang dekat.
+    """
+
+    def __init__(self, dimensions: int):
+        """
+        Initialize HashingEmbeddings.
+
+        Args:
+            dimensions: Dimensi vector
+        """
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            # Bit terendah menentukan tanda agar collision saling meniadakan
+            vector[(value >> 1) % self.dimensions] += 1.0 if value & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LocalEmbeddings(Embeddings):
+    """Embedding dengan model sentence-transformers lokal (CPU, batched)."""
+
+    def __init__(self, model_path: str, dimensions: int,
+                 runtime: str = "torch", device: str = "cpu",
+                 batch_size: int = 32, threads: int = 0):
+        """
+        Initialize LocalEmbeddings.
+
+        Args:
+            model_path: Path (atau nama) model sentence-transformers
+            dimensions: Dimensi vector; lebih kecil dari dimensi model berarti truncate (Matryoshka)
+            runtime: 'torch' atau 'onnx'
+            device: Device inference (default: cpu)
+            batch_size: Jumlah teks per forward pass
+            threads: Jumlah thread intra-op (0 = default runtime)
+
+        Raises:
+            ImportError: Jika sentence-transformers belum ter-install
+            ValueError: Jika dimensions lebih besar dari dimensi model
+        """
+        self.model = _load_local_model(model_path, runtime, device, threads)
+        model_dimensions = self.model.get_sentence_embedding_dimension()
+        if dimensions > model_dimensions:
+            raise ValueError(
+                f"Model {model_path} menghasilkan {model_dimensions} dimensi, "
+                f"embedding_dimensions={dimensions}"
+            )
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=False,
+            show_progress_bar=False,
+        )
+        vectors = vectors[:, :self.dimensions]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self._encode(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode([text])[0]
+
+
+def _load_local_model(model_path: str, runtime: str, device: str, threads: int):
+    """Load model sentence-transformers sekali per proses."""
+    key = (model_path, runtime, device)
+    with _model_lock:
+        if key not in _local_models:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError(
+                    "Embedding backend 'local' membutuhkan sentence-transformers "
+                    "(pip install 'ai-agent-assistant[local-embeddings]')"
+                ) from e
+            kwargs = {"device": device}
+            if runtime == "onnx":
+                kwargs["backend"] = "onnx"
+                if threads:
+                    import onnxruntime
+                    options = onnxruntime.SessionOptions()
+                    options.intra_op_num_threads = threads
+                    kwargs["model_kwargs"] = {"provider": "CPUExecutionProvider", "session_options": options}
+            elif threads:
+                import torch
+                torch.set_num_threads(threads)
+            _local_models[key] = SentenceTransformer(model_path, **kwargs)
+        return _local_models[key]
+
+
+def get_embeddings(backend: str, model: str, dimensions: int) -> Embeddings:
+    """
+    Buat embeddings sesuai backend.
+
+    Args:
+        backend: 'openai', 'local' atau 'hashing'
+        model: Nama model (openai) atau path model (local); diabaikan oleh hashing
+        dimensions: Dimensi vector
+
+    Returns:
+        Instance LangChain Embeddings
+
+    Raises:
+        ValueError: Jika backend tidak dikenal
+    """
+    if backend == "openai":
+        # Hanya model text-embedding-3-* yang mendukung output dimensi lebih pendek
+        supports_dimensions = model.startswith("text-embedding-3")
+        return OpenAIEmbeddings(
+            model=model,
+            dimensions=dimensions if supports_dimensions else None,
+            api_key=settings.openai_api_key
+        )
+    if backend == "local":
+        return LocalEmbeddings(
+            model,
+            dimensions,
+            runtime=settings.local_embedding_runtime,
+            device=settings.local_embedding_device,
+            batch_size=settings.local_embedding_batch_size,
+            threads=settings.local_embedding_threads,
+        )
+    if backend == "hashing":
+        return HashingEmbeddings(dimensions)
+    raise ValueError(f"Unsupported embedding backend: {backend} (pilihan: {', '.join(EMBEDDING_BACKENDS)})")
@@ -0,0 +1,248 @@
+"""
+Precomputed answers untuk pertanyaan yang sering ditanyakan (hot set).
+
+Job offline membaca query log, mengelompokkan pertanyaan yang mirip, lalu
+menyimpan jawaban untuk setiap cluster yang sering muncul beserta versi
+knowledge base saat jawaban dibuat. AgentService menyajikan jawaban tersebut
+langsung selama versi knowledge base belum berubah.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from agents.topic_router import OFF_TOPIC_RESPONSE
+from config import settings
+from utils.logger import setup_logger
+from utils.validators import is_error_response
+
+
+logger = setup_logger("services.hot_answers")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    key TEXT PRIMARY KEY,
+    kb_version TEXT NOT NULL,
+    query TEXT NOT NULL,
+    representative TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    cluster_size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+_NON_WORD = re.compile(r"[^\w\s]+", re.UNICODE)
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Normalisasi query untuk lookup (lowercase, tanpa tanda baca, spasi tunggal)."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", query.lower())).strip()
+
+
+def _answer_key(query: str, agent_type: str, model_type: str, tenant_id: Optional[str]) -> str:
+    """Key lookup dari query ternormalisasi, agent, model dan tenant."""
+    raw = "\x1f".join([normalize_query(query), agent_type, model_type, tenant_id or ""])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class HotAnswerStore:
+    """Store precomputed answers di SQLite, satu koneksi per thread."""
+
+    def __init__(self, db_path: Optional[str] = None):
+        """
+        Initialize HotAnswerStore.
+
+        Args:
+            db_path: Path file SQLite (default: settings.hot_answers_db_path)
+        """
+        self.db_path = db_path or settings.hot_answers_db_path
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, query: str, agent_type: str, model_type: str,
+               tenant_id: Optional[str], kb_version: str) -> Optional[str]:
+        """
+        Cari precomputed answer yang masih berlaku.
+
+        Args:
+            query: Pertanyaan user
+            agent_type: Tipe agent
+            model_type: Tipe model
+            tenant_id: Tenant request
+            kb_version: Versi knowledge base saat ini
+
+        Returns:
+            Jawaban, None jika tidak ada atau sudah usang
+        """
+        try:
+            row = self._connect().execute(
+                "SELECT answer FROM answers WHERE key = ? AND kb_version = ?",
+                (_answer_key(query, agent_type, model_type, tenant_id), kb_version)
+            ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error("Error looking up hot answer: %s", e)
+            return None
+
+    def store(self, queries: Iterable[str], representative: str, answer: str, agent_type: str,
+              model_type: str, tenant_id: Optional[str], kb_version: str, cluster_size: int) -> int:
+        """
+        Simpan satu jawaban untuk semua query dalam cluster.
+
+        Returns:
+            Jumlah query yang dipetakan ke jawaban ini
+        """
+        now = time.time()
+        rows = [
+            (_answer_key(q, agent_type, model_type, tenant_id), kb_version, q, representative,
+             answer, cluster_size, now)
+            for q in queries
+        ]
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def prune(self, keep_versions: Iterable[str]) -> int:
+        """
+        Hapus jawaban untuk versi knowledge base lain.
+
+        Returns:
+            Jumlah baris yang dihapus
+        """
+        keep = list(keep_versions)
+        with self._connect() as conn:
+            placeholders = ",".join("?" for _ in keep) or "''"
+            cursor = conn.execute(f"DELETE FROM answers WHERE kb_version NOT IN ({placeholders})", keep)
+            return cursor.rowcount
+
+
+def cluster_queries(counts: Counter, embeddings, threshold: float) -> List[Tuple[str, List[str], int]]:
+    """
+    Kelompokkan query mirip secara greedy berdasarkan cosine similarity.
+
+    Query diproses dari yang paling sering; query yang similarity-nya ke
+    representative cluster >= threshold masuk cluster tersebut.
+
+    Args:
+        counts: Counter query ternormalisasi -> frekuensi
+        embeddings: LangChain Embeddings untuk query
+        threshold: Cosine similarity minimum
+
+    Returns:
+        List (representative, anggota, total frekuensi), urut dari yang paling sering
+    """
+    ordered = [query for query, _ in counts.most_common()]
+    if not ordered:
+        return []
+    vectors = np.asarray(embeddings.embed_documents(ordered), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+
+    representatives: List[int] = []
+    members: List[List[str]] = []
+    for i, query in enumerate(ordered):
+        if representatives:
+            similarities = vectors[representatives] @ vectors[i]
+            best = int(np.argmax(similarities))
+            if similarities[best] >= threshold:
+                members[best].append(query)
+                continue
+        representatives.append(i)
+        members.append([query])
+
+    clusters = [
+        (ordered[rep], group, sum(counts[q] for q in group))
+        for rep, group in zip(representatives, members)
+    ]
+    return sorted(clusters, key=lambda cluster: cluster[2], reverse=True)
+
+
+def precompute_hot_answers(agent_service,
+                           entries: Iterable[Dict[str, Any]],
+                           store: Optional[HotAnswerStore] = None,
+                           min_count: Optional[int] = None,
+                           top_n: Optional[int] = None,
+                           threshold: Optional[float] = None) -> Dict[str, int]:
+    """
+    Hitung jawaban untuk cluster pertanyaan marketing yang paling sering.
+
+    Args:
+        agent_service: AgentService untuk membuat jawaban
+        entries: Entry query log (lihat services.query_log.read_query_log)
+        store: HotAnswerStore tujuan (default: store dari agent_service)
+        min_count: Frekuensi minimum cluster (default: settings.hot_query_min_count)
+        top_n: Jumlah cluster maksimum per (model, tenant) (default: settings.hot_query_top_n)
+        threshold: Cosine similarity clustering (default: settings.hot_query_similarity)
+
+    Returns:
+        Dict jumlah 'clusters' yang dijawab dan 'queries' yang dipetakan
+    """
+    store = store or agent_service.hot_answers
+    min_count = min_count or settings.hot_query_min_count
+    top_n = top_n or settings.hot_query_top_n
+    threshold = threshold or settings.hot_query_similarity
+
+    # Hanya marketing agent yang jawabannya bergantung pada knowledge base
+    groups: Dict[Tuple[str, Optional[str]], Counter] = {}
+    # Kalimat asli per query ternormalisasi; LLM dipanggil dengan pertanyaan
+    # user sungguhan, bukan key lookup tanpa huruf besar dan tanda baca
+    phrasings: Dict[str, Counter] = {}
+    for entry in entries:
+        if entry.get("agent") != "marketing":
+            continue
+        original = " ".join(entry.get("q", "").split())
+        query = normalize_query(original)
+        if query:
+            groups.setdefault((entry.get("model", "telkom-ai"), entry.get("tenant")), Counter())[query] += 1
+            phrasings.setdefault(query, Counter())[original] += 1
+
+    result = {"clusters": 0, "queries": 0}
+    kb_versions = set()
+    for (model_type, tenant_id), counts in groups.items():
+        agent = agent_service.get_agent("marketing", model_type)
+        vector_service = agent.get_vector_service(tenant_id)
+        kb_version = vector_service.kb_version(refresh=True)
+        kb_versions.add(kb_version)
+
+        clusters = cluster_queries(counts, vector_service.embeddings, threshold)
+        for _, members, total in clusters[:top_n]:
+            if total < min_count:
+                break
+            representative = sum((phrasings[member] for member in members), Counter()).most_common(1)[0][0]
+            kwargs = {"tenant_id": tenant_id} if tenant_id is not None else {}
+            answer = agent.generate_response(representative, **kwargs)
+            # Penolakan router dan error tidak disimpan sebagai jawaban
+            if answer == OFF_TOPIC_RESPONSE or is_error_response(answer):
+                continue
+            result["queries"] += store.store(
+                members, representative, answer, "marketing", model_type, tenant_id, kb_version, total
+            )
+            result["clusters"] += 1
+            logger.info("hot_answer_precomputed", extra={
+                "representative": representative, "members": len(members), "count": total,
+                "model_type": model_type, "tenant_id": tenant_id, "kb_version": kb_version,
+            })
+    if kb_versions:
+        store.prune(kb_versions)
+    return result
@@ -0,0 +1,285 @@
+"""
+Migration Service untuk re-index collection ke konfigurasi embedding baru.
+
+Collection sumber tetap melayani query selama collection tujuan dibangun;
+point id dan payload dipertahankan sehingga hasil bisa dibandingkan langsung.
+"""
+import random
+import time
+from typing import Any, Dict, List, Optional, Callable, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from qdrant_client.http import models
+from services.collection_registry import get_revisions, ANY_SCOPE
+from services.vector_service import VectorService, KIND_FIELD, SUMMARY_KIND, legacy_doc_hash
+from utils.logger import setup_logger
+
+
+logger = setup_logger("services.migration_service")
+
+
+def reindex_collection(source: VectorService,
+                       target: VectorService,
+                       batch_size: int = 64,
+                       throttle_seconds: float = 0.0,
+                       progress: Optional[Callable[[int], None]] = None,
+                       doc_hashes: Optional[List[str]] = None) -> int:
+    """
+    Re-embed semua chunk dari source dan upsert ke target dengan id dan payload yang sama.
+    
+    Point ringkasan dokumen tidak di-embed ulang; vector-nya dihitung ulang dari
+    embedding chunk baru. Chunk lama tanpa doc_hash diberi legacy_doc_hash agar
+    ikut punya ringkasan di collection tujuan.
+
+    Args:
+        source: VectorService collection sumber
+        target: VectorService collection tujuan (embedding baru)
+        batch_size: Jumlah chunk per embedding call dan upsert
+        throttle_seconds: Jeda antar batch agar tidak membebani Qdrant yang sedang melayani query
+        progress: Callback jumlah point yang sudah di-index
+        doc_hashes: Hanya re-index dokumen dengan doc_hash ini (default: semua)
+
+    Returns:
+        Jumlah point yang di-index
+    """
+    indexed = 0
+    offset = None
+    doc_sums: Dict[tuple, np.ndarray] = {}
+    doc_heads: Dict[tuple, Document] = {}
+    doc_counts: Dict[tuple, int] = {}
+    chunk_filter = models.Filter(
+        must=[
+            models.FieldCondition(key="metadata.doc_hash", match=models.MatchAny(any=doc_hashes))
+        ] if doc_hashes is not None else None,
+        must_not=[models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))]
+    )
+    while True:
+        points, offset = source.client.scroll(
+            source.collection_name,
+            scroll_filter=chunk_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        if points:
+            payloads = []
+            for point in points:
+                payload = dict(point.payload or {})
+                metadata = dict(payload.get("metadata") or {})
+                if metadata.get("doc_hash") is None:
+                    metadata["doc_hash"] = legacy_doc_hash(metadata)
+                payload["metadata"] = metadata
+                payloads.append(payload)
+            texts = [source._decode_content(payload) for payload in payloads]
+            vectors = target.embeddings.embed_documents(texts)
+            target.client.upsert(
+                target.collection_name,
+                points=[
+                    models.PointStruct(id=point.id, vector=vector, payload=payload)
+                    for point, vector, payload in zip(points, vectors, payloads)
+                ],
+                wait=True
+            )
+            for payload, vector, text in zip(payloads, vectors, texts):
+                metadata = payload["metadata"]
+                # PDF yang sama di dua tenant punya ringkasan sendiri-sendiri
+                doc_key = (metadata.get("tenant_id"), metadata["doc_hash"])
+                vector = np.asarray(vector, dtype=np.float32)
+                doc_sums[doc_key] = doc_sums[doc_key] + vector if doc_key in doc_sums else vector
+                doc_counts[doc_key] = doc_counts.get(doc_key, 0) + 1
+                if doc_key not in doc_heads or metadata.get("chunk_index") == 0:
+                    doc_heads[doc_key] = Document(page_content=text, metadata=metadata)
+            indexed += len(points)
+            if progress:
+                progress(indexed)
+        if offset is None:
+            break
+        if throttle_seconds:
+            time.sleep(throttle_seconds)
+    
+    summaries = [
+        target._summary_point(doc_heads[doc_key], doc_sums[doc_key], doc_counts[doc_key])
+        for doc_key in doc_sums
+    ]
+    for start in range(0, len(summaries), batch_size):
+        target.client.upsert(target.collection_name, points=summaries[start:start + batch_size], wait=True)
+    return indexed + len(summaries)
+
+
+def document_keys(service: VectorService, batch_size: int = 1024) -> Set[Tuple[Optional[str], str]]:
+    """
+    Semua dokumen di collection sebagai (tenant_id, doc_hash).
+
+    Chunk lama tanpa doc_hash memakai legacy_doc_hash, sama seperti reindex_collection.
+
+    Args:
+        service: VectorService collection
+        batch_size: Jumlah point per scroll request
+
+    Returns:
+        Set key dokumen
+    """
+    keys = set()
+    offset = None
+    while True:
+        points, offset = service.client.scroll(
+            service.collection_name,
+            scroll_filter=models.Filter(must_not=[
+                models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))
+            ]),
+            limit=batch_size, offset=offset, with_vectors=False,
+            with_payload=["metadata.tenant_id", "metadata.doc_hash", "metadata.filename", "metadata.doc_id"]
+        )
+        for point in points:
+            metadata = (point.payload or {}).get("metadata") or {}
+            keys.add((metadata.get("tenant_id"), metadata.get("doc_hash") or legacy_doc_hash(metadata)))
+        if offset is None:
+            break
+    return keys
+
+
+def reconcile_version(source: VectorService,
+                      target: VectorService,
+                      baseline: Set[Tuple[Optional[str], str]],
+                      batch_size: int = 64) -> Dict[str, Any]:
+    """
+    Terapkan perubahan dokumen di source sejak baseline ke target.
+
+    Dokumen yang di-upload ke source selama rebuild di-copy (di-embed ulang
+    dengan embedding target), dokumen yang dihapus dari source dihapus dari target.
+
+    Args:
+        source: VectorService collection yang sedang melayani write
+        target: VectorService versi baru
+        baseline: document_keys(source) saat rebuild dimulai
+        batch_size: Jumlah chunk per embedding call dan upsert
+
+    Returns:
+        Dict jumlah dokumen 'added' dan 'removed', plus 'keys' (baseline baru)
+    """
+    current = document_keys(source)
+    added = current - baseline
+    removed = baseline - current
+    if added:
+        reindex_collection(source, target, batch_size=batch_size,
+                           doc_hashes=sorted({doc_hash for _, doc_hash in added}))
+    for tenant_id, doc_hash in removed:
+        scoped = target.for_tenant(tenant_id)
+        target.client.delete(
+            target.collection_name,
+            points_selector=models.FilterSelector(filter=scoped._document_filter(doc_hash=doc_hash)),
+            wait=True
+        )
+    if added or removed:
+        logger.info("version_reconciled", extra={
+            "source": source.collection_name, "target": target.collection_name,
+            "added": len(added), "removed": len(removed),
+        })
+    return {"added": len(added), "removed": len(removed), "keys": current}
+
+
+def promote_reconciled(live: VectorService,
+                       target: VectorService,
+                       baseline: Set[Tuple[Optional[str], str]],
+                       legacy_cutover: bool = False,
+                       max_passes: int = 3) -> Dict[str, Any]:
+    """
+    Rekonsiliasi write selama rebuild lalu tukar alias ke versi baru.
+
+    Rekonsiliasi diulang sampai tidak ada perubahan (maksimal max_passes),
+    lalu alias ditukar. Write yang masuk ke versi lama di antara rekonsiliasi
+    terakhir dan pertukaran alias terdeteksi dari revision versi lama dan
+    disusulkan ke versi baru.
+
+    Args:
+        live: VectorService alias yang sedang aktif
+        target: VectorService versi baru
+        baseline: document_keys(live) saat rebuild dimulai
+        legacy_cutover: Izinkan promote collection tanpa alias (ada jeda, lihat promote_version)
+        max_passes: Jumlah pass rekonsiliasi maksimum sebelum promote
+
+    Returns:
+        Dict 'promoted' (bool) dan jumlah dokumen 'added'/'removed'
+    """
+    result = {"promoted": False, "added": 0, "removed": 0}
+    for _ in range(max_passes):
+        reconciled = reconcile_version(live, target, baseline)
+        result["added"] += reconciled["added"]
+        result["removed"] += reconciled["removed"]
+        baseline = reconciled["keys"]
+        if not reconciled["added"] and not reconciled["removed"]:
+            break
+
+    old_physical = live._resolve_alias()
+    old_revision = get_revisions(live.client, live.collection_name, [ANY_SCOPE])
+    if not live.promote_version(target.collection_name, legacy_cutover=legacy_cutover):
+        return result
+    result["promoted"] = True
+
+    # Versi lama tidak menerima write baru setelah alias ditukar
+    if old_physical is not None and live.client.collection_exists(old_physical):
+        if get_revisions(live.client, old_physical, [ANY_SCOPE]) != old_revision:
+            old = VectorService(collection_name=old_physical, use_alias=False, adopt_embedding=True)
+            reconciled = reconcile_version(old, target, baseline)
+            result["added"] += reconciled["added"]
+            result["removed"] += reconciled["removed"]
+    return result
+
+
+def sample_queries(source: VectorService, n: int = 50, max_chars: int = 200, seed: int = 0) -> List[str]:
+    """
+    Ambil sample potongan chunk dari source sebagai query evaluasi.
+
+    Args:
+        source: VectorService collection sumber
+        n: Jumlah query
+        max_chars: Panjang maksimum tiap query
+        seed: Seed random
+
+    Returns:
+        List query
+    """
+    points, _ = source.client.scroll(
+        source.collection_name,
+        scroll_filter=models.Filter(must_not=[
+            models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))
+        ]),
+        limit=max(n * 5, n), with_payload=True, with_vectors=False
+    )
+    texts = [source._decode_content(point.payload or {})[:max_chars] for point in points]
+    texts = [text for text in texts if text.strip()]
+    random.Random(seed).shuffle(texts)
+    return texts[:n]
+
+
+def evaluate_recall(source: VectorService, target: VectorService, queries: List[str], k: int = 10) -> float:
+    """
+    Hitung recall@k target terhadap source.
+
+    Top-k dari source dianggap ground truth; recall adalah rata-rata fraksi
+    point id source yang juga muncul di top-k target.
+
+    Args:
+        source: VectorService collection sumber
+        target: VectorService collection tujuan
+        queries: Query evaluasi
+        k: Jumlah hasil yang dibandingkan
+
+    Returns:
+        Recall@k (0.0 - 1.0)
+    """
+    if not queries:
+        return 0.0
+    source_results = source._search_vectors_batch(source.embeddings.embed_documents(queries), k=k)
+    target_results = target._search_vectors_batch(target.embeddings.embed_documents(queries), k=k)
+
+    recalls = []
+    for source_docs, target_docs in zip(source_results, target_results):
+        expected = {doc.metadata["_id"] for doc in source_docs}
+        if not expected:
+            continue
+        found = {doc.metadata["_id"] for doc in target_docs}
+        recalls.append(len(expected & found) / len(expected))
+    return sum(recalls) / len(recalls) if recalls else 0.0
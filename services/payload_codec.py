@@ -0,0 +1,133 @@
+"""
+Kompresi page_content chunk dengan zstd dan dictionary bersama.
+
+Chunk text pendek dan mirip satu sama lain, jadi dictionary yang dilatih dari
+corpus memberi rasio kompresi jauh lebih baik daripada zstd biasa. Payload
+Qdrant berupa JSON, sehingga hasil kompresi disimpan sebagai base64 di
+`page_content_zstd` bersama id dictionary di `zstd_dict` (0 = tanpa dictionary).
+Payload lama dengan `page_content` biasa tetap bisa dibaca.
+"""
+import base64
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dependency opsional
+    zstandard = None
+
+from utils.logger import setup_logger
+
+
+logger = setup_logger("services.payload_codec")
+
+CONTENT_KEY = "page_content"
+COMPRESSED_CONTENT_KEY = "page_content_zstd"
+DICT_ID_KEY = "zstd_dict"
+
+_dict_lock = threading.Lock()
+_dictionaries: Dict[int, "zstandard.ZstdCompressionDict"] = {}
+# Compressor/decompressor zstd tidak aman dipakai bersamaan antar thread
+_local = threading.local()
+
+
+def _require_zstd():
+    """Pastikan zstandard ter-install."""
+    if zstandard is None:
+        raise ImportError(
+            "Kompresi payload zstd membutuhkan zstandard (pip install 'ai-agent-assistant[compression]')"
+        )
+
+
+def train_dictionary(samples: List[str], dict_size: int) -> Optional[Tuple[int, bytes]]:
+    """
+    Latih dictionary zstd dari sample chunk text.
+
+    Args:
+        samples: Sample chunk text
+        dict_size: Ukuran dictionary maksimum (bytes)
+
+    Returns:
+        Tuple (dict_id, data dictionary), None jika sample tidak cukup
+    """
+    _require_zstd()
+    try:
+        dictionary = zstandard.train_dictionary(dict_size, [text.encode("utf-8") for text in samples])
+    except zstandard.ZstdError as e:
+        logger.warning("Training zstd dictionary gagal (%d sample): %s", len(samples), e)
+        return None
+    return dictionary.dict_id(), dictionary.as_bytes()
+
+
+def register_dictionary(dict_id: int, data: bytes):
+    """Daftarkan dictionary agar bisa dipakai encode/decode di proses ini."""
+    _require_zstd()
+    with _dict_lock:
+        _dictionaries.setdefault(dict_id, zstandard.ZstdCompressionDict(data))
+
+
+def has_dictionary(dict_id: int) -> bool:
+    """Cek apakah dictionary sudah terdaftar di proses ini."""
+    return dict_id in _dictionaries
+
+
+def _compressor(dict_id: int, level: int):
+    compressors = getattr(_local, "compressors", None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    key = (dict_id, level)
+    if key not in compressors:
+        dictionary = _dictionaries.get(dict_id) if dict_id else None
+        compressors[key] = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    return compressors[key]
+
+
+def _decompressor(dict_id: int):
+    decompressors = getattr(_local, "decompressors", None)
+    if decompressors is None:
+        decompressors = _local.decompressors = {}
+    if dict_id not in decompressors:
+        dictionary = _dictionaries.get(dict_id) if dict_id else None
+        decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+    return decompressors[dict_id]
+
+
+def encode_content(text: str, level: int = 3, dict_id: int = 0) -> Dict[str, Any]:
+    """
+    Kompres chunk text menjadi field payload.
+
+    Args:
+        text: Chunk text
+        level: Level kompresi zstd
+        dict_id: Id dictionary yang sudah terdaftar (0 = tanpa dictionary)
+
+    Returns:
+        Dict field payload pengganti page_content
+    """
+    _require_zstd()
+    compressed = _compressor(dict_id, level).compress(text.encode("utf-8"))
+    return {COMPRESSED_CONTENT_KEY: base64.b64encode(compressed).decode("ascii"), DICT_ID_KEY: dict_id}
+
+
+def decode_content(payload: Dict[str, Any], load_dictionary: Callable[[int], Optional[bytes]]) -> str:
+    """
+    Ambil chunk text dari payload, terkompresi maupun tidak.
+
+    Args:
+        payload: Payload point Qdrant
+        load_dictionary: Fungsi pengambil data dictionary berdasarkan id (dipanggil sekali per id)
+
+    Returns:
+        Chunk text
+    """
+    if COMPRESSED_CONTENT_KEY not in payload:
+        return payload.get(CONTENT_KEY) or ""
+    _require_zstd()
+    dict_id = int(payload.get(DICT_ID_KEY) or 0)
+    if dict_id and not has_dictionary(dict_id):
+        data = load_dictionary(dict_id)
+        if data is None:
+            raise ValueError(f"zstd dictionary {dict_id} tidak ditemukan")
+        register_dictionary(dict_id, data)
+    compressed = base64.b64decode(payload[COMPRESSED_CONTENT_KEY])
+    return _decompressor(dict_id).decompress(compressed).decode("utf-8")
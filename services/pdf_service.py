@@ -6,31 +6,38 @@ from io import BytesIO
 from typing import List, Dict, Any
 from services.vector_service import VectorService
 from config import settings
+from utils.logger import setup_logger
+from utils.profiling import profile_request
 
 
-def extract_text_from_pdf(uploaded_file) -> str:
+logger = setup_logger("services.pdf_service")
+
+
+def extract_text_from_pdf(uploaded_file, profile: bool = False) -> str:
     """
     Extract text dari uploaded PDF file.
     
     Args:
         uploaded_file: Uploaded file dari Streamlit
+        profile: Tulis profile parsing PDF ke settings.profiling_dir
         
     Returns:
         Extracted text dari PDF
     """
     try:
-        # Read file sebagai bytes
-        pdf_bytes = uploaded_file.read()
-        pdf_file = BytesIO(pdf_bytes)
-        
-        # Extract text menggunakan PyPDF2
-        reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        with profile_request("pdf_extract", enabled=profile):
+            # Read file sebagai bytes
+            pdf_bytes = uploaded_file.read()
+            pdf_file = BytesIO(pdf_bytes)
+            
+            # Extract text menggunakan PyPDF2
+            reader = PyPDF2.PdfReader(pdf_file)
+            text = ""
+            
+            for page in reader.pages:
+                text += page.extract_text() + "\n"
+            
+            return text.strip()
     
     except Exception as e:
         raise Exception(f"Error extracting PDF text: {str(e)}")
@@ -54,7 +61,7 @@ def upsert_pdf_to_qdrant(text: str, metadata: Dict[str, Any], collection_name: s
         return vector_service.upsert_documents_from_pdf(text, metadata)
     
     except Exception as e:
-        print(f"Error upserting PDF to Qdrant: {str(e)}")
+        logger.error("Error upserting PDF to Qdrant: %s", e)
         return False
 
 
@@ -77,5 +84,5 @@ def search_knowledge_base(query: str, top_k: int = 3, collection_name: str = Non
         return [doc.page_content for doc in docs]
     
     except Exception as e:
-        print(f"Error searching knowledge base: {str(e)}")
+        logger.error("Error searching knowledge base: %s", e)
         return []
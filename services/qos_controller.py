@@ -0,0 +1,191 @@
+"""
+QoS Controller untuk menurunkan kualitas response secara bertahap saat beban tinggi.
+
+Controller mencatat latency chat turn terbaru dan jumlah request yang sedang
+berjalan. Jika p90 latency melewati SLO atau antrean terlalu panjang, level
+degradasi naik satu tingkat (k retrieval lebih kecil, budget konteks lebih
+ketat, max_tokens dibatasi, lalu pindah ke provider yang lebih cepat). Saat
+beban turun, level turun kembali satu tingkat per interval.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, NamedTuple, Optional, Tuple
+
+from config import settings
+from utils.logger import setup_logger
+
+
+logger = setup_logger("services.qos_controller")
+
+
+class QosProfile(NamedTuple):
+    """Parameter response untuk satu level degradasi."""
+    level: int
+    k: int
+    context_tokens: Optional[int]
+    max_tokens: Optional[int]
+    fallback_model: bool
+
+    def agent_kwargs(self) -> Dict[str, Any]:
+        """Kwargs untuk agent.generate_response / stream_response."""
+        kwargs: Dict[str, Any] = {"k": self.k}
+        if self.context_tokens is not None:
+            kwargs["context_tokens"] = self.context_tokens
+        if self.max_tokens is not None:
+            kwargs["max_tokens"] = self.max_tokens
+        return kwargs
+
+
+# Level 0 adalah perilaku normal; level berikutnya makin murah
+QOS_PROFILES: Tuple[QosProfile, ...] = (
+    QosProfile(level=0, k=3, context_tokens=None, max_tokens=None, fallback_model=False),
+    QosProfile(level=1, k=2, context_tokens=1500, max_tokens=1024, fallback_model=False),
+    QosProfile(level=2, k=2, context_tokens=1000, max_tokens=512, fallback_model=True),
+    QosProfile(level=3, k=1, context_tokens=500, max_tokens=256, fallback_model=True),
+)
+
+
+def percentile(values, fraction: float) -> float:
+    """
+    Percentile nearest-rank: nilai terkecil yang >= fraction dari sample.
+    
+    Dipakai juga oleh scripts.load_test agar p90 di laporan sama dengan yang
+    dipakai controller.
+    
+    Args:
+        values: Sample
+        fraction: Percentile sebagai pecahan (0.9 untuk p90)
+        
+    Returns:
+        Nilai percentile, 0.0 jika sample kosong
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class QosController:
+    """Controller level degradasi berdasarkan latency SLO dan jumlah request aktif."""
+
+    def __init__(self,
+                 latency_slo_ms: Optional[float] = None,
+                 max_in_flight: Optional[int] = None,
+                 window_seconds: Optional[float] = None,
+                 step_interval_seconds: Optional[float] = None,
+                 recovery_ratio: Optional[float] = None,
+                 min_samples: Optional[int] = None):
+        """
+        Initialize QosController.
+
+        Args:
+            latency_slo_ms: Target p90 latency chat turn (default: settings.qos_latency_slo_ms)
+            max_in_flight: Jumlah request aktif maksimum sebelum turun level (default: settings.qos_max_in_flight)
+            window_seconds: Jendela latency yang diperhitungkan (default: settings.qos_window_seconds)
+            step_interval_seconds: Jeda minimum antar perubahan level (default: settings.qos_step_interval_seconds)
+            recovery_ratio: Naik kembali jika p90 dan antrean di bawah rasio ini dari batasnya
+                (default: settings.qos_recovery_ratio)
+            min_samples: Jumlah sample minimum sebelum p90 dipakai (default: settings.qos_min_samples)
+        """
+        self.latency_slo_ms = latency_slo_ms or settings.qos_latency_slo_ms
+        self.max_in_flight = max_in_flight or settings.qos_max_in_flight
+        self.window_seconds = window_seconds or settings.qos_window_seconds
+        self.step_interval_seconds = (step_interval_seconds if step_interval_seconds is not None
+                                      else settings.qos_step_interval_seconds)
+        self.recovery_ratio = recovery_ratio or settings.qos_recovery_ratio
+        self.min_samples = min_samples or settings.qos_min_samples
+
+        self._lock = threading.Lock()
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._in_flight = 0
+        self._level = 0
+        # Perubahan pertama tidak dibatasi step interval (monotonic clock bisa dimulai dari ~0)
+        self._changed_at = float("-inf")
+
+    @property
+    def level(self) -> int:
+        """Level degradasi saat ini (0 = normal)."""
+        return self._level
+
+    def acquire(self) -> QosProfile:
+        """
+        Daftarkan request baru dan ambil profile untuk level saat ini.
+
+        Returns:
+            QosProfile yang harus dipakai request ini
+        """
+        with self._lock:
+            self._in_flight += 1
+            self._evaluate(time.monotonic())
+            return QOS_PROFILES[self._level]
+
+    def release(self, latency_seconds: float):
+        """
+        Tandai request selesai dan catat latency-nya.
+
+        Args:
+            latency_seconds: Durasi request (detik)
+        """
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            now = time.monotonic()
+            self._samples.append((now, latency_seconds * 1000))
+            self._evaluate(now)
+
+    def _p90_ms(self, now: float) -> Optional[float]:
+        """p90 latency dalam jendela, None jika sample belum cukup."""
+        while self._samples and now - self._samples[0][0] > self.window_seconds:
+            self._samples.popleft()
+        if len(self._samples) < self.min_samples:
+            return None
+        return percentile([latency for _, latency in self._samples], 0.9)
+
+    def _evaluate(self, now: float):
+        """Naik/turun satu level jika perlu (dipanggil dengan lock)."""
+        p90 = self._p90_ms(now)
+        overloaded = (p90 is not None and p90 > self.latency_slo_ms) or self._in_flight > self.max_in_flight
+        # Naik level hanya dengan bukti cukup dari level saat ini
+        healthy = (p90 is not None and p90 < self.latency_slo_ms * self.recovery_ratio
+                   and self._in_flight <= self.max_in_flight * self.recovery_ratio)
+
+        if now - self._changed_at < self.step_interval_seconds:
+            return
+        if overloaded and self._level < len(QOS_PROFILES) - 1:
+            new_level = self._level + 1
+        elif healthy and self._level > 0:
+            new_level = self._level - 1
+        else:
+            return
+
+        logger.warning("qos_level_changed", extra={
+            "from_level": self._level,
+            "to_level": new_level,
+            "p90_ms": round(p90, 1) if p90 is not None else None,
+            "in_flight": self._in_flight,
+        })
+        self._level = new_level
+        self._changed_at = now
+        # Sample dari level sebelumnya tidak mewakili level baru
+        self._samples.clear()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Snapshot metrik controller.
+
+        Returns:
+            Dict level, profile aktif, p90 latency, jumlah request aktif dan SLO
+        """
+        with self._lock:
+            p90 = self._p90_ms(time.monotonic())
+            return {
+                "level": self._level,
+                "profile": QOS_PROFILES[self._level]._asdict(),
+                "in_flight": self._in_flight,
+                "p90_ms": round(p90, 1) if p90 is not None else None,
+                "samples": len(self._samples),
+                "latency_slo_ms": self.latency_slo_ms,
+                "max_in_flight": self.max_in_flight,
+            }
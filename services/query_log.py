@@ -0,0 +1,189 @@
+"""
+Query log append-only untuk analitik pertanyaan.
+
+Setiap chat turn dicatat sebagai satu baris JSON ringkas di file harian
+(`queries-YYYYMMDD.jsonl`) di settings.query_log_dir. Penulisan dilakukan
+thread background sehingga tidak menambah latency chat.
+"""
+import atexit
+import contextvars
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+from config import settings
+from utils.logger import setup_logger
+
+
+logger = setup_logger("services.query_log")
+
+# Chunk id yang di-retrieve selama chat turn aktif (diisi agent lewat record_retrieval)
+_retrieved: contextvars.ContextVar[Optional[List[Any]]] = contextvars.ContextVar("retrieved_chunks", default=None)
+
+
+@contextmanager
+def capture_retrieval() -> Iterator[List[Any]]:
+    """
+    Kumpulkan chunk id yang di-retrieve di dalam blok.
+
+    List yang sama terlihat oleh thread yang dijalankan dengan context ini
+    (misalnya producer streaming), jadi id dari thread tersebut ikut tercatat.
+
+    Returns:
+        List chunk id
+    """
+    captured: List[Any] = []
+    token = _retrieved.set(captured)
+    try:
+        yield captured
+    finally:
+        _retrieved.reset(token)
+
+
+def record_retrieval(documents):
+    """Catat point id dokumen hasil retrieval ke capture aktif (jika ada)."""
+    captured = _retrieved.get()
+    if captured is not None:
+        captured.extend(doc.metadata.get("_id") for doc in documents if doc.metadata.get("_id") is not None)
+
+
+class QueryLog:
+    """Writer query log JSONL harian dengan thread background."""
+
+    def __init__(self, log_dir: Optional[str] = None):
+        """
+        Initialize QueryLog.
+
+        Args:
+            log_dir: Direktori file log (default: settings.query_log_dir)
+        """
+        self.log_dir = log_dir or settings.query_log_dir
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_writer(self):
+        """Start thread writer sekali."""
+        with self._start_lock:
+            if self._thread is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                return
+            entries = [entry]
+            # Tulis semua entry yang sudah menunggu dalam satu open/write
+            while True:
+                try:
+                    pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    self._write(entries)
+                    return
+                entries.append(pending)
+            self._write(entries)
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        try:
+            by_day: Dict[str, List[str]] = {}
+            for entry in entries:
+                day = datetime.fromtimestamp(entry["ts"], tz=timezone.utc).strftime("%Y%m%d")
+                by_day.setdefault(day, []).append(
+                    json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=str)
+                )
+            for day, lines in by_day.items():
+                with open(os.path.join(self.log_dir, f"queries-{day}.jsonl"), "a", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + "\n")
+        except Exception as e:
+            logger.error("Error writing query log: %s", e)
+
+    def record(self,
+               query: str,
+               agent_type: str,
+               model_type: str,
+               latency_ms: float,
+               chunk_ids: Optional[List[Any]] = None,
+               tenant_id: Optional[str] = None,
+               cached: bool = False):
+        """
+        Catat satu chat turn (non-blocking).
+
+        Args:
+            query: Pertanyaan user
+            agent_type: 'general' atau 'marketing'
+            model_type: Model yang dipakai
+            latency_ms: Latency chat turn (ms)
+            chunk_ids: Point id chunk yang di-retrieve
+            tenant_id: Tenant request
+            cached: True jika dijawab dari precomputed answer
+        """
+        if not settings.query_log_enabled:
+            return
+        self._ensure_writer()
+        entry: Dict[str, Any] = {
+            "ts": round(time.time(), 3),
+            "q": query,
+            "agent": agent_type,
+            "model": model_type,
+            "ms": round(latency_ms, 1),
+            "chunks": list(chunk_ids or []),
+        }
+        if tenant_id is not None:
+            entry["tenant"] = tenant_id
+        if cached:
+            entry["cached"] = True
+        self._queue.put(entry)
+
+    def close(self):
+        """Flush dan hentikan thread writer."""
+        with self._start_lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join(timeout=5)
+                self._thread = None
+
+
+def read_query_log(log_dir: Optional[str] = None, since_days: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Baca entry query log.
+
+    Args:
+        log_dir: Direktori file log (default: settings.query_log_dir)
+        since_days: Hanya file beberapa hari terakhir
+
+    Returns:
+        Iterator entry log
+    """
+    log_dir = log_dir or settings.query_log_dir
+    cutoff = None
+    if since_days is not None:
+        cutoff = datetime.fromtimestamp(time.time() - since_days * 86400, tz=timezone.utc).strftime("%Y%m%d")
+    for path in sorted(glob.glob(os.path.join(log_dir, "queries-*.jsonl"))):
+        day = os.path.basename(path)[len("queries-"):-len(".jsonl")]
+        if cutoff is not None and day < cutoff:
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Baris terakhir bisa terpotong jika proses berhenti saat menulis
+                    continue
+
+
+query_log = QueryLog()
@@ -0,0 +1,165 @@
+"""
+Snapshot Service untuk export/import collection Qdrant ke format lokal yang ringkas.
+
+Layout snapshot (satu direktori):
+    manifest.json   - nama collection, dimensi, distance, jumlah point, metadata collection,
+                      dictionary kompresi payload yang dipakai
+    vectors.npy     - matriks float32 (N x dim), bisa di-load dengan mmap
+    ids.json        - list point id, urutannya sama dengan baris vectors.npy
+    payloads.jsonl  - satu payload JSON per baris, urutan sama
+"""
+import base64
+import json
+import os
+from typing import Dict, Any, Iterator
+
+import numpy as np
+from qdrant_client import QdrantClient
+from services.collection_registry import get_collection_meta, get_compression_dict, set_compression_dict
+from services.payload_codec import DICT_ID_KEY
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _iter_payloads(path: str) -> Iterator[Dict[str, Any]]:
+    """Baca payloads.jsonl baris per baris."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def export_collection(client: QdrantClient, collection_name: str, path: str,
+                      batch_size: int = 256) -> Dict[str, Any]:
+    """
+    Export vectors, payloads dan ids collection ke direktori snapshot.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection
+        path: Direktori tujuan
+        batch_size: Jumlah point per scroll request
+
+    Returns:
+        Manifest snapshot
+    """
+    info = client.get_collection(collection_name)
+    params = info.config.params.vectors
+    total = client.count(collection_name, exact=True).count
+
+    os.makedirs(path, exist_ok=True)
+    vectors = np.lib.format.open_memmap(
+        os.path.join(path, "vectors.npy"), mode="w+", dtype=np.float32, shape=(total, params.size)
+    )
+    ids = []
+    dict_ids = set()
+
+    written = 0
+    offset = None
+    with open(os.path.join(path, "payloads.jsonl"), "w", encoding="utf-8") as payload_file:
+        while written < total:
+            points, offset = client.scroll(
+                collection_name,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            # Point yang ditambahkan selama export diabaikan
+            for point in points[:total - written]:
+                vectors[written] = point.vector
+                ids.append(point.id)
+                if (point.payload or {}).get(DICT_ID_KEY):
+                    dict_ids.add(point.payload[DICT_ID_KEY])
+                payload_file.write(json.dumps(point.payload or {}, ensure_ascii=False) + "\n")
+                written += 1
+            if offset is None:
+                break
+
+    vectors.flush()
+    del vectors
+
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "collection_name": collection_name,
+        "vector_size": params.size,
+        "distance": params.distance.value if hasattr(params.distance, "value") else str(params.distance),
+        "count": written,
+        "collection_meta": get_collection_meta(client, collection_name) or {},
+        "compression_dicts": {},
+    }
+    for dict_id in sorted(dict_ids):
+        data = get_compression_dict(client, dict_id)
+        if data is not None:
+            manifest["compression_dicts"][str(dict_id)] = base64.b64encode(data).decode("ascii")
+    with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """
+    Baca manifest snapshot.
+
+    Args:
+        path: Direktori snapshot
+
+    Returns:
+        Manifest snapshot (lihat export_collection)
+    """
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def import_collection(client: QdrantClient, collection_name: str, path: str,
+                      batch_size: int = 256, parallel: int = 1) -> int:
+    """
+    Import snapshot ke collection yang sudah ada dengan bulk upload, tanpa embedding call.
+
+    Collection tujuan dibuat oleh pemanggil (VectorService.import_snapshot) agar
+    konfigurasi HNSW, payload index dan metadata registry-nya sama dengan
+    collection yang dibuat lewat VectorService.
+
+    Args:
+        client: Qdrant client
+        collection_name: Nama collection tujuan
+        path: Direktori snapshot
+        batch_size: Jumlah point per upload request
+        parallel: Jumlah proses upload paralel
+
+    Returns:
+        Jumlah point yang di-import
+
+    Raises:
+        ValueError: Jika collection belum ada atau ukuran vector-nya tidak cocok
+    """
+    manifest = read_manifest(path)
+    with open(os.path.join(path, "ids.json"), encoding="utf-8") as f:
+        ids = json.load(f)
+
+    count = manifest["count"]
+    vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")[:count]
+
+    if not client.collection_exists(collection_name):
+        raise ValueError(f"Collection {collection_name} belum ada")
+    existing_size = client.get_collection(collection_name).config.params.vectors.size
+    if existing_size != manifest["vector_size"]:
+        raise ValueError(
+            f"Vector size mismatch: collection {collection_name} has {existing_size}, "
+            f"snapshot has {manifest['vector_size']}"
+        )
+
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=vectors,
+        payload=_iter_payloads(os.path.join(path, "payloads.jsonl")),
+        ids=ids[:count],
+        batch_size=batch_size,
+        parallel=parallel,
+        wait=True
+    )
+    for dict_id, data in manifest.get("compression_dicts", {}).items():
+        set_compression_dict(client, int(dict_id), base64.b64decode(data))
+    return count
@@ -1,88 +1,535 @@
 """
 Vector Service untuk mengelola Qdrant vector database.
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 # from langchain_community.vectorstores import Qdrant
 from langchain_qdrant import QdrantVectorStore
-from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from config import settings
+from utils.singleflight import SingleFlight
+from utils.logger import setup_logger
+from utils.profiling import profile_request
+from services.snapshot_service import export_collection, import_collection, read_manifest
+from services.collection_registry import (
+    get_collection_meta, set_collection_meta, delete_collection_meta,
+    get_compression_dict, set_compression_dict,
+    bump_revisions, get_revisions, ANY_SCOPE, GLOBAL_SCOPE
+)
+from services import payload_codec
+from services.embedding_backends import get_embeddings
+import numpy as np
+import copy
+import hashlib
+import re
+import threading
+import time
 import uuid
 
 
+logger = setup_logger("services.vector_service")
+
+# Dibagi antar instance karena VectorService sering dibuat per request
+_search_flight = SingleFlight()
+
+# Satu QdrantClient (dan connection pool-nya) per proses
+_client_lock = threading.Lock()
+_shared_client: Optional[QdrantClient] = None
+
+
+class EmbeddingConfigMismatchError(ValueError):
+    """Konfigurasi embedding tidak cocok dengan collection yang sudah ada."""
+
+
+# Collection fisik untuk alias "marketing_embeddings" bernama "marketing_embeddings__v1", dst.
+VERSION_SEPARATOR = "__v"
+
+# Payload field tenant (layout QdrantVectorStore: metadata.*)
+TENANT_FIELD = "metadata.tenant_id"
+
+# Point ringkasan dokumen (tier pertama two-tier retrieval) ditandai metadata.kind
+KIND_FIELD = "metadata.kind"
+SUMMARY_KIND = "summary"
+SUMMARY_PREVIEW_CHARS = 500
+
+
+class _CollectionState:
+    """
+    State per collection/alias yang di-share antara VectorService dan view tenant-nya.
+    
+    Alias target, embedding aktif dan cache versi knowledge base harus sama untuk
+    semua view; jika disalin per view, setiap view melakukan refresh alias dan
+    rebuild embeddings sendiri.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.embedding_backend: Optional[str] = None
+        self.embedding_model: Optional[str] = None
+        self.embedding_dimensions: Optional[int] = None
+        self.embeddings = None
+        self.vectorstore = None
+        self.alias_target: Optional[str] = None
+        self.alias_checked_at = 0.0
+        # tenant_id -> (versi knowledge base, waktu dibaca)
+        self.kb_versions: Dict[Optional[str], Tuple[str, float]] = {}
+        self.document_summaries = False
+        self.compression_dict_id: Optional[int] = None
+
+
+def legacy_doc_hash(metadata: Dict) -> str:
+    """
+    doc_hash pengganti untuk chunk lama tanpa doc_hash.
+    
+    Chunk dari sebelum ada doc_hash dikelompokkan per tenant dan filename
+    (atau doc_id jika tanpa filename).
+    """
+    group = metadata.get('filename') or f"doc_id:{metadata.get('doc_id', '')}"
+    raw = f"legacy/{metadata.get('tenant_id') or ''}/{group}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _shared(name: str) -> property:
+    """Attribute VectorService yang disimpan di _CollectionState."""
+    return property(
+        lambda self: getattr(self._state, name),
+        lambda self, value: setattr(self._state, name, value)
+    )
+
+
 class VectorService:
-    """Service untuk mengelola operasi vector database dengan Qdrant."""
+    """
+    Service untuk mengelola operasi vector database dengan Qdrant.
+    
+    Collection baru dibuat sebagai versi fisik ({name}__v1) di belakang alias
+    {name}; semua query dan write lewat alias sehingga rebuild bisa mengisi versi
+    baru di background lalu menukar alias secara atomik.
     
-    def __init__(self, collection_name: str = None):
+    Jika tenant_id di-set, semua write diberi tag tenant dan semua query
+    di-filter ke tenant tersebut (lihat for_tenant).
+    """
+    
+    embedding_backend = _shared("embedding_backend")
+    embedding_model = _shared("embedding_model")
+    embedding_dimensions = _shared("embedding_dimensions")
+    embeddings = _shared("embeddings")
+    vectorstore = _shared("vectorstore")
+    _alias_target = _shared("alias_target")
+    _alias_checked_at = _shared("alias_checked_at")
+    _kb_versions = _shared("kb_versions")
+    _document_summaries = _shared("document_summaries")
+    _compression_dict_id = _shared("compression_dict_id")
+    
+    def __init__(self, collection_name: str = None,
+                 embedding_model: Optional[str] = None,
+                 embedding_dimensions: Optional[int] = None,
+                 chunk_size: Optional[int] = None,
+                 chunk_overlap: Optional[int] = None,
+                 use_alias: bool = True,
+                 adopt_embedding: bool = False,
+                 tenant_id: Optional[str] = None,
+                 embedding_backend: Optional[str] = None):
         """
         Initialize VectorService.
         
         Args:
-            collection_name: Nama collection Qdrant
+            collection_name: Nama collection (atau alias) Qdrant
+            embedding_model: Model embedding (default: override per collection atau settings)
+            embedding_dimensions: Dimensi embedding (default: override per collection atau settings)
+            chunk_size: Ukuran chunk text splitter (default: settings.chunk_size)
+            chunk_overlap: Overlap chunk text splitter (default: settings.chunk_overlap)
+            use_alias: Buat collection baru sebagai versi di belakang alias
+            adopt_embedding: Pakai embedding yang tercatat di collection yang sudah ada
+                (untuk tool maintenance) alih-alih konfigurasi
+            tenant_id: Tenant untuk write dan query (default: settings.qdrant_default_tenant
+                jika multitenancy aktif, selain itu tanpa scope)
+            embedding_backend: Backend embedding 'openai', 'local' atau 'hashing'
+                (default: override per collection atau settings)
+        
+        Raises:
+            EmbeddingConfigMismatchError: Jika collection sudah dibuat dengan embedding lain
         """
         self.collection_name = collection_name or settings.qdrant_collection_name
+        self.use_alias = use_alias
+        self.tenant_id = tenant_id or (settings.qdrant_default_tenant if settings.qdrant_multitenancy else None)
+        self._state = _CollectionState()
+        override = settings.collection_embedding_overrides.get(self.collection_name, {})
+        self.embedding_backend = embedding_backend or override.get("backend") or settings.embedding_backend
+        self.embedding_model = embedding_model or override.get("model") or settings.embedding_model
+        self.embedding_dimensions = int(
+            embedding_dimensions or override.get("dimensions") or settings.embedding_dimensions
+        )
         self.client = self._get_qdrant_client()
+        if adopt_embedding:
+            meta = get_collection_meta(self.client, self.collection_name) or {}
+            # Metadata lama tanpa backend dibuat dengan OpenAI
+            self.embedding_backend = meta.get("embedding_backend", "openai" if meta else self.embedding_backend)
+            self.embedding_model = meta.get("embedding_model", self.embedding_model)
+            self.embedding_dimensions = int(meta.get("embedding_dimensions", self.embedding_dimensions))
         self.embeddings = self._get_embeddings()
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=chunk_size or settings.chunk_size,
+            chunk_overlap=chunk_overlap if chunk_overlap is not None else settings.chunk_overlap,
             length_function=len,
         )
         self.vectorstore = None
         self._ensure_collection_exists()
     
     def _get_qdrant_client(self) -> QdrantClient:
-        """Get Qdrant client."""
-        return QdrantClient(
-            url=settings.qdrant_host,
-            port=settings.qdrant_port,
-            api_key=settings.qdrant_api_key,
-            https=settings.qdrant_is_https
-        )
+        """Get Qdrant client yang di-share dalam satu proses."""
+        global _shared_client
+        with _client_lock:
+            if _shared_client is None:
+                _shared_client = QdrantClient(
+                    url=settings.qdrant_host,
+                    port=settings.qdrant_port,
+                    api_key=settings.qdrant_api_key,
+                    https=settings.qdrant_is_https
+                )
+            return _shared_client
     
     def _get_embeddings(self):
-        """Get embeddings model."""
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            api_key=settings.openai_api_key
-        )
+        """Get embeddings model sesuai embedding_backend."""
+        self.embeddings = get_embeddings(self.embedding_backend, self.embedding_model, self.embedding_dimensions)
         return self.embeddings
     
+    def _embedding_meta(self) -> Dict[str, Any]:
+        """Metadata embedding yang dicatat untuk collection."""
+        return {
+            "embedding_backend": self.embedding_backend,
+            "embedding_model": self.embedding_model,
+            "embedding_dimensions": self.embedding_dimensions
+        }
+    
+    def _check_embedding_config(self):
+        """
+        Bandingkan konfigurasi embedding dengan metadata collection yang sudah ada.
+        
+        Collection lama tanpa metadata dicatat jika ukuran vector-nya cocok.
+        """
+        meta = get_collection_meta(self.client, self.collection_name)
+        expected = self._embedding_meta()
+        
+        if meta is None:
+            size = self.client.get_collection(self.collection_name).config.params.vectors.size
+            if size != self.embedding_dimensions:
+                raise EmbeddingConfigMismatchError(
+                    f"Collection {self.collection_name} has vector size {size}, "
+                    f"configured embedding_dimensions is {self.embedding_dimensions}"
+                )
+            set_collection_meta(self.client, self.collection_name, expected)
+            return
+        
+        # Metadata sebelum ada pilihan backend selalu dibuat dengan OpenAI
+        meta.setdefault("embedding_backend", "openai")
+        for key, value in expected.items():
+            if meta.get(key) != value:
+                raise EmbeddingConfigMismatchError(
+                    f"Collection {self.collection_name} was built with {key}={meta.get(key)!r}, "
+                    f"configured {key}={value!r}. Update the configuration or re-index with scripts.reindex."
+                )
+    
+    def _create_physical_collection(self, name: str, vector_size: Optional[int] = None,
+                                    meta: Optional[Dict[str, Any]] = None):
+        """
+        Buat collection fisik dengan konfigurasi embedding service ini.
+        
+        Args:
+            name: Nama collection fisik
+            vector_size: Ukuran vector (default: embedding_dimensions)
+            meta: Metadata registry (default: embedding service ini, dengan point ringkasan)
+        """
+        hnsw_config = None
+        if settings.qdrant_multitenancy:
+            # Graph HNSW dibangun per tenant (payload_m), bukan satu graph global,
+            # sehingga query ber-filter tenant hanya menelusuri data tenant itu.
+            # Hanya berlaku untuk collection baru: collection yang sudah ada perlu
+            # di-rebuild (scripts.reindex) agar memakai konfigurasi ini.
+            hnsw_config = models.HnswConfigDiff(payload_m=16, m=0)
+        self.client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(
+                size=vector_size or self.embedding_dimensions,
+                distance=models.Distance.COSINE
+            ),
+            hnsw_config=hnsw_config
+        )
+        # Collection baru langsung punya point ringkasan untuk setiap dokumen
+        if meta is None:
+            meta = {**self._embedding_meta(), "document_summaries": True}
+        set_collection_meta(self.client, name, meta)
+        self._ensure_payload_indexes(name)
+    
     def _ensure_collection_exists(self):
-        """Pastikan collection exists di Qdrant."""
+        """Pastikan collection (atau alias) exists di Qdrant dan cocok dengan konfigurasi embedding."""
         try:
             # Check if collection exists
             collections = self.client.get_collections().collections
             collection_names = [col.name for col in collections]
+            self._alias_target = self._resolve_alias()
+            self._alias_checked_at = time.monotonic()
             
-            if self.collection_name not in collection_names:
-                # Create collection
-                self.client.create_collection(
-                    collection_name=self.collection_name,
-                    vectors_config=models.VectorParams(
-                        size=1536,  # Size untuk text-embedding-3-small
-                        distance=models.Distance.COSINE
-                    )
-                )
-                print(f"Created collection: {self.collection_name}")
+            if self._alias_target is None and self.collection_name not in collection_names:
+                if self.use_alias:
+                    self._alias_target = self._version_name(1)
+                    self._create_physical_collection(self._alias_target)
+                    self._swap_alias(self._alias_target)
+                    logger.info("Created collection: %s (alias %s)", self._alias_target, self.collection_name)
+                else:
+                    self._create_physical_collection(self.collection_name)
+                    logger.info("Created collection: %s", self.collection_name)
+            else:
+                self._check_embedding_config()
+                # Collection lama mungkin dibuat sebelum ada payload index
+                self._ensure_payload_indexes(self._alias_target or self.collection_name)
             
-            # Initialize vectorstore
-            self.vectorstore = QdrantVectorStore(
-                client=self.client,
-                collection_name=self.collection_name,
-                embedding=self.embeddings
-            )
+            self._init_vectorstore()
+            
+        except EmbeddingConfigMismatchError:
+            raise
+        except Exception as e:
+            logger.error("Error ensuring collection exists: %s", e)
+    
+    def _init_vectorstore(self):
+        """Initialize LangChain vectorstore di atas collection/alias."""
+        self.vectorstore = QdrantVectorStore(
+            client=self.client,
+            collection_name=self.collection_name,
+            embedding=self.embeddings
+        )
+    
+    def for_tenant(self, tenant_id: str) -> "VectorService":
+        """
+        View VectorService yang di-scope ke satu tenant.
+        
+        Client, embeddings, vectorstore dan state alias/versi di-share dengan
+        instance ini, jadi murah dibuat per request dan refresh alias di satu
+        view berlaku untuk semua view.
+        
+        Args:
+            tenant_id: Id tenant
+            
+        Returns:
+            VectorService untuk tenant tersebut
+        """
+        scoped = copy.copy(self)
+        scoped.tenant_id = tenant_id
+        return scoped
+    
+    def _tenant_filter(self) -> Optional[models.Filter]:
+        """
+        Filter tenant aktif, None jika tanpa scope.
+        
+        Tenant default juga mencakup point tanpa tenant_id (data dari sebelum
+        multitenancy aktif) sampai backfill_default_tenant dijalankan.
+        """
+        if self.tenant_id is None:
+            return None
+        condition = models.FieldCondition(key=TENANT_FIELD, match=models.MatchValue(value=self.tenant_id))
+        if self.tenant_id == settings.qdrant_default_tenant:
+            condition = models.Filter(should=[
+                condition,
+                models.IsEmptyCondition(is_empty=models.PayloadField(key=TENANT_FIELD))
+            ])
+        return models.Filter(must=[condition])
+    
+    def _chunk_filter(self, doc_hashes: Optional[List[str]] = None) -> models.Filter:
+        """Filter chunk (tanpa point ringkasan) di tenant aktif, opsional hanya dokumen tertentu."""
+        tenant_filter = self._tenant_filter()
+        must = list(tenant_filter.must) if tenant_filter is not None else []
+        if doc_hashes is not None:
+            must.append(models.FieldCondition(key="metadata.doc_hash", match=models.MatchAny(any=doc_hashes)))
+        return models.Filter(
+            must=must or None,
+            must_not=[models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))]
+        )
+    
+    def _summary_filter(self) -> models.Filter:
+        """Filter point ringkasan dokumen di tenant aktif."""
+        tenant_filter = self._tenant_filter()
+        must = list(tenant_filter.must) if tenant_filter is not None else []
+        must.append(models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND)))
+        return models.Filter(must=must)
+    
+    def _resolve_alias(self) -> Optional[str]:
+        """Collection fisik di belakang alias, None jika collection_name bukan alias."""
+        for alias in self.client.get_aliases().aliases:
+            if alias.alias_name == self.collection_name:
+                return alias.collection_name
+        return None
+    
+    def _refresh_alias(self, force: bool = False):
+        """
+        Deteksi pergantian alias oleh rebuild job di proses lain.
+        
+        Jika versi baru dibangun dengan embedding berbeda, service ini ikut
+        memakai embedding versi tersebut agar query vector cocok.
+        """
+        if not force and time.monotonic() - self._alias_checked_at < settings.qdrant_alias_refresh_seconds:
+            return
+        with self._state.lock:
+            # View lain mungkin sudah refresh selama menunggu lock
+            if not force and time.monotonic() - self._alias_checked_at < settings.qdrant_alias_refresh_seconds:
+                return
+            self._alias_checked_at = time.monotonic()
+            target = self._resolve_alias()
+            if target is None or target == self._alias_target:
+                return
+            self._switch_alias_target(target)
+    
+    def _switch_alias_target(self, target: str):
+        """Catat target alias baru dan ikuti embedding versi tersebut (dipanggil dengan lock state)."""
+        self._alias_target = target
+        self._kb_versions.clear()
+        meta = get_collection_meta(self.client, target) or {}
+        backend = meta.get("embedding_backend", "openai")
+        model = meta.get("embedding_model", self.embedding_model)
+        dimensions = int(meta.get("embedding_dimensions", self.embedding_dimensions))
+        if (backend, model, dimensions) != (self.embedding_backend, self.embedding_model, self.embedding_dimensions):
+            logger.info("Alias %s now points to %s; switching embeddings to %s/%s (%d dim)",
+                        self.collection_name, target, backend, model, dimensions)
+            self.embedding_backend = backend
+            self.embedding_model = model
+            self.embedding_dimensions = dimensions
+            self.embeddings = self._get_embeddings()
+            self._init_vectorstore()
+    
+    def _version_name(self, version: int) -> str:
+        """Nama collection fisik untuk versi tertentu."""
+        return f"{self.collection_name}{VERSION_SEPARATOR}{version}"
+    
+    def _next_version_name(self) -> str:
+        """Nama collection fisik untuk versi berikutnya."""
+        versions = self.list_versions()
+        next_version = int(versions[-1].rsplit(VERSION_SEPARATOR, 1)[1]) + 1 if versions else 1
+        return self._version_name(next_version)
+    
+    def _swap_alias(self, target: str):
+        """Arahkan alias ke collection target dalam satu operasi atomik."""
+        operations = []
+        if self._resolve_alias() is not None:
+            operations.append(models.DeleteAliasOperation(
+                delete_alias=models.DeleteAlias(alias_name=self.collection_name)
+            ))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=target, alias_name=self.collection_name)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
+    
+    def list_versions(self) -> List[str]:
+        """
+        Daftar collection fisik (versi) untuk alias ini, urut dari versi terlama.
+        
+        Returns:
+            List nama collection
+        """
+        pattern = re.compile(re.escape(self.collection_name + VERSION_SEPARATOR) + r"(\d+)$")
+        versions = []
+        for col in self.client.get_collections().collections:
+            match = pattern.match(col.name)
+            if match:
+                versions.append((int(match.group(1)), col.name))
+        return [name for _, name in sorted(versions)]
+    
+    def create_version(self,
+                       embedding_model: Optional[str] = None,
+                       embedding_dimensions: Optional[int] = None,
+                       chunk_size: Optional[int] = None,
+                       chunk_overlap: Optional[int] = None,
+                       embedding_backend: Optional[str] = None) -> "VectorService":
+        """
+        Buat versi collection baru untuk rebuild; alias tetap menunjuk versi lama.
+        
+        Args:
+            embedding_model: Model embedding versi baru (default: sama dengan sekarang)
+            embedding_dimensions: Dimensi embedding versi baru (default: sama dengan sekarang)
+            chunk_size: Ukuran chunk versi baru
+            chunk_overlap: Overlap chunk versi baru
+            embedding_backend: Backend embedding versi baru (default: sama dengan sekarang)
+            
+        Returns:
+            VectorService yang menulis langsung ke collection versi baru
+        """
+        return VectorService(
+            collection_name=self._next_version_name(),
+            embedding_backend=embedding_backend or self.embedding_backend,
+            embedding_model=embedding_model or self.embedding_model,
+            embedding_dimensions=embedding_dimensions or self.embedding_dimensions,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            use_alias=False
+        )
+    
+    def promote_version(self, version_name: str, legacy_cutover: bool = False) -> bool:
+        """
+        Tukar alias ke versi baru secara atomik.
+        
+        Collection lama tanpa alias (dibuat sebelum blue/green) harus dihapus
+        dulu karena alias tidak bisa memakai nama collection yang sudah ada.
+        Query gagal di antara delete dan pembuatan alias, jadi cut-over ini
+        hanya dilakukan jika legacy_cutover=True (jalankan di maintenance window).
+        
+        Args:
+            version_name: Nama collection versi baru
+            legacy_cutover: Izinkan cut-over collection tanpa alias
             
+        Returns:
+            True jika berhasil
+        """
+        try:
+            if self._resolve_alias() is None and self.client.collection_exists(self.collection_name):
+                if not legacy_cutover:
+                    logger.error(
+                        "Collection %s belum memakai alias; cut-over pertama menghapus collection lama "
+                        "sebelum alias dibuat sehingga query gagal sesaat. Jalankan di maintenance window "
+                        "dengan legacy_cutover=True (scripts.reindex --legacy-cutover).",
+                        self.collection_name
+                    )
+                    return False
+                self.client.delete_collection(self.collection_name)
+                delete_collection_meta(self.client, self.collection_name)
+            self._swap_alias(version_name)
+            self._refresh_alias(force=True)
+            return True
         except Exception as e:
-            print(f"Error ensuring collection exists: {str(e)}")
+            logger.error("Error promoting collection version: %s", e)
+            return False
+    
+    def gc_versions(self, keep: int = 1) -> List[str]:
+        """
+        Hapus versi lama yang tidak lagi ditunjuk alias.
+        
+        Args:
+            keep: Jumlah versi lama terbaru yang dipertahankan untuk rollback
+            
+        Returns:
+            List collection yang dihapus
+        """
+        try:
+            versions = self.list_versions()
+            active = self._resolve_alias()
+            # Hanya versi yang lebih lama dari versi aktif yang boleh dihapus;
+            # versi yang lebih baru bisa jadi sedang dibangun rebuild job lain.
+            old_versions = versions[:versions.index(active)] if active in versions else []
+            deleted = old_versions[:max(len(old_versions) - keep, 0)]
+            for name in deleted:
+                self.client.delete_collection(name)
+                delete_collection_meta(self.client, name)
+            return deleted
+        except Exception as e:
+            logger.error("Error garbage-collecting collection versions: %s", e)
+            return []
     
     def add_documents(self, documents: List[str], metadata_list: List[Dict] = None) -> bool:
         """
         Menambahkan dokumen ke vector store.
         
+        Point id diturunkan dari hash isi dokumen dan index chunk, sehingga
+        menambahkan dokumen yang sama dua kali tidak membuat duplikat.
+        
         Args:
             documents: List dokumen text
             metadata_list: List metadata untuk setiap dokumen
@@ -94,26 +541,546 @@ class VectorService:
             # Split documents
             all_chunks = []
             for i, doc_text in enumerate(documents):
-                chunks = self.text_splitter.split_text(doc_text)
-                for j, chunk in enumerate(chunks):
-                    metadata = metadata_list[i] if metadata_list and i < len(metadata_list) else {}
-                    metadata.update({
-                        'chunk_id': f"{i}_{j}",
-                        'doc_id': str(i),
-                        'chunk_index': j
-                    })
-                    all_chunks.append(Document(page_content=chunk, metadata=metadata))
-            
-            # Add to vectorstore
+                all_chunks.extend(self._split_document(
+                    doc_text, metadata_list[i] if metadata_list and i < len(metadata_list) else {}
+                ))
+            
             if self.vectorstore and all_chunks:
-                self.vectorstore.add_documents(all_chunks)
+                self._upsert_chunks(all_chunks)
                 return True
             return False
             
         except Exception as e:
-            print(f"Error adding documents: {str(e)}")
+            logger.error("Error adding documents: %s", e)
             return False
     
+    def _split_document(self, text: str, metadata: Dict) -> List[Document]:
+        """Split satu dokumen menjadi chunk dengan metadata doc_hash dan chunk_index."""
+        doc_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        chunks = []
+        for j, chunk in enumerate(self.text_splitter.split_text(text)):
+            chunk_metadata = dict(metadata)
+            if self.tenant_id is not None:
+                chunk_metadata['tenant_id'] = self.tenant_id
+            chunk_metadata.update({
+                'chunk_id': f"{doc_hash[:12]}_{j}",
+                'doc_id': doc_hash[:12],
+                'doc_hash': doc_hash,
+                'chunk_index': j
+            })
+            chunks.append(Document(page_content=chunk, metadata=chunk_metadata))
+        return chunks
+    
+    def _upsert_chunks(self, chunks: List[Document], batch_size: int = 128) -> int:
+        """
+        Embed dan upsert chunk dengan point id deterministik, plus satu point ringkasan per dokumen.
+        
+        Payload mengikuti layout QdrantVectorStore (page_content + metadata), dengan
+        page_content terkompresi jika settings.payload_compression='zstd'.
+        
+        Returns:
+            Jumlah point yang di-upsert (chunk + ringkasan)
+        """
+        # Akumulasi vector per dokumen (tenant, doc_hash) untuk point ringkasan;
+        # PDF yang sama di dua tenant harus punya ringkasan sendiri-sendiri
+        doc_sums: Dict[tuple, np.ndarray] = {}
+        doc_heads: Dict[tuple, Document] = {}
+        doc_counts: Dict[tuple, int] = {}
+        dict_id = self._ensure_compression_dict(chunks)
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+            for doc, vector in zip(batch, vectors):
+                doc_key = (doc.metadata.get('tenant_id'), doc.metadata['doc_hash'])
+                vector = np.asarray(vector, dtype=np.float32)
+                doc_sums[doc_key] = doc_sums[doc_key] + vector if doc_key in doc_sums else vector
+                doc_counts[doc_key] = doc_counts.get(doc_key, 0) + 1
+                if doc.metadata['chunk_index'] == 0 or doc_key not in doc_heads:
+                    doc_heads[doc_key] = doc
+            self.client.upsert(
+                self.collection_name,
+                points=[
+                    models.PointStruct(
+                        id=self._chunk_point_id(doc.metadata),
+                        vector=vector,
+                        payload=self._chunk_payload(doc, dict_id)
+                    )
+                    for doc, vector in zip(batch, vectors)
+                ],
+                wait=True
+            )
+        
+        summaries = [
+            self._summary_point(doc_heads[doc_key], doc_sums[doc_key], doc_counts[doc_key])
+            for doc_key in doc_sums
+        ]
+        if summaries:
+            self.client.upsert(self.collection_name, points=summaries, wait=True)
+        self._bump_revision()
+        return len(chunks) + len(summaries)
+    
+    def _summary_point(self, head: Document, vector_sum: np.ndarray, chunk_count: int) -> models.PointStruct:
+        """
+        Point ringkasan dokumen untuk tier pertama two-tier retrieval.
+        
+        Vector-nya adalah centroid (ternormalisasi) dari embedding semua chunk
+        dokumen, jadi tidak perlu embedding call tambahan saat ingest.
+        """
+        norm = float(np.linalg.norm(vector_sum))
+        vector = vector_sum / norm if norm else vector_sum
+        metadata = {
+            key: value for key, value in head.metadata.items()
+            if key not in ('chunk_id', 'chunk_index')
+        }
+        metadata.update({'kind': SUMMARY_KIND, 'chunk_count': chunk_count})
+        key = f"{metadata['doc_hash']}/{SUMMARY_KIND}"
+        if metadata.get('tenant_id') is not None:
+            key = f"{metadata['tenant_id']}/{key}"
+        return models.PointStruct(
+            id=str(uuid.uuid5(uuid.NAMESPACE_URL, key)),
+            vector=vector.tolist(),
+            payload={"page_content": head.page_content[:SUMMARY_PREVIEW_CHARS], "metadata": metadata}
+        )
+    
+    def _chunk_point_id(self, metadata: Dict) -> str:
+        """Point id deterministik dari tenant, hash dokumen dan index chunk."""
+        key = f"{metadata['doc_hash']}/{metadata['chunk_index']}"
+        if metadata.get('tenant_id') is not None:
+            key = f"{metadata['tenant_id']}/{key}"
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+    
+    def _chunk_payload(self, doc: Document, dict_id: Optional[int] = None) -> Dict[str, Any]:
+        """Payload chunk; page_content dikompres jika dict_id tidak None."""
+        if dict_id is None:
+            return {"page_content": doc.page_content, "metadata": doc.metadata}
+        payload = payload_codec.encode_content(
+            doc.page_content, level=settings.payload_compression_level, dict_id=dict_id
+        )
+        payload["metadata"] = doc.metadata
+        return payload
+    
+    def _ensure_compression_dict(self, chunks: List[Document]) -> Optional[int]:
+        """
+        Id dictionary zstd untuk write berikutnya, None jika kompresi tidak aktif.
+        
+        Jika collection belum punya dictionary, dictionary dilatih dari chunk yang
+        akan di-upsert (minimal settings.payload_dict_min_samples chunk) lalu
+        dicatat di metadata collection. Sebelum itu chunk dikompres tanpa
+        dictionary (id 0).
+        """
+        if settings.payload_compression != "zstd":
+            return None
+        if self._compression_dict_id is None:
+            meta = get_collection_meta(self.client, self.collection_name) or {}
+            self._compression_dict_id = meta.get("compression_dict_id")
+        if self._compression_dict_id is None and len(chunks) >= settings.payload_dict_min_samples:
+            self.train_compression_dict([doc.page_content for doc in chunks])
+        dict_id = self._compression_dict_id or 0
+        if dict_id and not payload_codec.has_dictionary(dict_id):
+            payload_codec.register_dictionary(dict_id, get_compression_dict(self.client, dict_id))
+        return dict_id
+    
+    def train_compression_dict(self, samples: List[str]) -> Optional[int]:
+        """
+        Latih dictionary zstd dari sample chunk dan pakai untuk write berikutnya.
+        
+        Payload lama tetap bisa dibaca karena setiap payload menyimpan id dictionary-nya.
+        
+        Args:
+            samples: Sample chunk text
+            
+        Returns:
+            Id dictionary, None jika training gagal
+        """
+        trained = payload_codec.train_dictionary(samples, settings.payload_dict_size)
+        if trained is None:
+            return None
+        dict_id, data = trained
+        set_compression_dict(self.client, dict_id, data)
+        payload_codec.register_dictionary(dict_id, data)
+        meta = get_collection_meta(self.client, self.collection_name) or self._embedding_meta()
+        meta["compression_dict_id"] = dict_id
+        set_collection_meta(self.client, self.collection_name, meta)
+        self._compression_dict_id = dict_id
+        logger.info("compression_dict_trained", extra={
+            "collection": self.collection_name, "dict_id": dict_id,
+            "samples": len(samples), "dict_bytes": len(data),
+        })
+        return dict_id
+    
+    def _decode_content(self, payload: Dict[str, Any]) -> str:
+        """page_content dari payload, didekompresi jika perlu."""
+        return payload_codec.decode_content(payload, lambda dict_id: get_compression_dict(self.client, dict_id))
+    
+    def _search_payload(self, fields: Optional[List[str]] = None) -> models.PayloadSelectorInclude:
+        """Payload selector untuk search: hanya field yang dipakai caller (plus versi terkompresi)."""
+        fields = list(fields or settings.search_payload_fields)
+        if payload_codec.CONTENT_KEY in fields:
+            fields += [payload_codec.COMPRESSED_CONTENT_KEY, payload_codec.DICT_ID_KEY]
+        return models.PayloadSelectorInclude(include=fields)
+    
+    def compress_existing_payloads(self, batch_size: int = 256) -> int:
+        """
+        Kompres page_content chunk yang masih tersimpan tanpa kompresi.
+        
+        Dictionary dilatih dari chunk yang ada jika collection belum punya.
+        Point ringkasan dokumen tidak dikompres (preview pendek).
+        
+        Args:
+            batch_size: Jumlah point per scroll dan update request
+            
+        Returns:
+            Jumlah point yang dikompres, -1 jika error
+        """
+        try:
+            uncompressed = models.Filter(
+                must_not=[
+                    models.IsEmptyCondition(is_empty=models.PayloadField(key=payload_codec.CONTENT_KEY)),
+                    models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND)),
+                ]
+            )
+            points, _ = self.client.scroll(
+                self.collection_name, scroll_filter=uncompressed,
+                limit=max(settings.payload_dict_min_samples * 4, 1000),
+                with_payload=[payload_codec.CONTENT_KEY], with_vectors=False
+            )
+            if not points:
+                return 0
+            samples = [Document(page_content=point.payload[payload_codec.CONTENT_KEY]) for point in points]
+            dict_id = self._ensure_compression_dict(samples)
+            if dict_id is None:
+                dict_id = self.train_compression_dict([doc.page_content for doc in samples]) or 0
+            
+            compressed = 0
+            while True:
+                # Point yang sudah dikompres tidak lagi cocok dengan filter, jadi selalu scroll dari awal
+                points, _ = self.client.scroll(
+                    self.collection_name, scroll_filter=uncompressed, limit=batch_size,
+                    with_payload=[payload_codec.CONTENT_KEY], with_vectors=False
+                )
+                if not points:
+                    break
+                operations = []
+                for point in points:
+                    encoded = payload_codec.encode_content(
+                        point.payload[payload_codec.CONTENT_KEY],
+                        level=settings.payload_compression_level, dict_id=dict_id
+                    )
+                    operations.append(models.SetPayloadOperation(
+                        set_payload=models.SetPayload(payload=encoded, points=[point.id])
+                    ))
+                operations.append(models.DeletePayloadOperation(
+                    delete_payload=models.DeletePayload(
+                        keys=[payload_codec.CONTENT_KEY], points=[point.id for point in points]
+                    )
+                ))
+                self.client.batch_update_points(self.collection_name, update_operations=operations, wait=True)
+                compressed += len(points)
+            logger.info("payloads_compressed", extra={
+                "collection": self.collection_name, "points": compressed, "dict_id": dict_id,
+            })
+            return compressed
+        except Exception as e:
+            logger.error("Error compressing payloads: %s", e)
+            return -1
+    
+    def backfill_document_summaries(self, batch_size: int = 256) -> int:
+        """
+        Buat point ringkasan untuk dokumen yang belum punya (collection lama).
+        
+        Chunk tanpa doc_hash dikelompokkan dengan legacy_doc_hash dan diberi
+        doc_hash tersebut. Vector ringkasan adalah centroid vector chunk yang
+        sudah tersimpan, jadi tidak ada embedding call. Setelah selesai
+        collection ditandai lengkap sehingga two-tier retrieval aktif.
+        
+        Args:
+            batch_size: Jumlah point per scroll request
+            
+        Returns:
+            Jumlah point ringkasan yang dibuat, -1 jika error
+        """
+        try:
+            summarized = set()
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    self.collection_name, scroll_filter=models.Filter(must=[
+                        models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))
+                    ]),
+                    limit=batch_size, offset=offset,
+                    with_payload=["metadata.tenant_id", "metadata.doc_hash"], with_vectors=False
+                )
+                for point in points:
+                    metadata = (point.payload or {}).get("metadata") or {}
+                    summarized.add((metadata.get("tenant_id"), metadata.get("doc_hash")))
+                if offset is None:
+                    break
+            
+            doc_sums: Dict[tuple, np.ndarray] = {}
+            doc_heads: Dict[tuple, Document] = {}
+            doc_counts: Dict[tuple, int] = {}
+            legacy_points: Dict[tuple, List[Any]] = {}
+            offset = None
+            while True:
+                points, offset = self.client.scroll(
+                    self.collection_name, scroll_filter=models.Filter(must_not=[
+                        models.FieldCondition(key=KIND_FIELD, match=models.MatchValue(value=SUMMARY_KIND))
+                    ]),
+                    limit=batch_size, offset=offset, with_payload=True, with_vectors=True
+                )
+                for point in points:
+                    payload = point.payload or {}
+                    metadata = dict(payload.get("metadata") or {})
+                    if metadata.get("doc_hash") is None:
+                        metadata["doc_hash"] = legacy_doc_hash(metadata)
+                        legacy_points.setdefault((metadata.get("tenant_id"), metadata["doc_hash"]), []).append(point.id)
+                    doc_key = (metadata.get("tenant_id"), metadata["doc_hash"])
+                    if doc_key in summarized:
+                        continue
+                    vector = np.asarray(point.vector, dtype=np.float32)
+                    doc_sums[doc_key] = doc_sums[doc_key] + vector if doc_key in doc_sums else vector
+                    doc_counts[doc_key] = doc_counts.get(doc_key, 0) + 1
+                    head = doc_heads.get(doc_key)
+                    if head is None or metadata.get("chunk_index", 0) < head.metadata.get("chunk_index", 0):
+                        # Preview ringkasan hanya butuh awal dokumen
+                        doc_heads[doc_key] = Document(page_content=self._decode_content(payload), metadata=metadata)
+                if offset is None:
+                    break
+            
+            # doc_hash chunk lama ditulis setelah scroll agar tidak menggeser hasil scroll
+            for (_, doc_hash), point_ids in legacy_points.items():
+                self.client.set_payload(
+                    self.collection_name, payload={"doc_hash": doc_hash},
+                    points=point_ids, key="metadata", wait=True
+                )
+            summaries = [
+                self._summary_point(doc_heads[doc_key], doc_sums[doc_key], doc_counts[doc_key])
+                for doc_key in doc_sums
+            ]
+            for start in range(0, len(summaries), batch_size):
+                self.client.upsert(self.collection_name, points=summaries[start:start + batch_size], wait=True)
+            
+            meta = get_collection_meta(self.client, self.collection_name) or self._embedding_meta()
+            meta["document_summaries"] = True
+            set_collection_meta(self.client, self.collection_name, meta)
+            self._bump_revision(all_tenants=True)
+            logger.info("document_summaries_backfilled", extra={
+                "collection": self.collection_name, "summaries": len(summaries),
+                "legacy_documents": len(legacy_points),
+            })
+            return len(summaries)
+        except Exception as e:
+            logger.error("Error backfilling document summaries: %s", e)
+            return -1
+    
+    def backfill_default_tenant(self) -> int:
+        """
+        Beri tenant default pada point tanpa tenant_id.
+        
+        Point dari sebelum multitenancy aktif tidak punya tenant_id; sampai
+        backfill ini dijalankan, filter tenant default masih mencocokkan point
+        tanpa tenant_id. Payload lain dan vector tidak diubah.
+        
+        Returns:
+            Jumlah point yang diberi tenant, -1 jika gagal
+        """
+        try:
+            legacy_filter = models.Filter(must=[
+                models.IsEmptyCondition(is_empty=models.PayloadField(key=TENANT_FIELD))
+            ])
+            count = self._count(legacy_filter)
+            if count:
+                self.client.set_payload(
+                    self.collection_name,
+                    payload={"tenant_id": settings.qdrant_default_tenant},
+                    points=models.FilterSelector(filter=legacy_filter),
+                    key="metadata",
+                    wait=True
+                )
+                self._bump_revision()
+            logger.info("default_tenant_backfilled", extra={
+                "collection": self.collection_name, "tenant": settings.qdrant_default_tenant, "points": count,
+            })
+            return count
+        except Exception as e:
+            logger.error("Error backfilling default tenant: %s", e)
+            return -1
+    
+    def _ensure_payload_indexes(self, name: str):
+        """
+        Payload index untuk filter tenant dan per dokumen (delete/replace).
+        
+        Hanya index yang belum ada di payload_schema collection yang dibuat,
+        jadi collection yang sudah lengkap cukup dicek dengan satu request.
+        
+        Args:
+            name: Nama collection fisik
+        """
+        existing = self.client.get_collection(name).payload_schema or {}
+        indexes = {
+            # is_tenant: Qdrant menyimpan point per tenant berdekatan di storage
+            TENANT_FIELD: models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True),
+            "metadata.filename": models.PayloadSchemaType.KEYWORD,
+            "metadata.doc_hash": models.PayloadSchemaType.KEYWORD,
+            KIND_FIELD: models.PayloadSchemaType.KEYWORD,
+        }
+        for field, schema in indexes.items():
+            if field not in existing:
+                self.client.create_payload_index(name, field_name=field, field_schema=schema, wait=True)
+    
+    def _document_filter(self, filename: Optional[str] = None, doc_hash: Optional[str] = None) -> models.Filter:
+        """
+        Filter point milik satu dokumen (dalam tenant aktif).
+        
+        Tanpa tenant, hanya point tanpa tenant_id yang cocok, sehingga write
+        tanpa scope tidak mengganti atau menghapus dokumen milik tenant.
+        """
+        conditions = []
+        if filename is not None:
+            conditions.append(models.FieldCondition(
+                key="metadata.filename", match=models.MatchValue(value=filename)
+            ))
+        if doc_hash is not None:
+            conditions.append(models.FieldCondition(
+                key="metadata.doc_hash", match=models.MatchValue(value=doc_hash)
+            ))
+        if not conditions:
+            raise ValueError("filename atau doc_hash harus diisi")
+        tenant_filter = self._tenant_filter()
+        if tenant_filter is not None:
+            conditions.extend(tenant_filter.must)
+        else:
+            conditions.append(models.IsEmptyCondition(is_empty=models.PayloadField(key=TENANT_FIELD)))
+        return models.Filter(must=conditions)
+    
+    def _revision_scopes(self) -> List[str]:
+        """Scope revision yang memengaruhi hasil search view ini (lihat _tenant_filter)."""
+        if self.tenant_id is None:
+            return [ANY_SCOPE]
+        if self.tenant_id == settings.qdrant_default_tenant:
+            return [self.tenant_id, "", GLOBAL_SCOPE]
+        return [self.tenant_id, GLOBAL_SCOPE]
+    
+    def _bump_revision(self, all_tenants: bool = False):
+        """
+        Tandai knowledge base tenant aktif berubah setelah write (precomputed answers jadi usang).
+        
+        Args:
+            all_tenants: Write menyentuh data semua tenant (job maintenance tanpa scope)
+        """
+        scope = GLOBAL_SCOPE if all_tenants else (self.tenant_id or "")
+        bump_revisions(self.client, self.collection_name, [scope])
+        self._kb_versions.clear()
+    
+    def kb_version(self, refresh: bool = False) -> str:
+        """
+        Versi knowledge base tenant aktif: collection fisik di belakang alias dan revision-nya.
+        
+        Berubah setiap kali dokumen tenant ini ditambah, diganti atau dihapus,
+        dan setiap kali alias pindah ke versi baru; write tenant lain tidak
+        mengubahnya. Tanpa tenant, setiap write mengubahnya. Di-cache selama
+        settings.qdrant_alias_refresh_seconds kecuali refresh=True.
+        
+        Args:
+            refresh: Baca ulang dari registry
+            
+        Returns:
+            String versi, misalnya "marketing_embeddings__v2@18c2f0a1b3e4d5f6-9a8b7c6d"
+        """
+        now = time.monotonic()
+        cached = self._kb_versions.get(self.tenant_id)
+        if refresh or cached is None or now - cached[1] >= settings.qdrant_alias_refresh_seconds:
+            physical = self._resolve_alias() or self.collection_name
+            meta = get_collection_meta(self.client, physical) or {}
+            revisions = get_revisions(self.client, physical, self._revision_scopes())
+            cached = (f"{physical}@{'.'.join(revisions.values())}", now)
+            self._kb_versions[self.tenant_id] = cached
+            self._document_summaries = bool(meta.get("document_summaries"))
+        return cached[0]
+    
+    def has_document_summaries(self) -> bool:
+        """
+        Apakah setiap dokumen di collection aktif punya point ringkasan.
+        
+        Collection yang dibuat sebelum ada ringkasan baru lengkap setelah
+        backfill_document_summaries dijalankan. Di-cache bersama kb_version.
+        """
+        self.kb_version()
+        return self._document_summaries
+    
+    def _count(self, points_filter: models.Filter) -> int:
+        """Jumlah point yang cocok dengan filter."""
+        return self.client.count(self.collection_name, count_filter=points_filter, exact=True).count
+    
+    def delete_document(self, filename: Optional[str] = None, doc_hash: Optional[str] = None) -> int:
+        """
+        Hapus semua chunk milik satu dokumen tanpa menyentuh dokumen lain.
+        
+        Args:
+            filename: Nama file dokumen
+            doc_hash: Hash isi dokumen (metadata doc_hash)
+            
+        Returns:
+            Jumlah point yang dihapus, -1 jika gagal
+        """
+        try:
+            points_filter = self._document_filter(filename, doc_hash)
+            deleted = self._count(points_filter)
+            if deleted:
+                self.client.delete(
+                    self.collection_name,
+                    points_selector=models.FilterSelector(filter=points_filter),
+                    wait=True
+                )
+                self._bump_revision()
+            return deleted
+        except Exception as e:
+            logger.error("Error deleting document: %s", e)
+            return -1
+    
+    def replace_document(self, text: str, metadata: Dict) -> Dict[str, int]:
+        """
+        Ganti isi dokumen (berdasarkan metadata filename) hanya dengan menyentuh chunk-nya sendiri.
+        
+        Chunk baru di-upsert dulu, baru chunk versi lama dihapus, sehingga
+        dokumen tidak pernah hilang dari hasil search. Jika isi tidak berubah,
+        tidak ada embedding call.
+        
+        Args:
+            text: Isi dokumen baru
+            metadata: Metadata dokumen, wajib berisi 'filename'
+            
+        Returns:
+            Dict jumlah point 'added', 'deleted' dan 'unchanged'; dict kosong jika gagal
+        """
+        try:
+            filename = metadata["filename"]
+            doc_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            
+            unchanged = self._count(self._document_filter(filename, doc_hash))
+            if unchanged:
+                return {"added": 0, "deleted": 0, "unchanged": unchanged}
+            
+            added = self._upsert_chunks(self._split_document(text, metadata))
+            stale_filter = models.Filter(
+                must=self._document_filter(filename=filename).must,
+                must_not=[models.FieldCondition(
+                    key="metadata.doc_hash", match=models.MatchValue(value=doc_hash)
+                )]
+            )
+            deleted = self._count(stale_filter)
+            if deleted:
+                self.client.delete(
+                    self.collection_name,
+                    points_selector=models.FilterSelector(filter=stale_filter),
+                    wait=True
+                )
+                self._bump_revision()
+            return {"added": added, "deleted": deleted, "unchanged": 0}
+        except Exception as e:
+            logger.error("Error replacing document: %s", e)
+            return {}
+    
     def similarity_search(self, query: str, k: int = 3) -> List[Document]:
         """
         Melakukan similarity search.
@@ -127,12 +1094,229 @@ class VectorService:
         """
         try:
             if self.vectorstore:
-                return self.vectorstore.similarity_search(query, k=k)
+                self._refresh_alias()
+                key = (self.collection_name, self.tenant_id, query, k)
+                docs = _search_flight.do(key, self._similarity_search, query, k)
+                # Hasil dibagi ke semua pemanggil single-flight; beri masing-masing salinan sendiri
+                return [Document(page_content=doc.page_content, metadata=dict(doc.metadata)) for doc in docs]
             return []
         except Exception as e:
-            print(f"Error in similarity search: {str(e)}")
+            logger.error("Error in similarity search: %s", e)
             return []
     
+    def _similarity_search(self, query: str, k: int) -> List[Document]:
+        """Embed query lalu search lewat alias/collection."""
+        start = time.perf_counter()
+        vector = self.embeddings.embed_query(query)
+        embedded = time.perf_counter()
+        docs = self._search_vectors_batch([vector], k=k)[0]
+        logger.debug("similarity_search", extra={
+            "collection": self.collection_name,
+            "tenant_id": self.tenant_id,
+            "k": k,
+            "embed_ms": round((embedded - start) * 1000, 1),
+            "search_ms": round((time.perf_counter() - embedded) * 1000, 1),
+        })
+        return docs
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 3,
+                                batch_size: int = 64) -> List[List[Document]]:
+        """
+        Similarity search untuk banyak query sekaligus.
+        
+        Semua query di-embed dalam satu batched embedding call, lalu search
+        dikirim ke Qdrant sebagai batch request.
+        
+        Args:
+            queries: List query
+            k: Jumlah dokumen per query
+            batch_size: Jumlah search per Qdrant batch request
+            
+        Returns:
+            List hasil search, urutannya sama dengan queries
+            
+        Raises:
+            Exception: Error embedding atau Qdrant diteruskan agar batch job tidak
+                menjawab tanpa konteks
+        """
+        if not queries:
+            return []
+        self._refresh_alias()
+        vectors = self.embeddings.embed_documents(queries)
+        return self._search_vectors_batch(vectors, k=k, batch_size=batch_size)
+    
+    def multi_query_search(self, queries: List[str], k: int = 3, rrf_k: int = 60,
+                           two_tier: bool = False) -> List[Document]:
+        """
+        Multi-query retrieval: beberapa variasi query dalam satu Qdrant batch request.
+        
+        Hasil setiap query digabung dengan Reciprocal Rank Fusion dan
+        di-deduplikasi berdasarkan point id.
+        
+        Args:
+            queries: Variasi query (query asli sebaiknya di posisi pertama)
+            k: Jumlah dokumen yang dikembalikan
+            rrf_k: Konstanta Reciprocal Rank Fusion
+            two_tier: Cari setiap variasi dengan two-tier retrieval (lihat two_tier_search)
+            
+        Returns:
+            List dokumen hasil fusion
+        """
+        try:
+            if not queries:
+                return []
+            if len(queries) == 1:
+                if two_tier:
+                    return self.two_tier_search(queries[0], k=k)
+                return self.similarity_search(queries[0], k=k)
+            return self.multi_query_search_batch([queries], k=k, rrf_k=rrf_k, two_tier=two_tier)[0]
+        except Exception as e:
+            logger.error("Error in multi-query search: %s", e)
+            return []
+    
+    def multi_query_search_batch(self, query_variants: List[List[str]], k: int = 3, rrf_k: int = 60,
+                                 two_tier: bool = False) -> List[List[Document]]:
+        """
+        Multi-query retrieval untuk banyak pertanyaan; semua variasi dicari dalam satu batch.
+        
+        Args:
+            query_variants: Variasi query per pertanyaan
+            k: Jumlah dokumen per pertanyaan
+            rrf_k: Konstanta Reciprocal Rank Fusion
+            two_tier: Cari variasi dengan two-tier retrieval (lihat two_tier_search_batch)
+            
+        Returns:
+            List dokumen hasil fusion, urutannya sama dengan query_variants
+            
+        Raises:
+            Exception: Error embedding atau Qdrant diteruskan (lihat similarity_search_batch)
+        """
+        flat = [query for variants in query_variants for query in variants]
+        search_batch = self.two_tier_search_batch if two_tier else self.similarity_search_batch
+        results = iter(search_batch(flat, k=k))
+        
+        fused = []
+        for variants in query_variants:
+            scores: Dict[Any, float] = {}
+            documents: Dict[Any, Document] = {}
+            for _ in variants:
+                for rank, doc in enumerate(next(results)):
+                    point_id = doc.metadata.get("_id")
+                    scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (rrf_k + rank + 1)
+                    documents.setdefault(point_id, doc)
+            ranked = sorted(scores, key=scores.get, reverse=True)
+            fused.append([documents[point_id] for point_id in ranked[:k]])
+        return fused
+    
+    def two_tier_search(self, query: str, k: int = 3, top_documents: Optional[int] = None) -> List[Document]:
+        """
+        Two-tier retrieval: cari dokumen teratas lewat point ringkasan, lalu cari
+        chunk hanya di dalam dokumen tersebut.
+        
+        Biaya search chunk dibatasi oleh jumlah dokumen terpilih, bukan ukuran
+        corpus. Selama belum semua dokumen punya point ringkasan (collection lama
+        sebelum backfill_document_summaries), fallback ke flat search agar dokumen
+        lama tetap bisa ditemukan.
+        
+        Args:
+            query: Query untuk search
+            k: Jumlah chunk yang dikembalikan
+            top_documents: Jumlah dokumen di tier pertama (default: settings.two_tier_top_documents)
+            
+        Returns:
+            List chunk yang relevan
+        """
+        try:
+            return self.two_tier_search_batch([query], k=k, top_documents=top_documents)[0]
+        except Exception as e:
+            logger.error("Error in two-tier search: %s", e)
+            return []
+    
+    def two_tier_search_batch(self, queries: List[str], k: int = 3,
+                              top_documents: Optional[int] = None) -> List[List[Document]]:
+        """
+        Two-tier retrieval untuk banyak query; setiap tier dikirim sebagai satu Qdrant batch request.
+        
+        Args:
+            queries: List query
+            k: Jumlah chunk per query
+            top_documents: Jumlah dokumen di tier pertama (default: settings.two_tier_top_documents)
+            
+        Returns:
+            List hasil search, urutannya sama dengan queries
+            
+        Raises:
+            Exception: Error embedding atau Qdrant diteruskan (lihat similarity_search_batch)
+        """
+        if not queries:
+            return []
+        self._refresh_alias()
+        if not self.has_document_summaries():
+            return self.similarity_search_batch(queries, k=k)
+        start = time.perf_counter()
+        vectors = self.embeddings.embed_documents(queries)
+        embedded = time.perf_counter()
+        
+        summary_filter = self._summary_filter()
+        responses = self.client.query_batch_points(self.collection_name, requests=[
+            models.QueryRequest(
+                query=vector, filter=summary_filter,
+                limit=top_documents or settings.two_tier_top_documents,
+                with_payload=models.PayloadSelectorInclude(include=["metadata.doc_hash"])
+            )
+            for vector in vectors
+        ])
+        doc_hashes = [
+            [(point.payload or {}).get("metadata", {}).get("doc_hash") for point in response.points]
+            for response in responses
+        ]
+        
+        requests = [
+            models.QueryRequest(
+                query=vector,
+                filter=self._chunk_filter(hashes) if hashes else self._chunk_filter(),
+                limit=k, with_payload=self._search_payload()
+            )
+            for vector, hashes in zip(vectors, doc_hashes)
+        ]
+        responses = self.client.query_batch_points(self.collection_name, requests=requests)
+        results = [self._points_to_documents(response.points) for response in responses]
+        logger.debug("two_tier_search", extra={
+            "collection": self.collection_name,
+            "tenant_id": self.tenant_id,
+            "queries": len(queries),
+            "documents": [len(hashes) for hashes in doc_hashes],
+            "embed_ms": round((embedded - start) * 1000, 1),
+            "search_ms": round((time.perf_counter() - embedded) * 1000, 1),
+        })
+        return results
+    
+    def _search_vectors_batch(self, vectors: List[List[float]], k: int = 3,
+                              batch_size: int = 64) -> List[List[Document]]:
+        """Kirim search untuk list vector sebagai Qdrant batch request."""
+        results = []
+        chunk_filter = self._chunk_filter()
+        payload = self._search_payload()
+        for start in range(0, len(vectors), batch_size):
+            requests = [
+                models.QueryRequest(query=vector, filter=chunk_filter, limit=k, with_payload=payload)
+                for vector in vectors[start:start + batch_size]
+            ]
+            responses = self.client.query_batch_points(self.collection_name, requests=requests)
+            results.extend(self._points_to_documents(response.points) for response in responses)
+        return results
+    
+    def _points_to_documents(self, points) -> List[Document]:
+        """Konversi Qdrant points ke LangChain Document (layout payload QdrantVectorStore)."""
+        documents = []
+        for point in points:
+            payload = point.payload or {}
+            metadata = dict(payload.get("metadata") or {})
+            metadata["_id"] = point.id
+            metadata["_collection_name"] = self.collection_name
+            documents.append(Document(page_content=self._decode_content(payload), metadata=metadata))
+        return documents
+    
     def similarity_search_with_score(self, query: str, k: int = 3) -> List[tuple]:
         """
         Melakukan similarity search dengan score.
@@ -146,10 +1330,19 @@ class VectorService:
         """
         try:
             if self.vectorstore:
-                return self.vectorstore.similarity_search_with_score(query, k=k)
+                self._refresh_alias()
+                response = self.client.query_points(
+                    self.collection_name,
+                    query=self.embeddings.embed_query(query),
+                    query_filter=self._chunk_filter(),
+                    limit=k,
+                    with_payload=self._search_payload()
+                )
+                documents = self._points_to_documents(response.points)
+                return [(doc, point.score) for doc, point in zip(documents, response.points)]
             return []
         except Exception as e:
-            print(f"Error in similarity search with score: {str(e)}")
+            logger.error("Error in similarity search with score: %s", e)
             return []
     
     def get_retriever(self, search_type: str = "similarity", search_kwargs: Dict = None):
@@ -165,30 +1358,113 @@ class VectorService:
         """
         try:
             if self.vectorstore:
-                search_kwargs = search_kwargs or {"k": 3}
+                search_kwargs = dict(search_kwargs or {"k": 3})
+                if search_type == "similarity":
+                    # Lewat jalur search sendiri agar payload terkompresi ikut didekompresi
+                    return VectorServiceRetriever(vector_service=self, k=search_kwargs.get("k", 3))
+                search_kwargs.setdefault("filter", self._chunk_filter())
                 return self.vectorstore.as_retriever(
                     search_type=search_type,
                     search_kwargs=search_kwargs
                 )
             return None
         except Exception as e:
-            print(f"Error getting retriever: {str(e)}")
+            logger.error("Error getting retriever: %s", e)
             return None
     
     def delete_collection(self) -> bool:
         """
-        Hapus collection.
+        Hapus collection (atau alias beserta semua versinya).
         
         Returns:
             True jika berhasil, False jika gagal
         """
         try:
-            self.client.delete_collection(self.collection_name)
+            if self._resolve_alias() is not None:
+                # Hapus alias beserta semua versi di belakangnya
+                self.client.update_collection_aliases(change_aliases_operations=[
+                    models.DeleteAliasOperation(
+                        delete_alias=models.DeleteAlias(alias_name=self.collection_name)
+                    )
+                ])
+                for name in self.list_versions():
+                    self.client.delete_collection(name)
+                    delete_collection_meta(self.client, name)
+            else:
+                self.client.delete_collection(self.collection_name)
+                delete_collection_meta(self.client, self.collection_name)
             return True
         except Exception as e:
-            print(f"Error deleting collection: {str(e)}")
+            logger.error("Error deleting collection: %s", e)
             return False
     
+    def export_snapshot(self, path: str) -> Dict[str, Any]:
+        """
+        Export vectors, payloads dan ids collection ke direktori lokal.
+        
+        Args:
+            path: Direktori snapshot
+            
+        Returns:
+            Manifest snapshot, dict kosong jika gagal
+        """
+        try:
+            return export_collection(self.client, self.collection_name, path)
+        except Exception as e:
+            logger.error("Error exporting snapshot: %s", e)
+            return {}
+    
+    def import_snapshot(self, path: str, recreate: bool = False, legacy_cutover: bool = False) -> int:
+        """
+        Import snapshot lokal ke collection dengan bulk upload (tanpa embedding call).
+        
+        Collection tujuan dibuat dengan _create_physical_collection (HNSW,
+        payload index dan metadata registry sama seperti collection lain). Dengan
+        recreate pada collection ber-alias, snapshot di-import ke versi baru lalu
+        alias ditukar, sehingga query tidak pernah melihat collection kosong.
+        
+        Args:
+            path: Direktori snapshot
+            recreate: Buat ulang collection sebelum import
+            legacy_cutover: Izinkan cut-over collection tanpa alias (lihat promote_version)
+            
+        Returns:
+            Jumlah point yang di-import, -1 jika gagal
+        """
+        try:
+            manifest = read_manifest(path)
+            if manifest["distance"] != models.Distance.COSINE.value:
+                raise ValueError(f"Snapshot distance {manifest['distance']} tidak didukung, hanya Cosine")
+            # Snapshot tanpa metadata: belum tentu punya point ringkasan dokumen
+            snapshot_meta = manifest.get("collection_meta") or self._embedding_meta()
+            alias_target = self._resolve_alias()
+            if recreate and (self.use_alias or alias_target is not None):
+                version_name = self._next_version_name()
+                self._create_physical_collection(version_name, manifest["vector_size"], snapshot_meta)
+                count = import_collection(self.client, version_name, path)
+                if not self.promote_version(version_name, legacy_cutover=legacy_cutover):
+                    raise RuntimeError(f"Snapshot di-import ke {version_name} tetapi alias tidak ditukar")
+                self.gc_versions(keep=1)
+            else:
+                target = alias_target or self.collection_name
+                if recreate and self.client.collection_exists(target):
+                    self.client.delete_collection(target)
+                    delete_collection_meta(self.client, target)
+                if not self.client.collection_exists(target):
+                    self._create_physical_collection(target, manifest["vector_size"], snapshot_meta)
+                elif not snapshot_meta.get("document_summaries"):
+                    # Dokumen dari snapshot tidak punya ringkasan; two-tier fallback ke flat search
+                    meta = get_collection_meta(self.client, target) or self._embedding_meta()
+                    meta["document_summaries"] = False
+                    set_collection_meta(self.client, target, meta)
+                count = import_collection(self.client, target, path)
+            self._ensure_collection_exists()
+            self._bump_revision(all_tenants=True)
+            return count
+        except Exception as e:
+            logger.error("Error importing snapshot: %s", e)
+            return -1
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """
         Get informasi collection.
@@ -198,29 +1474,56 @@ class VectorService:
         """
         try:
             info = self.client.get_collection(self.collection_name)
-            return {
+            result = {
                 "name": info.config.params.vectors.size if info.config else 0,
                 "vectors_count": info.points_count if hasattr(info, 'points_count') else 0,
-                "status": info.status if hasattr(info, 'status') else 'unknown'
+                "status": info.status if hasattr(info, 'status') else 'unknown',
+                "embedding": get_collection_meta(self.client, self.collection_name) or {}
             }
+            if self.tenant_id is not None:
+                result["tenant_id"] = self.tenant_id
+                result["tenant_vectors_count"] = self.client.count(
+                    self.collection_name, count_filter=self._tenant_filter(), exact=True
+                ).count
+            return result
         except Exception as e:
-            print(f"Error getting collection info: {str(e)}")
+            logger.error("Error getting collection info: %s", e)
             return {}
     
-    def upsert_documents_from_pdf(self, text: str, metadata: Dict = None) -> bool:
+    def upsert_documents_from_pdf(self, text: str, metadata: Dict = None, profile: bool = False) -> bool:
         """
         Upsert dokumen dari PDF text.
         
+        Jika metadata berisi 'filename', chunk versi lama dokumen tersebut diganti.
+        
         Args:
             text: Text dari PDF
             metadata: Metadata dokumen
+            profile: Tulis profile ingestion ke settings.profiling_dir
             
         Returns:
             True jika berhasil
         """
         try:
             metadata = metadata or {}
-            return self.add_documents([text], [metadata])
+            with profile_request("ingest", enabled=profile):
+                if metadata.get("filename"):
+                    # Dokumen dengan nama yang sama diganti, bukan diduplikasi
+                    result = self.replace_document(text, metadata)
+                    if result:
+                        logger.info("document_upserted", extra={"document": metadata["filename"], **result})
+                    return bool(result)
+                return self.add_documents([text], [metadata])
         except Exception as e:
-            print(f"Error upserting PDF documents: {str(e)}")
+            logger.error("Error upserting PDF documents: %s", e)
             return False
+
+
+class VectorServiceRetriever(BaseRetriever):
+    """LangChain retriever di atas VectorService.similarity_search."""
+    
+    vector_service: Any
+    k: int = 3
+    
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.vector_service.similarity_search(query, k=self.k)
@@ -0,0 +1,31 @@
+"""
+Fixture bersama: Qdrant in-memory dan embedding hashing (tanpa server dan API key).
+"""
+import pytest
+from qdrant_client import QdrantClient
+
+from config import settings
+from services import vector_service
+from services.vector_service import VectorService
+
+
+@pytest.fixture
+def qdrant(monkeypatch):
+    """QdrantClient in-memory yang dipakai semua VectorService selama test."""
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(vector_service, "_shared_client", client)
+    monkeypatch.setattr(settings, "embedding_backend", "hashing")
+    monkeypatch.setattr(settings, "embedding_dimensions", 64)
+    monkeypatch.setattr(settings, "collection_embedding_overrides", {})
+    monkeypatch.setattr(settings, "qdrant_multitenancy", False)
+    monkeypatch.setattr(settings, "payload_compression", "none")
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def make_service(qdrant):
+    """Factory VectorService di atas Qdrant in-memory."""
+    def factory(collection_name="kb", **kwargs):
+        return VectorService(collection_name=collection_name, **kwargs)
+    return factory
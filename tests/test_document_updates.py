@@ -0,0 +1,91 @@
+"""
+Tests untuk delete dan replace per dokumen di VectorService.
+"""
+import pytest
+from qdrant_client.http import models
+
+
+DOC_A = "Promo paket internet rumah untuk keluarga dengan kuota besar. " * 30
+DOC_B = "Laporan kampanye media sosial dan engagement pelanggan muda. " * 30
+
+
+def filenames(service, query, k=10):
+    return sorted({doc.metadata["filename"] for doc in service.similarity_search(query, k=k)})
+
+
+@pytest.fixture
+def service(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    service.add_documents([DOC_A, DOC_B], [{"filename": "a.pdf"}, {"filename": "b.pdf"}])
+    return service
+
+
+def test_delete_document_only_removes_its_chunks(service):
+    total = service.get_collection_info()["vectors_count"]
+
+    deleted = service.delete_document(filename="a.pdf")
+
+    assert deleted > 0
+    assert service.get_collection_info()["vectors_count"] == total - deleted
+    assert filenames(service, "promo paket internet") == ["b.pdf"]
+    assert service.delete_document(filename="a.pdf") == 0
+
+
+def test_delete_requires_filename_or_hash(service):
+    assert service.delete_document() == -1
+
+
+def test_replace_unchanged_document_is_noop(service):
+    before = service.kb_version(refresh=True)
+
+    result = service.replace_document(DOC_A, {"filename": "a.pdf"})
+
+    assert result["added"] == 0 and result["deleted"] == 0
+    assert result["unchanged"] > 0
+    assert service.kb_version(refresh=True) == before
+
+
+def test_replace_swaps_old_chunks_for_new(service):
+    new_text = "Promo paket internet bisnis dengan layanan prioritas. " * 30
+
+    result = service.replace_document(new_text, {"filename": "a.pdf"})
+
+    assert result["added"] > 0 and result["deleted"] > 0
+    contents = [doc.page_content for doc in service.similarity_search("promo paket internet", k=20)
+                if doc.metadata["filename"] == "a.pdf"]
+    assert contents and all("bisnis" in content for content in contents)
+    assert filenames(service, "kampanye media sosial", k=50) == ["a.pdf", "b.pdf"]
+
+
+def test_unscoped_delete_keeps_tenant_documents(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    service.for_tenant("acme").add_documents([DOC_A], [{"filename": "a.pdf"}])
+    service.add_documents([DOC_A], [{"filename": "a.pdf"}])
+
+    assert service.delete_document(filename="a.pdf") > 0
+    assert filenames(service.for_tenant("acme"), "promo paket internet") == ["a.pdf"]
+
+
+def test_payload_indexes_only_created_when_missing(make_service, qdrant, monkeypatch):
+    calls = []
+    create_payload_index = qdrant.create_payload_index
+
+    def spy(collection_name, field_name, **kwargs):
+        calls.append((collection_name, field_name))
+        return create_payload_index(collection_name, field_name=field_name, **kwargs)
+
+    monkeypatch.setattr(qdrant, "create_payload_index", spy)
+    make_service()
+    fields = [field for _, field in calls]
+    assert {name for name, _ in calls} == {"kb__v1"}
+    assert sorted(fields) == sorted({"metadata.tenant_id", "metadata.filename", "metadata.doc_hash", "metadata.kind"})
+
+    # Qdrant server melaporkan index yang sudah ada di payload_schema (in-memory tidak)
+    info = qdrant.get_collection("kb")
+    info.payload_schema = {
+        field: models.PayloadIndexInfo(data_type=models.PayloadSchemaType.KEYWORD, points=0) for field in fields
+    }
+    monkeypatch.setattr(qdrant, "get_collection", lambda collection_name: info)
+    calls.clear()
+    make_service()
+    assert calls == []
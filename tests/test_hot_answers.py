@@ -0,0 +1,83 @@
+"""
+Tests untuk precomputed hot answers dan invalidasi per versi knowledge base.
+"""
+import pytest
+
+from agents.topic_router import OFF_TOPIC_RESPONSE
+from config import settings
+from services.agent_service import AgentService
+from services.hot_answers import precompute_hot_answers
+from services.vector_service import VectorService
+
+
+DOC = "Promo paket internet rumah untuk keluarga dengan kuota besar. " * 20
+
+
+def log_entries(*queries, tenant=None):
+    return [{"agent": "marketing", "model": "telkom-ai", "q": q, "tenant": tenant} for q in queries]
+
+
+@pytest.fixture
+def agent_service(qdrant, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "hot_answers_enabled", True)
+    monkeypatch.setattr(settings, "hot_answers_db_path", str(tmp_path / "hot_answers.db"))
+    monkeypatch.setattr(settings, "query_log_enabled", False)
+    # Cache versi tidak pernah kedaluwarsa sendiri selama test
+    monkeypatch.setattr(settings, "qdrant_alias_refresh_seconds", 3600)
+    service = AgentService()
+    agent = service.get_agent("marketing", "telkom-ai")
+    agent.vector_service.add_documents([DOC], [{"filename": "promo.pdf"}])
+    monkeypatch.setattr(agent, "generate_response", lambda query, **kwargs: f"jawaban: {query}")
+    return service
+
+
+def hot_answer(service, query, tenant_id=None):
+    return service._hot_answer(query, "marketing", "telkom-ai", None, tenant_id)
+
+
+def test_precomputed_answer_served_for_phrasing_variants(agent_service):
+    entries = log_entries("Apa promo IndiHome?", "Apa promo IndiHome?", "apa promo indihome")
+
+    result = precompute_hot_answers(agent_service, entries, min_count=3)
+
+    assert result == {"clusters": 1, "queries": 1}
+    assert hot_answer(agent_service, "APA promo indihome??") == "jawaban: Apa promo IndiHome?"
+    assert hot_answer(agent_service, "promo lain") is None
+
+
+def test_refusals_and_errors_are_not_stored(agent_service, monkeypatch):
+    agent = agent_service.get_agent("marketing", "telkom-ai")
+    answers = {"resep nasi goreng": OFF_TOPIC_RESPONSE, "promo gagal": "Error: timeout"}
+    monkeypatch.setattr(agent, "generate_response", lambda query, **kwargs: answers[query])
+
+    result = precompute_hot_answers(agent_service, log_entries(*(["resep nasi goreng", "promo gagal"] * 3)),
+                                    min_count=3, threshold=0.99)
+
+    assert result == {"clusters": 0, "queries": 0}
+    assert hot_answer(agent_service, "resep nasi goreng") is None
+
+
+def test_write_invalidates_only_the_writing_tenant(agent_service):
+    vector_service = agent_service.get_agent("marketing", "telkom-ai").vector_service
+    entries = []
+    for tenant in ("acme", "globex"):
+        vector_service.for_tenant(tenant).add_documents([DOC], [{"filename": "promo.pdf"}])
+        entries += log_entries(*["promo indihome"] * 3, tenant=tenant)
+    precompute_hot_answers(agent_service, entries, min_count=3)
+    assert hot_answer(agent_service, "promo indihome", "acme") is not None
+
+    vector_service.for_tenant("acme").delete_document(filename="promo.pdf")
+
+    assert hot_answer(agent_service, "promo indihome", "acme") is None
+    assert hot_answer(agent_service, "promo indihome", "globex") == "jawaban: promo indihome"
+
+
+def test_write_from_another_worker_invalidates_cached_version(agent_service):
+    precompute_hot_answers(agent_service, log_entries(*["promo indihome"] * 3), min_count=3)
+    assert hot_answer(agent_service, "promo indihome") is not None
+
+    # Worker lain punya state (dan cache versi) sendiri
+    other = VectorService(collection_name=settings.qdrant_marketing_collection)
+    other.delete_document(filename="promo.pdf")
+
+    assert hot_answer(agent_service, "promo indihome") is None
@@ -0,0 +1,51 @@
+"""
+Tests untuk multi-query retrieval dan kombinasinya dengan two-tier retrieval.
+"""
+from config import settings
+from services.agent_service import AgentService
+
+
+PROMO = "Promo paket internet rumah untuk keluarga dengan kuota besar. " * 20
+FINANCE = "Laporan keuangan kuartal dengan rincian pajak dan akuntansi. " * 20
+
+
+def add_corpus(service):
+    service.add_documents([PROMO, FINANCE], [{"filename": "promo.pdf"}, {"filename": "finance.pdf"}])
+
+
+def test_multi_query_batch_matches_single_search(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    add_corpus(service)
+    variants = [["promo internet", "promo paket keluarga"], ["laporan pajak", "akuntansi kuartal"]]
+
+    for two_tier in (False, True):
+        batch = service.multi_query_search_batch(variants, k=3, two_tier=two_tier)
+        assert [[doc.metadata["_id"] for doc in docs] for docs in batch] == [
+            [doc.metadata["_id"] for doc in service.multi_query_search(queries, k=3, two_tier=two_tier)]
+            for queries in variants
+        ]
+    assert {doc.metadata["filename"] for doc in batch[0]} == {"promo.pdf"}
+
+
+def test_chat_batch_uses_combined_retrieval_mode(qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "marketing_multi_query", True)
+    monkeypatch.setattr(settings, "marketing_two_tier_retrieval", True)
+    monkeypatch.setattr(settings, "query_log_enabled", False)
+    agent_service = AgentService()
+    agent = agent_service.get_agent("marketing", "telkom-ai")
+    add_corpus(agent.vector_service)
+    calls = []
+    original = agent.vector_service.multi_query_search_batch
+    monkeypatch.setattr(agent.vector_service, "multi_query_search_batch",
+                        lambda *args, **kwargs: calls.append(kwargs) or original(*args, **kwargs))
+    received = {}
+
+    def generate_response(query, context=None, **kwargs):
+        received[query] = kwargs["documents"]
+        return "ok"
+
+    monkeypatch.setattr(agent, "generate_response", generate_response)
+
+    assert agent_service.chat_batch(["promo internet keluarga"], agent_type="marketing") == ["ok"]
+    assert calls and calls[0]["two_tier"] is True
+    assert received["promo internet keluarga"][0].metadata["filename"] == "promo.pdf"
@@ -0,0 +1,59 @@
+"""
+Tests untuk isolasi tenant dan state bersama view tenant VectorService.
+"""
+from config import settings
+
+
+DOC = "Promo paket internet rumah untuk keluarga dengan kuota besar. " * 20
+
+
+def filenames(service, query="promo paket internet", k=10):
+    return {doc.metadata.get("filename") for doc in service.similarity_search(query, k=k)}
+
+
+def test_tenants_only_see_their_own_documents(make_service):
+    service = make_service()
+    service.for_tenant("acme").add_documents([DOC], [{"filename": "acme.pdf"}])
+    service.for_tenant("globex").add_documents([DOC], [{"filename": "globex.pdf"}])
+
+    assert filenames(service.for_tenant("acme")) == {"acme.pdf"}
+    assert filenames(service.for_tenant("globex")) == {"globex.pdf"}
+    assert filenames(service.for_tenant("initech")) == set()
+    assert service.for_tenant("acme").two_tier_search("promo paket internet", k=5)[0].metadata["filename"] == "acme.pdf"
+
+
+def test_tenant_delete_does_not_touch_other_tenant(make_service):
+    service = make_service()
+    for tenant in ("acme", "globex"):
+        service.for_tenant(tenant).add_documents([DOC], [{"filename": "same.pdf"}])
+
+    assert service.for_tenant("acme").delete_document(filename="same.pdf") > 0
+
+    assert filenames(service.for_tenant("acme")) == set()
+    assert filenames(service.for_tenant("globex")) == {"same.pdf"}
+
+
+def test_tenant_views_share_collection_state(make_service):
+    service = make_service()
+    view = service.for_tenant("acme")
+
+    assert view._state is service._state
+    assert view.embeddings is service.embeddings
+    view.kb_version()
+    assert "acme" in service._kb_versions
+
+
+def test_default_tenant_sees_legacy_points_until_backfilled(make_service, monkeypatch):
+    make_service().add_documents([DOC], [{"filename": "legacy.pdf"}])
+    monkeypatch.setattr(settings, "qdrant_multitenancy", True)
+    service = make_service()
+
+    assert service.tenant_id == settings.qdrant_default_tenant
+    assert filenames(service) == {"legacy.pdf"}
+    assert filenames(service.for_tenant("acme")) == set()
+
+    assert service.backfill_default_tenant() > 0
+    assert service.backfill_default_tenant() == 0
+    assert filenames(service) == {"legacy.pdf"}
+    assert service.delete_document(filename="legacy.pdf") > 0
+    assert service.get_collection_info()["vectors_count"] == 0
@@ -0,0 +1,122 @@
+"""
+Tests untuk kompresi payload chunk (zstd dengan dan tanpa dictionary).
+"""
+import random
+
+import pytest
+
+pytest.importorskip("zstandard")
+
+from config import settings  # noqa: E402
+from services import payload_codec  # noqa: E402
+
+
+WORDS = ("promo paket internet indihome harga bulanan kuota pelanggan bisnis "
+         "digital layanan kampanye segmentasi konversi").split()
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry():
+    """Setiap test mulai seperti proses baru tanpa dictionary terdaftar."""
+    payload_codec._dictionaries.clear()
+    payload_codec._local.__dict__.clear()
+    yield
+    payload_codec._dictionaries.clear()
+    payload_codec._local.__dict__.clear()
+
+
+def corpus(n, words_per_chunk=80, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_chunk)) for _ in range(n)]
+
+
+def no_dictionary(dict_id):
+    pytest.fail(f"dictionary {dict_id} tidak seharusnya dimuat")
+
+
+def test_roundtrip_without_dictionary():
+    text = "Strategi kampanye digital untuk pelanggan bisnis. " * 10
+    payload = payload_codec.encode_content(text, dict_id=0)
+    assert payload_codec.CONTENT_KEY not in payload
+    assert payload[payload_codec.DICT_ID_KEY] == 0
+    assert payload_codec.decode_content(payload, no_dictionary) == text
+
+
+def test_roundtrip_with_dictionary_loaded_on_demand():
+    trained = payload_codec.train_dictionary(corpus(200), 4096)
+    assert trained is not None
+    dict_id, data = trained
+    payload_codec.register_dictionary(dict_id, data)
+
+    text = corpus(1, seed=99)[0]
+    payload = payload_codec.encode_content(text, dict_id=dict_id)
+    plain = payload_codec.encode_content(text, dict_id=0)
+    assert len(payload[payload_codec.COMPRESSED_CONTENT_KEY]) < len(plain[payload_codec.COMPRESSED_CONTENT_KEY])
+
+    # Proses lain: dictionary dimuat sekali lewat loader
+    payload_codec._dictionaries.clear()
+    payload_codec._local.__dict__.clear()
+    loaded = []
+
+    def load(requested):
+        loaded.append(requested)
+        return data
+
+    assert payload_codec.decode_content(payload, load) == text
+    assert payload_codec.decode_content(payload, load) == text
+    assert loaded == [dict_id]
+
+
+def test_plain_payload_passes_through():
+    assert payload_codec.decode_content({"page_content": "teks biasa"}, no_dictionary) == "teks biasa"
+    assert payload_codec.decode_content({}, no_dictionary) == ""
+
+
+def test_missing_dictionary_raises():
+    dict_id, data = payload_codec.train_dictionary(corpus(200), 4096)
+    payload_codec.register_dictionary(dict_id, data)
+    payload = payload_codec.encode_content("promo internet", dict_id=dict_id)
+    payload_codec._dictionaries.clear()
+    payload_codec._local.__dict__.clear()
+
+    with pytest.raises(ValueError):
+        payload_codec.decode_content(payload, lambda requested: None)
+
+
+def test_train_dictionary_with_too_few_samples_returns_none():
+    assert payload_codec.train_dictionary(["promo"], 4096) is None
+
+
+def stored_payloads(client, collection_name):
+    points, _ = client.scroll(collection_name, limit=1000, with_payload=True)
+    return [point.payload for point in points if point.payload.get("metadata", {}).get("kind") != "summary"]
+
+
+def test_vector_service_stores_and_searches_compressed_chunks(make_service, qdrant, monkeypatch):
+    monkeypatch.setattr(settings, "payload_compression", "zstd")
+    monkeypatch.setattr(settings, "payload_dict_size", 4096)
+    monkeypatch.setattr(settings, "payload_dict_min_samples", 16)
+    service = make_service(chunk_size=300, chunk_overlap=0)
+    texts = corpus(40, words_per_chunk=25)
+
+    service.add_documents(texts, [{"filename": f"doc_{i}.pdf"} for i in range(len(texts))])
+
+    payloads = stored_payloads(qdrant, "kb")
+    assert payloads and all(payload_codec.CONTENT_KEY not in payload for payload in payloads)
+    assert {payload[payload_codec.DICT_ID_KEY] for payload in payloads} != {0}
+    # Proses baru: dictionary dimuat dari registry saat decode
+    payload_codec._dictionaries.clear()
+    payload_codec._local.__dict__.clear()
+    assert service.similarity_search(texts[7], k=1)[0].page_content == texts[7]
+
+
+def test_compress_existing_payloads_keeps_search_results(make_service, qdrant, monkeypatch):
+    service = make_service(chunk_size=300, chunk_overlap=0)
+    texts = corpus(40, words_per_chunk=25)
+    service.add_documents(texts, [{"filename": f"doc_{i}.pdf"} for i in range(len(texts))])
+    monkeypatch.setattr(settings, "payload_dict_size", 4096)
+
+    assert service.compress_existing_payloads() == len(texts)
+
+    assert all(payload_codec.CONTENT_KEY not in payload for payload in stored_payloads(qdrant, "kb"))
+    assert service.similarity_search(texts[3], k=1)[0].page_content == texts[3]
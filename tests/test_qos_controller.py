@@ -0,0 +1,90 @@
+"""
+Tests untuk transisi level QosController.
+"""
+from services.qos_controller import QOS_PROFILES, QosController, percentile
+
+
+def make_controller(**overrides):
+    params = dict(
+        latency_slo_ms=100, max_in_flight=4, window_seconds=60,
+        step_interval_seconds=0, recovery_ratio=0.5, min_samples=3
+    )
+    params.update(overrides)
+    return QosController(**params)
+
+
+def record(controller, latency_seconds, count):
+    """Jalankan request berurutan dengan latency tertentu."""
+    for _ in range(count):
+        controller.acquire()
+        controller.release(latency_seconds)
+
+
+def test_degrades_when_p90_exceeds_slo():
+    controller = make_controller()
+    record(controller, 0.5, 3)
+    assert controller.level == 1
+    assert controller.acquire().level == 1
+
+
+def test_ignores_latency_below_min_samples():
+    controller = make_controller()
+    record(controller, 0.5, 2)
+    assert controller.level == 0
+
+
+def test_degrades_when_in_flight_exceeds_limit():
+    controller = make_controller(max_in_flight=2)
+    profiles = [controller.acquire() for _ in range(3)]
+    assert [profile.level for profile in profiles] == [0, 0, 1]
+
+
+def test_recovers_one_level_when_healthy():
+    controller = make_controller()
+    record(controller, 0.5, 3)
+    record(controller, 0.5, 3)
+    assert controller.level == 2
+
+    record(controller, 0.01, 3)
+    assert controller.level == 1
+    record(controller, 0.01, 3)
+    assert controller.level == 0
+
+
+def test_no_recovery_while_latency_between_recovery_and_slo():
+    controller = make_controller()
+    record(controller, 0.5, 3)
+    # 80 ms: di bawah SLO tetapi di atas recovery_ratio * SLO
+    record(controller, 0.08, 5)
+    assert controller.level == 1
+
+
+def test_step_interval_limits_changes():
+    controller = make_controller(step_interval_seconds=3600)
+    record(controller, 0.5, 3)
+    record(controller, 0.5, 6)
+    assert controller.level == 1
+
+
+def test_level_capped_at_last_profile():
+    controller = make_controller()
+    record(controller, 0.5, 3 * (len(QOS_PROFILES) + 2))
+    assert controller.level == len(QOS_PROFILES) - 1
+
+
+def test_status_reports_current_profile():
+    controller = make_controller()
+    record(controller, 0.5, 3)
+    status = controller.status()
+    assert status["level"] == 1
+    assert status["profile"]["k"] == QOS_PROFILES[1].k
+    assert status["in_flight"] == 0
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 11))
+    assert percentile(values, 0.9) == 9
+    assert percentile(values, 0.95) == 10
+    assert percentile(values, 0.5) == 5
+    assert percentile([3, 1, 2], 0.9) == 3
+    assert percentile([], 0.9) == 0.0
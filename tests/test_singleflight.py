@@ -0,0 +1,166 @@
+"""
+Tests untuk SingleFlight dan SharedStream.
+"""
+import threading
+import time
+
+import pytest
+
+from utils.singleflight import SingleFlight
+
+
+def wait_until(predicate, timeout=5.0):
+    """Tunggu sampai predicate True (gagal jika timeout)."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            pytest.fail("timeout menunggu kondisi")
+        time.sleep(0.005)
+
+
+def run_concurrently(flight, key, fn, callers):
+    """Jalankan flight.do dari banyak thread; fn baru selesai setelah semua pemanggil menunggu."""
+    results = [None] * callers
+    errors = [None] * callers
+
+    def call(index):
+        try:
+            results[index] = flight.do(key, fn)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "hasil"
+
+    threads, results, errors = run_concurrently(flight, "key", fn, callers=8)
+    wait_until(lambda: "key" in flight._calls and flight._calls["key"].waiters == 7)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ["hasil"] * 8
+    assert errors == [None] * 8
+
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("gagal")
+
+    threads, results, errors = run_concurrently(flight, "key", fn, callers=4)
+    wait_until(lambda: "key" in flight._calls and flight._calls["key"].waiters == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert len({id(error) for error in errors}) == 1
+
+
+def test_key_released_after_result_and_error():
+    flight = SingleFlight()
+    calls = []
+
+    def ok():
+        calls.append("ok")
+        return len(calls)
+
+    assert flight.do("key", ok) == 1
+    assert flight.in_flight() == 0
+    # Pemanggilan berikutnya menjalankan fungsi lagi, bukan hasil lama
+    assert flight.do("key", ok) == 2
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", fail)
+    assert flight.in_flight() == 0
+    assert flight.do("key", ok) == 3
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: "a") == "a"
+    assert flight.do("b", lambda: "b") == "b"
+
+
+def test_late_joiner_replays_stream_from_start():
+    flight = SingleFlight()
+    release = threading.Event()
+    factory_calls = []
+
+    def source():
+        yield "a"
+        yield "b"
+        release.wait(5)
+        yield "c"
+
+    def factory():
+        factory_calls.append(1)
+        return source()
+
+    first = flight.stream("key", factory)
+    assert [next(first), next(first)] == ["a", "b"]
+
+    late = flight.stream("key", factory)
+    release.set()
+
+    assert list(first) == ["c"]
+    assert list(late) == ["a", "b", "c"]
+    assert len(factory_calls) == 1
+
+
+def test_stream_error_reaches_subscribers_and_releases_key():
+    flight = SingleFlight()
+
+    def source():
+        yield "a"
+        raise ValueError("putus")
+
+    received = []
+    with pytest.raises(ValueError):
+        for chunk in flight.stream("key", source):
+            received.append(chunk)
+
+    assert received == ["a"]
+    assert flight.in_flight() == 0
+
+
+def test_joiner_sees_producer_source():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    class Source:
+        def __init__(self):
+            self.state = []
+
+        def __iter__(self):
+            release.wait(5)
+            self.state.append("selesai")
+            yield "a"
+
+    first = flight.shared_stream("key", Source)
+    joiner = flight.shared_stream("key", Source)
+    release.set()
+
+    assert joiner is first
+    assert list(joiner.subscribe()) == ["a"]
+    assert joiner.source.state == ["selesai"]
@@ -0,0 +1,34 @@
+"""
+Tests untuk topic router Marketing Agent.
+"""
+from agents.topic_router import TopicRouter
+
+
+def test_classifies_keywords_with_suffixes_and_phrases():
+    router = TopicRouter()
+
+    assert router.classify("Bagaimana strategi pemasarannya?").matched == "pemasarannya"
+    assert router.classify("Analisis digital marketing kami").matched == "digital marketing"
+    assert not router.classify("Resep nasi goreng yang enak").is_marketing
+    # Akronim pendek harus cocok utuh
+    assert not router.classify("Seorang ahli semantik").is_marketing
+
+
+def test_follow_up_routed_with_conversation_context():
+    router = TopicRouter()
+    follow_up = "Bagaimana dengan bulan lalu?"
+
+    assert not router.classify(follow_up).is_marketing
+    decision = router.classify(follow_up, context="Berapa ROI kampanye Ramadan?")
+    assert decision.is_marketing and decision.matched == "roi"
+
+
+def test_logs_decision_without_query_text(monkeypatch):
+    router = TopicRouter()
+    logged = []
+    monkeypatch.setattr(router.logger, "debug", lambda msg, extra=None: logged.append(extra))
+    monkeypatch.setattr(router.logger, "info", lambda *args, **kwargs: logged.append("info"))
+
+    router.classify("Resep nasi goreng rahasia keluarga")
+
+    assert logged == [{"decision": "off_topic", "matched": None}]
@@ -0,0 +1,76 @@
+"""
+Tests untuk two-tier retrieval (point ringkasan dokumen lalu chunk).
+"""
+import uuid
+
+from qdrant_client.http import models
+
+from services.collection_registry import get_collection_meta, set_collection_meta
+
+
+PROMO = "Promo paket internet rumah untuk keluarga dengan kuota besar. " * 20
+FINANCE = "Laporan keuangan kuartal dengan rincian pajak dan akuntansi. " * 20
+CAMPAIGN = "Kampanye media sosial untuk meningkatkan engagement pelanggan muda. " * 20
+
+
+def add_corpus(service):
+    service.add_documents(
+        [PROMO, FINANCE, CAMPAIGN],
+        [{"filename": "promo.pdf"}, {"filename": "finance.pdf"}, {"filename": "campaign.pdf"}]
+    )
+
+
+def test_two_tier_returns_chunks_of_top_documents(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    add_corpus(service)
+
+    docs = service.two_tier_search("promo paket internet keluarga", k=3, top_documents=1)
+
+    assert len(docs) == 3
+    assert {doc.metadata["filename"] for doc in docs} == {"promo.pdf"}
+
+
+def test_two_tier_batch_matches_single_queries(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    add_corpus(service)
+    queries = ["promo paket internet", "laporan pajak akuntansi"]
+
+    batch = service.two_tier_search_batch(queries, k=2, top_documents=1)
+
+    assert [[doc.metadata["filename"] for doc in docs] for docs in batch] == [
+        [doc.metadata["filename"] for doc in service.two_tier_search(query, k=2, top_documents=1)]
+        for query in queries
+    ]
+
+
+def test_flat_search_never_returns_summary_points(make_service):
+    service = make_service(chunk_size=200, chunk_overlap=0)
+    add_corpus(service)
+
+    docs = service.similarity_search("promo paket internet", k=100)
+
+    # Setiap dokumen punya satu point ringkasan yang tidak boleh muncul sebagai chunk
+    assert len(docs) == service.get_collection_info()["vectors_count"] - 3
+
+
+def test_legacy_collection_falls_back_to_flat_search_until_backfilled(make_service, qdrant):
+    service = make_service()
+    meta = get_collection_meta(qdrant, "kb")
+    meta.pop("document_summaries")
+    set_collection_meta(qdrant, "kb", meta)
+    # Chunk lama: tanpa doc_hash dan tanpa point ringkasan
+    vector = service.embeddings.embed_query(PROMO)
+    qdrant.upsert("kb", points=[models.PointStruct(
+        id=str(uuid.uuid4()), vector=vector,
+        payload={"page_content": PROMO, "metadata": {"filename": "legacy.pdf", "doc_id": "0", "chunk_index": 0}}
+    )])
+    service.add_documents([FINANCE], [{"filename": "finance.pdf"}])
+    service.kb_version(refresh=True)
+
+    assert not service.has_document_summaries()
+    assert service.two_tier_search("promo paket internet", k=1)[0].metadata["filename"] == "legacy.pdf"
+
+    assert service.backfill_document_summaries() == 1
+    assert service.has_document_summaries()
+    assert service.two_tier_search("promo paket internet", k=1, top_documents=1)[0].metadata["filename"] == "legacy.pdf"
+    assert service.backfill_document_summaries() == 0
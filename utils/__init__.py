@@ -2,7 +2,8 @@
 Utility functions.
 """
 
-from .logger import setup_logger
-from .validators import validate_model_type, validate_agent_type
+from .logger import setup_logger, request_context, get_request_id
+from .validators import validate_model_type, validate_agent_type, is_error_response
+from .singleflight import SingleFlight, SharedStream
 
-__all__ = ["setup_logger", "validate_model_type", "validate_agent_type"]
+__all__ = ["setup_logger", "request_context", "get_request_id", "validate_model_type", "validate_agent_type", "is_error_response", "SingleFlight", "SharedStream"]
@@ -1,42 +1,165 @@
 """
 Logger utility untuk aplikasi.
+
+Semua logger menulis ke satu queue in-memory; I/O ke stdout dilakukan oleh
+satu thread QueueListener sehingga logging tidak pernah memblokir chat turn.
+Output berupa JSON per baris (atau text jika LOG_FORMAT=text) dengan request id
+dari context aktif. Event DEBUG di-sample sesuai LOG_DEBUG_SAMPLE_RATE.
 """
+import atexit
+import contextvars
+import copy
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Iterator, Optional
+
 from config import settings
 
 
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+_listener_lock = threading.Lock()
+
+# Atribut standar LogRecord; atribut lain dianggap field `extra` dan ikut ditulis
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+
+def get_request_id() -> Optional[str]:
+    """Request id dari context aktif."""
+    return _request_id.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Set request id untuk semua log di dalam blok.
+
+    Args:
+        request_id: Request id (default: id baru, atau id dari context luar jika ada)
+
+    Returns:
+        Request id yang aktif
+    """
+    request_id = request_id or _request_id.get() or uuid.uuid4().hex
+    token = _request_id.set(request_id)
+    try:
+        yield request_id
+    finally:
+        _request_id.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """Format LogRecord sebagai satu baris JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestIdFilter(logging.Filter):
+    """Tambahkan request id dari context ke setiap record (dijalankan di thread pemanggil)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Loloskan hanya sebagian event DEBUG; level lain selalu lolos."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler yang mempertahankan field extra dan traceback terpisah."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _get_formatter() -> logging.Formatter:
+    """Formatter sesuai settings.log_format."""
+    if settings.log_format.lower() == "text":
+        return logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s')
+    return JsonFormatter()
+
+
+def _ensure_listener():
+    """Start QueueListener sekali per proses."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(_get_formatter())
+        _listener = QueueListener(_log_queue, handler, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
 def setup_logger(name: str = "app", level: str = None) -> logging.Logger:
     """
     Setup logger untuk aplikasi.
-    
+
     Args:
         name: Nama logger
         level: Level logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
-        
+
     Returns:
         Logger instance
     """
     log_level = level or settings.log_level
-    
+    _ensure_listener()
+
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(getattr(logging, log_level.upper(), logging.INFO))
-    
+    logger.propagate = False
+
     # Clear existing handlers
     logger.handlers.clear()
-    
-    # Create console handler
-    handler = logging.StreamHandler(sys.stdout)
+
+    # Handler hanya memasukkan record ke queue; I/O dilakukan thread listener
+    handler = _NonBlockingQueueHandler(_log_queue)
     handler.setLevel(getattr(logging, log_level.upper(), logging.INFO))
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    handler.setFormatter(formatter)
-    
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(DebugSamplingFilter(settings.log_debug_sample_rate))
+
     # Add handler to logger
     logger.addHandler(handler)
-    
+
     return logger
@@ -0,0 +1,125 @@
+"""
+Profiling per request (opt-in).
+
+Mode 'sampling' mengambil stack thread request secara berkala dan menulis
+collapsed stacks (.folded) yang bisa langsung dibuka di speedscope atau
+diubah menjadi SVG dengan flamegraph.pl. Mode 'cprofile' menulis file .prof
+(deterministik) untuk snakeviz/pstats. Saat profiling tidak aktif, overhead-nya
+hanya satu pengecekan boolean.
+"""
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+from config import settings
+from utils.logger import setup_logger, get_request_id
+
+
+logger = setup_logger("utils.profiling")
+
+# cProfile tidak bisa aktif di dua request sekaligus (Python >= 3.12)
+_cprofile_lock = threading.Lock()
+
+
+class StackSampler:
+    """Sampling profiler sederhana untuk satu thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        """
+        Initialize StackSampler.
+
+        Args:
+            thread_id: Ident thread yang di-sample
+            interval: Interval sampling (detik)
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path: str):
+        """Tulis collapsed stacks (format flamegraph.pl / speedscope)."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _profile_path(name: str, extension: str) -> str:
+    """Path file profile untuk request aktif."""
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    request_id = get_request_id() or "norequest"
+    return os.path.join(settings.profiling_dir, f"{timestamp}-{name}-{request_id}.{extension}")
+
+
+@contextmanager
+def profile_request(name: str, enabled: Optional[bool] = None) -> Iterator[None]:
+    """
+    Profile blok kode jika profiling aktif lewat settings atau flag per request.
+
+    Args:
+        name: Nama operasi (dipakai di nama file)
+        enabled: Flag per request; profiling juga aktif jika settings.profiling_enabled
+    """
+    if not (enabled or settings.profiling_enabled):
+        yield
+        return
+
+    start = time.perf_counter()
+    if settings.profiling_mode == "cprofile":
+        if not _cprofile_lock.acquire(blocking=False):
+            logger.warning("profile_skipped", extra={"operation": name, "reason": "cprofile busy"})
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _cprofile_lock.release()
+            path = _profile_path(name, "prof")
+            profiler.dump_stats(path)
+            logger.info("profile_written", extra={
+                "path": path, "operation": name,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
+    else:
+        sampler = StackSampler(threading.get_ident(), settings.profiling_interval_ms / 1000.0)
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            path = _profile_path(name, "folded")
+            sampler.write_folded(path)
+            logger.info("profile_written", extra={
+                "path": path, "operation": name, "samples": sum(sampler.stacks.values()),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            })
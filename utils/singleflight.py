@@ -0,0 +1,187 @@
+"""
+Single-flight utility untuk menggabungkan request identik yang sedang berjalan.
+"""
+import contextvars
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional
+
+
+class _Call:
+    """State satu komputasi yang sedang berjalan."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SharedStream:
+    """
+    Stream token yang bisa dibaca oleh banyak consumer sekaligus.
+
+    Source iterator dikonsumsi sekali oleh thread producer; setiap consumer
+    membaca buffer dari awal sehingga consumer yang datang belakangan tetap
+    mendapatkan stream lengkap.
+    """
+
+    def __init__(self, source: Iterable[str]):
+        self._source = source
+        self._chunks: List[str] = []
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._on_finish: Optional[Callable[[], None]] = None
+
+    @property
+    def source(self) -> Iterable[str]:
+        """Source iterator yang dikonsumsi producer."""
+        return self._source
+
+    def start(self, on_finish: Optional[Callable[[], None]] = None):
+        """
+        Mulai thread producer.
+
+        Args:
+            on_finish: Callback yang dipanggil setelah source habis
+        """
+        self._on_finish = on_finish
+        # Jalankan producer dengan context pemanggil (misalnya request id untuk logging)
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(self._produce, self._source), daemon=True).start()
+
+    def _produce(self, source: Iterable[str]):
+        try:
+            for chunk in source:
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            if self._on_finish:
+                self._on_finish()
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def subscribe(self) -> Iterator[str]:
+        """
+        Attach ke stream.
+
+        Returns:
+            Iterator token dari awal stream
+        """
+        index = 0
+        while True:
+            with self._cond:
+                while index >= len(self._chunks) and not self._finished:
+                    self._cond.wait()
+                pending = self._chunks[index:]
+                finished = self._finished
+            for chunk in pending:
+                yield chunk
+            index += len(pending)
+            if finished:
+                break
+        if self._error is not None:
+            raise self._error
+
+
+class SingleFlight:
+    """
+    Menggabungkan pemanggilan identik yang berjalan bersamaan.
+
+    Pemanggil pertama untuk sebuah key menjalankan fungsi, pemanggil lain
+    dengan key yang sama menunggu dan menerima hasil (atau exception) yang sama.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, SharedStream] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Jalankan fn sekali untuk semua pemanggil bersamaan dengan key yang sama.
+
+        Args:
+            key: Key yang mengidentifikasi request
+            fn: Fungsi yang dijalankan
+            *args: Argument untuk fn
+            **kwargs: Keyword argument untuk fn
+
+        Returns:
+            Hasil fn
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stream(self, key: Hashable, factory: Callable[[], Iterable[str]]) -> Iterator[str]:
+        """
+        Attach ke shared token stream untuk key, atau mulai stream baru.
+
+        Args:
+            key: Key yang mengidentifikasi request
+            factory: Fungsi yang membuat source iterator token
+
+        Returns:
+            Iterator token
+        """
+        return self.shared_stream(key, factory).subscribe()
+
+    def shared_stream(self, key: Hashable, factory: Callable[[], Iterable[str]]) -> SharedStream:
+        """
+        Shared stream yang sedang berjalan untuk key, atau stream baru dari factory.
+
+        Berguna jika consumer perlu membaca state source milik producer
+        (lihat SharedStream.source), bukan hanya token-nya.
+
+        Args:
+            key: Key yang mengidentifikasi request
+            factory: Fungsi yang membuat source iterator token
+
+        Returns:
+            SharedStream yang sudah berjalan
+        """
+        with self._lock:
+            shared = self._streams.get(key)
+            if shared is None:
+                shared = SharedStream(factory())
+                self._streams[key] = shared
+                shared.start(on_finish=lambda: self._release_stream(key, shared))
+        return shared
+
+    def _release_stream(self, key: Hashable, shared: SharedStream):
+        with self._lock:
+            if self._streams.get(key) is shared:
+                del self._streams[key]
+
+    def in_flight(self) -> int:
+        """Jumlah komputasi dan stream yang sedang berjalan."""
+        with self._lock:
+            return len(self._calls) + len(self._streams)
@@ -3,6 +3,9 @@ Validator functions.
 """
 from typing import List
 
+# Prefixes of agent/AgentService error messages (not model answers)
+ERROR_RESPONSE_PREFIXES = ("Maaf, terjadi kesalahan", "Error: ")
+
 
 def validate_model_type(model_type: str) -> bool:
     """
@@ -32,6 +35,19 @@ def validate_agent_type(agent_type: str) -> bool:
     return agent_type.lower() in valid_agents
 
 
+def is_error_response(response: str) -> bool:
+    """
+    Check whether a response is an error/fallback message instead of a model answer.
+    
+    Args:
+        response: Response text from an agent or AgentService
+        
+    Returns:
+        True if the response is an error message, False otherwise
+    """
+    return not response or response.startswith(ERROR_RESPONSE_PREFIXES)
+
+
 def get_valid_models() -> List[str]:
     """Get list of valid model types."""
     return ["openai", "gemini"]